@@ -0,0 +1,67 @@
+# benchmarks/bench_mezzanine.py
+"""
+Benchmark de los perfiles de intermedio (mezzanine) de los cortes recodificados.
+
+Codifica una muestra de un vídeo (por defecto, uno sintético con testsrc2)
+con cada perfil de MEZZANINE_PROFILES, también el CRF 12 con pérdida, y
+muestra los FPS de codificación, el tamaño resultante y el perfil que elegiría
+el modo automático de la pestaña Cortar.
+
+Uso:
+    python -m benchmarks.bench_mezzanine [--input video.mp4] [--seconds 4] [--size 1920x1080]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.ffmpeg_logic import MEZZANINE_PROFILES  # noqa: E402
+from logic.mezzanine import benchmark_mezzanine, choose_mezzanine, SAMPLE_SECONDS  # noqa: E402
+
+
+def build_source(path, seconds, size):
+    """Vídeo sintético con movimiento y ruido, casi sin pérdida para no sesgar la muestra."""
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30,noise=alls=8:allf=t",
+        "-t", str(seconds),
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "0",
+        path,
+    ], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="Vídeo a medir (por defecto se genera uno sintético)")
+    parser.add_argument("--seconds", type=float, default=SAMPLE_SECONDS)
+    parser.add_argument("--size", default="1920x1080")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_mezzanine_")
+    try:
+        video_path = args.input
+        if not video_path:
+            video_path = os.path.join(work_dir, "source.mp4")
+            build_source(video_path, args.seconds, args.size)
+
+        results = benchmark_mezzanine(video_path, list(MEZZANINE_PROFILES), args.seconds)
+        lossless = [r for r in results if MEZZANINE_PROFILES[r["name"]]["lossless"]]
+        chosen = choose_mezzanine(lossless)
+
+        print(f"\nMuestra de {args.seconds} s de {os.path.basename(video_path)}\n")
+        print(f"{'perfil':<40} | {'fps':>8} | {'MB':>8} | {'segundos':>8}")
+        print("-" * 74)
+        for r in sorted(results, key=lambda r: r["seconds"]):
+            mark = "  <- automático" if r["name"] == chosen else ""
+            print(f"{r['name']:<40} | {r['fps']:>8.1f} | {r['bytes'] / 1e6:>8.1f} | {r['seconds']:>8.2f}{mark}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_mp4_layout.py
+"""
+Benchmark de la disposición de las salidas MP4: faststart frente a fragmentado.
+
+Con +faststart FFmpeg reescribe el archivo entero al terminar para mover el
+moov al principio; el MP4 fragmentado se escribe una sola vez. Se genera un
+vídeo sintético grande (o se usa --input) y se escribe con cada disposición de
+MP4_LAYOUTS como en un corte con copia de streams (o recodificando con
+--encode), midiendo el tiempo total, los bytes escritos por el proceso y el
+tamaño final. En Linux los bytes salen de /proc/<pid>/io como en JobMetrics:
+'wchar' (todo lo que el proceso pasó a write, incluida la reescritura de
++faststart aunque siga en la caché de páginas) y 'write_bytes' (lo que llegó
+a la capa de bloques). Se leen con el proceso ya terminado pero sin recoger
+(waitid con WNOWAIT), así que incluyen las últimas escrituras. En macOS solo
+hay ru_oublock del rusage (que se queda corto) y en Windows no hay medida.
+
+Uso:
+    python -m benchmarks.bench_mp4_layout [--input video.mp4] [--seconds 120] [--encode]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.ffmpeg_logic import MP4_LAYOUTS, mp4_layout_args  # noqa: E402
+
+
+def build_source(path, seconds, size, bitrate):
+    """Vídeo sintético con ruido a bitrate alto para que la salida pese varios GB."""
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30,noise=alls=20:allf=t",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000",
+        "-t", str(seconds),
+        "-c:v", "libx264", "-preset", "ultrafast", "-b:v", bitrate, "-g", "60",
+        "-c:a", "aac", "-b:a", "192k",
+        path,
+    ], check=True)
+
+
+def read_proc_io(pid):
+    """Contadores de /proc/<pid>/io como dict (vacío si no existe)."""
+    counters = {}
+    try:
+        with open(f"/proc/{pid}/io", "r", encoding="ascii") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                counters[key] = int(value)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+
+def run_measured(command):
+    """Ejecuta el comando y devuelve (segundos, wchar o None, write_bytes o None)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    wchar = write_bytes = None
+    if hasattr(os, "wait4"):
+        stderr = proc.stderr.read()
+        if hasattr(os, "waitid"):
+            # Terminado pero sin recoger: /proc/<pid>/io sigue disponible con los totales
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            counters = read_proc_io(proc.pid)
+            wchar, write_bytes = counters.get("wchar"), counters.get("write_bytes")
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if write_bytes is None:
+            write_bytes = usage.ru_oublock * 512
+    else:
+        _, stderr = proc.communicate()
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(stderr.decode("utf-8", "replace").strip())
+    return elapsed, wchar, write_bytes
+
+
+def format_mb(value, width):
+    return f"{value / 1e6:>{width}.0f}" if value is not None else f"{'-':>{width}}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="Vídeo de entrada (por defecto se genera uno sintético)")
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--bitrate", default="150M")
+    parser.add_argument("--encode", action="store_true", help="Recodificar (x264 ultrafast) en vez de copiar")
+    parser.add_argument("--work-dir", help="Carpeta de las salidas (por defecto, una temporal)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_mp4_layout_", dir=args.work_dir)
+    try:
+        video_path = args.input
+        if not video_path:
+            video_path = os.path.join(work_dir, "source.mp4")
+            print(f"Generando fuente sintética de {args.seconds:g} s a {args.bitrate}...")
+            build_source(video_path, args.seconds, args.size, args.bitrate)
+
+        codec_args = (["-c:v", "libx264", "-preset", "ultrafast", "-crf", "18", "-c:a", "copy"]
+                      if args.encode else ["-c", "copy"])
+        print(f"Entrada: {os.path.basename(video_path)} ({os.path.getsize(video_path) / 1e6:.0f} MB), "
+              f"{'recodificando' if args.encode else 'copia de streams'}\n")
+        print(f"{'disposición':<32} | {'segundos':>8} | {'MB wchar':>9} | {'MB a disco':>10} | {'MB archivo':>10}")
+        print("-" * 82)
+
+        for i, layout in enumerate(MP4_LAYOUTS):
+            output_path = os.path.join(work_dir, f"out_{i}.mp4")
+            command = [
+                "ffmpeg", "-v", "error", "-y", "-i", video_path,
+                "-map", "0", *codec_args,
+                *mp4_layout_args("mp4", layout),
+                output_path,
+            ]
+            elapsed, wchar, write_bytes = run_measured(command)
+            print(f"{layout:<32} | {elapsed:>8.2f} | {format_mb(wchar, 9)} | {format_mb(write_bytes, 10)} | "
+                  f"{os.path.getsize(output_path) / 1e6:>10.0f}")
+            os.remove(output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
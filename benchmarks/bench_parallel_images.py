@@ -0,0 +1,112 @@
+# benchmarks/bench_parallel_images.py
+"""
+Benchmark de la codificación paralela de secuencias de imágenes.
+
+Genera (o usa, con --folder) una secuencia de PNG 4K de 16 bits y la convierte
+a vídeo con 1, 2, 4 y 8 procesos, igual que la pestaña Imágenes: rangos
+contiguos con -start_number/-frames:v codificados a la vez (con el presupuesto
+de hilos del planificador) y empalmados con el demuxer concat. Cada caso usa
+una caché vacía para que no se reutilice la codificación anterior.
+
+Uso:
+    python -m benchmarks.bench_parallel_images [--frames 240] [--format "mp4 (H.265 10-bit)"]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.image_render import convert_images_job  # noqa: E402
+from logic.job_scheduler import JobScheduler  # noqa: E402
+
+
+def generate_sequence(folder, frames, size):
+    """Escribe 'frames' PNG RGB de 16 bits (testsrc2) en 'folder'."""
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=24",
+        "-frames:v", str(frames),
+        "-pix_fmt", "rgb48be",
+        os.path.join(folder, "frame_%05d.png"),
+    ], check=True)
+
+
+def run_job(job, workers, scheduler):
+    """Ejecuta las etapas del trabajo con 'workers' procesos a la vez; devuelve los segundos."""
+    threads = scheduler.thread_budget(workers)
+
+    def run_step(step):
+        command = scheduler.apply_thread_budget(step["command"], threads)
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip()[-500:])
+        if step.get("on_success"):
+            step["on_success"]()
+
+    start = time.perf_counter()
+    for stage in job["stages"]:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run_step, stage))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", help="Carpeta con una secuencia existente (si no, se genera una)")
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--size", default="3840x2160")
+    parser.add_argument("--format", default="mp4 (H.265 10-bit)")
+    parser.add_argument("--crf", default="19")
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    scheduler = JobScheduler()
+    work_dir = tempfile.mkdtemp(prefix="bench_images_")
+    folder = args.folder
+    try:
+        if not folder:
+            folder = os.path.join(work_dir, "frames")
+            os.makedirs(folder)
+            print(f"Generando {args.frames} PNG {args.size} de 16 bits...")
+            generate_sequence(folder, args.frames, args.size)
+
+        print(f"CPU: {scheduler.logical_cores} núcleos lógicos / {scheduler.physical_cores} físicos")
+        print(f"Formato: {args.format}, CRF {args.crf}\n")
+        print(f"{'procesos':>8} | {'tiempo (s)':>10} | {'fps':>8} | {'aceleración':>11}")
+        print("-" * 47)
+
+        baseline = None
+        for workers in [int(n) for n in args.workers.split(",")]:
+            # Caché vacía en cada caso para medir siempre la codificación completa
+            os.environ["FFMPEG_GUI_CACHE_DIR"] = os.path.join(work_dir, f"cache_{workers}")
+            job = convert_images_job(folder, 24, None, args.format, args.crf, 0, 0, workers=workers)
+            if not job:
+                print("No se detectó una secuencia de imágenes válida.")
+                return
+            try:
+                elapsed = run_job(job, workers, scheduler)
+            finally:
+                for path in job["cleanup_files"]:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    elif os.path.exists(path):
+                        os.remove(path)
+                if os.path.exists(job["output_file"]):
+                    os.remove(job["output_file"])
+
+            frames = job["stages"][-1][0]["total_frames"]
+            baseline = baseline or elapsed
+            print(f"{workers:>8} | {elapsed:>10.1f} | {frames / elapsed:>8.2f} | {baseline / elapsed:>10.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
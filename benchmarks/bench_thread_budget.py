@@ -0,0 +1,85 @@
+# benchmarks/bench_thread_budget.py
+"""
+Benchmark del reparto de hilos entre codificaciones simultáneas.
+
+Lanza 1, 2, 4 y 8 codificaciones a la vez de una fuente sintética (testsrc2)
+con y sin el presupuesto de hilos del planificador, y muestra los FPS
+agregados de cada caso.
+
+Uso:
+    python -m benchmarks.bench_thread_budget [--encoder libx264] [--frames 300]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.job_scheduler import JobScheduler  # noqa: E402
+
+
+def build_command(encoder, frames, size, preset):
+    return [
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30",
+        "-frames:v", str(frames),
+        "-c:v", encoder, "-preset", preset,
+        "-f", "null", "-",
+    ]
+
+
+def run_concurrent(commands):
+    """Ejecuta los comandos a la vez y devuelve el tiempo total en segundos."""
+    errors = []
+
+    def target(cmd):
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            errors.append(result.stderr.strip())
+
+    threads = [threading.Thread(target=target, args=(cmd,)) for cmd in commands]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(errors[0])
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encoder", default="libx264", choices=["libx264", "libx265"])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--preset", default="medium")
+    parser.add_argument("--jobs", default="1,2,4,8")
+    args = parser.parse_args()
+
+    scheduler = JobScheduler()
+    print(f"CPU: {scheduler.logical_cores} núcleos lógicos / {scheduler.physical_cores} físicos")
+    print(f"Codificador: {args.encoder} {args.preset}, {args.frames} frames {args.size} por tarea\n")
+    print(f"{'tareas':>6} | {'sin presupuesto (fps)':>22} | {'con presupuesto (fps)':>22} | {'hilos/tarea':>11}")
+    print("-" * 72)
+
+    base = build_command(args.encoder, args.frames, args.size, args.preset)
+    for jobs in [int(n) for n in args.jobs.split(",")]:
+        total_frames = jobs * args.frames
+
+        unbudgeted = run_concurrent([list(base) for _ in range(jobs)])
+
+        threads = scheduler.thread_budget(jobs)
+        budgeted_cmd = scheduler.apply_thread_budget(base, threads)
+        budgeted = run_concurrent([list(budgeted_cmd) for _ in range(jobs)])
+
+        print(f"{jobs:>6} | {total_frames / unbudgeted:>22.1f} | {total_frames / budgeted:>22.1f} | {threads:>11}")
+
+
+if __name__ == "__main__":
+    main()
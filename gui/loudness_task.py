@@ -0,0 +1,53 @@
+# gui/loudness_task.py
+"""
+Normalización de sonoridad compartida por las pestañas que añaden audio
+(Editar audio e Imágenes). La pestaña aporta su 'loudness_combo', su
+'tasks_layout' y su lista 'active_workers'.
+"""
+
+import os
+
+from gui.task_widget import ConversionTaskWidget
+from logic.ffmpeg_worker import AnalysisWorker
+from logic.loudness import LOUDNESS_TARGETS, cached_loudness, measure_loudness, loudnorm_filter
+
+
+def with_loudness_filter(tab, audio_path, callback):
+    """
+    Llama a callback(filtro) con el filtro de normalización elegido en 'tab'
+    (None si no se normaliza). Si la medición no está en la caché, se hace en
+    segundo plano mostrando una tarea de análisis en la pestaña.
+    """
+    target = LOUDNESS_TARGETS.get(tab.loudness_combo.currentText())
+    if target is None or not audio_path:
+        callback(None)
+        return
+    measured = cached_loudness(audio_path, target)
+    if measured is not None:
+        callback(loudnorm_filter(measured, target))
+        return
+
+    status_widget = ConversionTaskWidget(f"Medir sonoridad: {os.path.basename(audio_path)}")
+    status_widget.cancel_button.hide()
+    status_widget.update_status("Analizando...")
+    tab.tasks_layout.addWidget(status_widget)
+
+    worker = AnalysisWorker(measure_loudness, audio_path, target)
+
+    def measured_ready(measured):
+        tab.active_workers.remove(worker)
+        if measured is None:
+            status_widget.update_status("Error: No se pudo medir la sonoridad del audio.")
+            return
+        status_widget.update_status(f"Medido: {measured['input_i']} LUFS")
+        status_widget.update_progress(100)
+        callback(loudnorm_filter(measured, target))
+
+    def measure_failed(message):
+        tab.active_workers.remove(worker)
+        status_widget.update_status(f"Error: {message}")
+
+    worker.resultReady.connect(measured_ready)
+    worker.failed.connect(measure_failed)
+    tab.active_workers.append(worker)
+    worker.start()
@@ -1,6 +1,6 @@
 # gui/main_window.py
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTabWidget
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTabWidget, QPushButton, QFileDialog, QMessageBox
 from gui.tabs.convert_images_tab import ImagesTab
 from gui.tabs.cut_video_tab import CutVideoTab
 from gui.tabs.limit_kps_tab import LimitKpsTab
@@ -8,6 +8,7 @@ from gui.tabs.scale_video_tab import ScaleVideoTab
 from gui.tabs.crop_video_tab import CropVideoTab
 from gui.tabs.audio_editing_tab import AudioEditingTab
 from gui.tabs.merge_videos_tab import MergeVideosTab
+from logic.job_metrics import export_session_metrics_csv
 
 class FFmpegGUI(QWidget):
     def __init__(self):
@@ -43,4 +44,23 @@ class FFmpegGUI(QWidget):
         self.merge_videos_tab = MergeVideosTab()
         self.tabs.addTab(self.merge_videos_tab, "Fusionar Videos")
 
+        # Exportación de las métricas de las tareas de esta sesión
+        self.btn_export_metrics = QPushButton("Exportar métricas de la sesión (CSV)")
+        self.btn_export_metrics.clicked.connect(self.export_metrics)
+        main_layout.addWidget(self.btn_export_metrics)
+
         self.setLayout(main_layout)
+
+    def export_metrics(self):
+        """Guarda en CSV las métricas de recursos de todas las tareas terminadas en la sesión."""
+        csv_path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar métricas", "ffmpeg_metrics.csv", "CSV (*.csv)"
+        )
+        if not csv_path:
+            return
+        try:
+            rows = export_session_metrics_csv(csv_path)
+        except OSError as e:
+            QMessageBox.warning(self, "Exportar métricas", f"No se pudo guardar el CSV: {e}")
+            return
+        QMessageBox.information(self, "Exportar métricas", f"Se exportaron {rows} tareas a {csv_path}")
@@ -7,6 +7,11 @@ Permite seleccionar un video y, mediante un desplegable, elegir entre:
   - Sustituir audio
 
 Según la operación, se habilita o se oculta la selección de un archivo de audio.
+La operación también puede aplicarse a todos los vídeos de una carpeta; el audio
+se codifica como mucho una vez y se multiplexa en cada vídeo con copia de streams.
+Opcionalmente el audio se normaliza a -14 o -23 LUFS (EBU R128); la medición se
+hace una vez por archivo de audio y se guarda en la caché.
+La forma de onda del audio elegido (o la del video) se muestra desde la caché de picos.
 Se procesa la operación usando FFmpeg y se muestra el progreso en un widget de tarea.
 """
 
@@ -17,8 +22,14 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QUrl
 from PyQt6.QtGui import QDesktopServices, QFontMetrics
-from logic.ffmpeg_worker import FFmpegWorker
+from logic.ffmpeg_worker import FFmpegWorker, FFmpegPipelineWorker, AnalysisWorker
+from logic.job_scheduler import PRIORITY_BACKGROUND
+from logic.audio_batch import batch_audio_job
+from logic.loudness import LOUDNESS_TARGETS, NO_NORMALIZATION
+from logic.waveform import get_waveform_peaks, numpy_available
 from gui.task_widget import ConversionTaskWidget
+from gui.loudness_task import with_loudness_filter
+from gui.widgets import WaveformView
 
 # Asegúrate de tener estas funciones implementadas en logic/ffmpeg_logic.py
 from logic.ffmpeg_logic import add_audio_to_video_command, remove_audio_command, replace_audio_command
@@ -30,6 +41,10 @@ class AudioEditingTab(QWidget):
         self.setAcceptDrops(True)
         self.video_file = None    # Video a editar
         self.audio_file = None    # Archivo de audio para añadir/sustituir
+        self.waveform_worker = None
+        self.waveform_source = None  # Archivo cuya forma de onda se muestra
+        self.batch_folder = None     # Carpeta de vídeos para el modo por lotes
+        self.active_workers = []
         self.init_ui()
 
     def init_ui(self):
@@ -54,6 +69,14 @@ class AudioEditingTab(QWidget):
         self.operation_combo.addItems(["Añadir audio", "Quitar audio", "Sustituir audio"])
         self.operation_combo.currentIndexChanged.connect(self.operation_changed)
         op_layout.addWidget(self.operation_combo)
+        op_layout.addWidget(QLabel("Normalizar sonoridad:"))
+        self.loudness_combo = QComboBox()
+        self.loudness_combo.addItems([NO_NORMALIZATION, *LOUDNESS_TARGETS])
+        self.loudness_combo.setToolTip(
+            "Normaliza el audio añadido o sustituido (EBU R128, loudnorm en dos pasadas). "
+            "La medición se hace una vez por archivo de audio y se reutiliza."
+        )
+        op_layout.addWidget(self.loudness_combo)
         group_operation.setLayout(op_layout)
         layout.addWidget(group_operation)
 
@@ -68,11 +91,33 @@ class AudioEditingTab(QWidget):
         self.group_audio.setLayout(audio_layout)
         layout.addWidget(self.group_audio)
 
+        # Grupo: Forma de onda del audio seleccionado (o del video)
+        group_waveform = QGroupBox("Forma de Onda")
+        waveform_layout = QVBoxLayout()
+        self.waveform = WaveformView()
+        waveform_layout.addWidget(self.waveform)
+        group_waveform.setLayout(waveform_layout)
+        layout.addWidget(group_waveform)
+
         # Botón para iniciar la operación
         self.btn_process = QPushButton("Procesar")
         self.btn_process.clicked.connect(self.process_audio_edit)
         layout.addWidget(self.btn_process)
 
+        # Grupo: Lote (aplica la operación a todos los vídeos de una carpeta)
+        group_batch = QGroupBox("Lote: Carpeta de Videos")
+        batch_layout = QVBoxLayout()
+        self.batch_folder_label = QLabel("Carpeta:")
+        batch_layout.addWidget(self.batch_folder_label)
+        self.btn_select_batch_folder = QPushButton("Seleccionar Carpeta")
+        self.btn_select_batch_folder.clicked.connect(self.select_batch_folder)
+        batch_layout.addWidget(self.btn_select_batch_folder)
+        self.btn_process_batch = QPushButton("Procesar Carpeta")
+        self.btn_process_batch.clicked.connect(self.process_batch_audio_edit)
+        batch_layout.addWidget(self.btn_process_batch)
+        group_batch.setLayout(batch_layout)
+        layout.addWidget(group_batch)
+
         # Grupo: Tareas de Edición de Audio (área para mostrar tareas activas)
         group_tasks = QGroupBox("Tareas de Edición de Audio")
         self.tasks_layout = QVBoxLayout()
@@ -103,6 +148,7 @@ class AudioEditingTab(QWidget):
             video_name = os.path.basename(file_path)
             self.video_label.setText(f"Video seleccionado: <span style='color:blue;'>{video_name}</span>")
             self.video_file = file_path
+            self.refresh_waveform()
 
     def select_audio_file(self):
         """
@@ -110,12 +156,22 @@ class AudioEditingTab(QWidget):
         Actualiza el label y asigna la ruta a self.audio_file.
         """
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Seleccionar Archivo de Audio", "", "Audio (*.mp3 *.wav *.aac)"
+            self, "Seleccionar Archivo de Audio", "", "Audio (*.mp3 *.wav *.aac *.m4a *.flac)"
         )
         if file_path:
             audio_name = os.path.basename(file_path)
             self.audio_label.setText(f"Audio seleccionado: <span style='color:blue;'>{audio_name}</span>")
             self.audio_file = file_path
+            self.refresh_waveform()
+
+    def select_batch_folder(self):
+        """Abre un diálogo para elegir la carpeta de vídeos del modo por lotes."""
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta de Videos")
+        if folder:
+            self.batch_folder = folder
+            self.batch_folder_label.setText(
+                f"Carpeta seleccionada: <span style='color:blue;'>{os.path.basename(folder)}</span>"
+            )
 
     def operation_changed(self):
         """
@@ -127,6 +183,36 @@ class AudioEditingTab(QWidget):
             self.group_audio.hide()
         else:
             self.group_audio.show()
+        self.refresh_waveform()
+
+    def refresh_waveform(self):
+        """
+        Muestra la forma de onda del audio que se va a añadir/sustituir o, si no hay,
+        la del video. Los picos se generan (o leen de la caché) en segundo plano.
+        """
+        use_audio = self.audio_file and self.operation_combo.currentText() != "Quitar audio"
+        source = self.audio_file if use_audio else self.video_file
+        if not source or source == self.waveform_source:
+            return
+        self.waveform_source = source
+        if not numpy_available():
+            self.waveform.set_message("Instala numpy para ver la forma de onda")
+            return
+
+        self.waveform.set_message("Generando forma de onda...")
+        worker = AnalysisWorker(get_waveform_peaks, source)
+        worker.resultReady.connect(lambda peaks: self.handle_waveform_ready(source, peaks))
+        self.waveform_worker = worker
+        worker.start()
+
+    def handle_waveform_ready(self, source, peaks):
+        """Dibuja los picos si siguen correspondiendo al archivo mostrado."""
+        if source != self.waveform_source:
+            return
+        if peaks is None:
+            self.waveform.set_message("Sin audio")
+            return
+        self.waveform.set_peaks(peaks)
 
     def dragEnterEvent(self, event):
         """
@@ -149,7 +235,7 @@ class AudioEditingTab(QWidget):
                 file_path = url.toLocalFile()
                 # Definimos las extensiones de video y audio
                 video_exts = [".mp4", ".avi", ".mkv", ".mov"]
-                audio_exts = [".mp3", ".wav", ".aac"]
+                audio_exts = [".mp3", ".wav", ".aac", ".m4a", ".flac"]
                 ext = os.path.splitext(file_path)[1].lower()
                 if ext in video_exts:
                     # Si se suelta un archivo de video, lo asignamos a self.video_file
@@ -161,6 +247,7 @@ class AudioEditingTab(QWidget):
                     self.audio_file = file_path
                     audio_name = os.path.basename(file_path)
                     self.audio_label.setText(f"Audio seleccionado: <span style='color:blue;'>{audio_name}</span>")
+            self.refresh_waveform()
             event.acceptProposedAction()
         else:
             event.ignore()
@@ -185,16 +272,30 @@ class AudioEditingTab(QWidget):
                 self.tasks_layout.addWidget(error_widget)
                 return
 
+        if op == "Quitar audio":
+            self.start_audio_edit(op, self.video_file, None, None)
+        else:
+            video_file, audio_file = self.video_file, self.audio_file
+            with_loudness_filter(
+                self, audio_file,
+                lambda audio_filter: self.start_audio_edit(op, video_file, audio_file, audio_filter)
+            )
+
+    def start_audio_edit(self, op, video_file, audio_file, audio_filter):
+        """Construye el comando de la operación y lanza el worker que la ejecuta."""
         # Selecciona el comando FFmpeg según la operación
         if op == "Añadir audio":
-            command, output_file = add_audio_to_video_command(self.video_file, self.audio_file)
+            command, output_file = add_audio_to_video_command(video_file, audio_file, audio_filter=audio_filter)
             task_prefix = "Añadir audio: "
+            operation = "audio_add"
         elif op == "Sustituir audio":
-            command, output_file = replace_audio_command(self.video_file, self.audio_file)
+            command, output_file = replace_audio_command(video_file, audio_file, audio_filter=audio_filter)
             task_prefix = "Sustituir audio: "
+            operation = "audio_replace"
         elif op == "Quitar audio":
-            command, output_file = remove_audio_command(self.video_file)
+            command, output_file = remove_audio_command(video_file)
             task_prefix = "Quitar audio: "
+            operation = "audio_remove"
         else:
             return
 
@@ -205,11 +306,15 @@ class AudioEditingTab(QWidget):
             return
 
         task_name = task_prefix + os.path.basename(output_file)
-        task_widget = ConversionTaskWidget(task_name)
+        task_widget = ConversionTaskWidget(task_name, pausable=True)
         self.tasks_layout.addWidget(task_widget)
         # Usamos un valor de referencia para total_frames (por ejemplo, 100) ya que estas operaciones suelen ser rápidas.
-        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False)
+        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False,
+                              operation=operation)
         worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
         worker.finishedSignal.connect(lambda success, message: self.handle_audio_edit_finished(task_widget, success, message))
         task_widget.cancelRequested.connect(lambda: self.cancel_audio_edit(worker, task_widget))
         worker.start()
@@ -251,6 +356,86 @@ class AudioEditingTab(QWidget):
             task_widget.update_status(f"Error: {message}")
             task_widget.update_progress(0)
 
+    def process_batch_audio_edit(self):
+        """
+        Aplica la operación seleccionada a todos los vídeos de la carpeta del lote.
+        Si el audio no se puede copiar en el contenedor, se codifica una sola vez
+        (o se reutiliza de la caché) antes de multiplexarlo en cada vídeo.
+        """
+        if not self.batch_folder:
+            error_widget = ConversionTaskWidget("Error: Sin carpeta")
+            error_widget.update_status("Selecciona una carpeta de videos.")
+            self.tasks_layout.addWidget(error_widget)
+            return
+
+        op = self.operation_combo.currentText()
+        folder, audio_file = self.batch_folder, self.audio_file
+        if op == "Quitar audio":
+            self.start_batch_audio_edit(op, folder, None, None)
+        else:
+            with_loudness_filter(
+                self, audio_file,
+                lambda audio_filter: self.start_batch_audio_edit(op, folder, audio_file, audio_filter)
+            )
+
+    def start_batch_audio_edit(self, op, folder, audio_file, audio_filter):
+        """Planifica el lote de la carpeta y lanza el worker con todos sus pasos."""
+        operations = {"Añadir audio": "add", "Sustituir audio": "replace", "Quitar audio": "remove"}
+        job, error = batch_audio_job(folder, operations[op], audio_file, audio_filter=audio_filter)
+        if job is None:
+            error_widget = ConversionTaskWidget("Error: Lote")
+            error_widget.update_status(error)
+            self.tasks_layout.addWidget(error_widget)
+            return
+
+        count = len(job["output_files"])
+        task_widget = ConversionTaskWidget(f"{op} (lote): {os.path.basename(folder)}", pausable=True)
+        task_widget.update_status(f"0/{count} videos")
+        self.tasks_layout.addWidget(task_widget)
+
+        worker = FFmpegPipelineWorker(job["stages"], output_file=None, enable_logs=False,
+                                      operation="audio_batch", priority=PRIORITY_BACKGROUND,
+                                      max_parallel=2)
+        mux_offset = len(job["stages"]) - 1  # El primer paso puede ser la codificación del audio
+        done = set()
+
+        def step_progress(index, value):
+            if value >= 100 and index >= mux_offset:
+                done.add(index)
+                task_widget.update_status(f"{len(done)}/{count} videos")
+
+        worker.stepProgressChanged.connect(step_progress)
+        worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
+        worker.finishedSignal.connect(
+            lambda success, message: self.handle_batch_finished(worker, task_widget, success, message, count, folder))
+        task_widget.cancelRequested.connect(lambda: self.cancel_audio_edit(worker, task_widget))
+        self.active_workers.append(worker)
+        worker.start()
+
+    def handle_batch_finished(self, worker, task_widget, success, message, count, folder):
+        """Muestra el resultado del lote y enlaza la carpeta de salida."""
+        if worker in self.active_workers:
+            self.active_workers.remove(worker)
+        if success:
+            task_widget.update_status(f"Completado: {count} videos")
+            task_widget.update_progress(100)
+            folder = os.path.abspath(folder).replace("\\", "/")
+            task_widget.name_label.setText(
+                f"<a style='color:blue; text-decoration:underline;' href='#'>{task_widget.full_task_name}</a>"
+            )
+            task_widget.name_label.linkActivated.connect(
+                lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(folder))
+            )
+        elif message.lower() == "cancelado":
+            task_widget.update_status(message)
+            task_widget.update_progress(0)
+        else:
+            task_widget.update_status(f"Error: {message}")
+            task_widget.update_progress(0)
+
     def cancel_audio_edit(self, worker, task_widget):
         """
         Cancela la operación de edición de audio forzando la terminación del worker
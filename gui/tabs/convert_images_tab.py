@@ -1,6 +1,7 @@
 # gui/tabs/images_tab.py
 
 import os
+from functools import partial
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGroupBox, QPushButton, QLabel, QLineEdit,
     QComboBox, QFileDialog, QScrollArea, QFrame, QCheckBox
@@ -8,16 +9,24 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import QUrl, Qt
 from PyQt6.QtGui import QFontMetrics, QFont, QDesktopServices
 from gui.task_widget import ConversionTaskWidget  # Nuestra nueva clase de tarea
-from logic.ffmpeg_logic import convert_images_to_video_command
-from logic.ffmpeg_worker import FFmpegWorker
+from gui.loudness_task import with_loudness_filter
+from logic.ffmpeg_worker import FFmpegPipelineWorker, AnalysisWorker
+from logic.loudness import LOUDNESS_TARGETS, NO_NORMALIZATION
+from logic.segmented_encode import convert_images_checkpoint_job
+from logic.image_render import convert_images_job
+from logic.follow_encode import follow_images_job, DEFAULT_IDLE_TIMEOUT
+from logic.archive_frames import archive_images_job, is_image_archive
+from logic.sequence_extract import extract_sequence_job, EXTRACT_FORMATS, DEFAULT_PNG_COMPRESSION
+from logic.keyframe_plan import keyframe_plan, HOUSE_GOP_SECONDS
 
 class ImagesTab(QWidget):
     def __init__(self):
         super().__init__()
         # Habilitar el drag & drop en la pestaña
         self.setAcceptDrops(True)
-        self.image_folder = None  # Ruta a la carpeta con imágenes
+        self.image_folder = None  # Ruta a la carpeta con imágenes (o a un archivo ZIP/TAR)
         self.audio_path = None    # Ruta opcional al archivo de audio
+        self.active_workers = []
         self.init_ui()
 
     def init_ui(self):
@@ -31,6 +40,9 @@ class ImagesTab(QWidget):
         self.btn_select_images = QPushButton("Seleccionar carpeta de imágenes")
         self.btn_select_images.clicked.connect(self.select_image_folder)
         folder_layout.addWidget(self.btn_select_images)
+        self.btn_select_archive = QPushButton("Seleccionar archivo ZIP/TAR de imágenes")
+        self.btn_select_archive.clicked.connect(self.select_image_archive)
+        folder_layout.addWidget(self.btn_select_archive)
         group_folder.setLayout(folder_layout)
         layout.addWidget(group_folder)
 
@@ -80,6 +92,16 @@ class ImagesTab(QWidget):
         self.prioritize_audio_checkbox.setChecked(False)  # Por defecto, se prioriza el video
         config_layout.addWidget(self.prioritize_audio_checkbox)
 
+        # Normalización de sonoridad del audio (EBU R128)
+        config_layout.addWidget(QLabel("Normalizar sonoridad del audio:"))
+        self.loudness_combo = QComboBox()
+        self.loudness_combo.addItems([NO_NORMALIZATION, *LOUDNESS_TARGETS])
+        self.loudness_combo.setToolTip(
+            "Normaliza el audio (loudnorm en dos pasadas) dentro de la misma codificación. "
+            "La medición se hace una vez por archivo de audio y se reutiliza."
+        )
+        config_layout.addWidget(self.loudness_combo)
+
         # Selección del formato de salida
         self.img_format_label = QLabel("Formato de salida:")
         config_layout.addWidget(self.img_format_label)
@@ -104,9 +126,96 @@ class ImagesTab(QWidget):
         self.yuv_combo.addItems(["yuv420p", "yuv422p", "yuv444p"])
         config_layout.addWidget(self.yuv_combo)
 
+        # Codificación reanudable por segmentos
+        self.checkpoint_checkbox = QCheckBox("Reanudable (checkpoints por segmentos)")
+        self.checkpoint_checkbox.setToolTip(
+            "Codifica la secuencia en segmentos independientes. Si la tarea se interrumpe,\n"
+            "al relanzarla con los mismos parámetros continúa desde el primer segmento pendiente."
+        )
+        config_layout.addWidget(self.checkpoint_checkbox)
+
+        # Render incremental por tramos (solo se recodifican los tramos con imágenes cambiadas)
+        self.incremental_checkbox = QCheckBox("Incremental (solo re-codifica los tramos cambiados)")
+        self.incremental_checkbox.setToolTip(
+            "Codifica la secuencia por tramos que se guardan en la caché según el contenido de sus imágenes.\n"
+            "Al volver a renderizar tras cambiar unos pocos fotogramas, solo se recodifican los tramos\n"
+            "que los contienen y el resto se empalma sin recodificar."
+        )
+        config_layout.addWidget(self.incremental_checkbox)
+
+        # Guardar el vídeo sin audio en la caché para poder cambiar el audio con un remux
+        self.cache_video_checkbox = QCheckBox("Guardar la imagen en caché (cambiar el audio sin recodificar)")
+        self.cache_video_checkbox.setToolTip(
+            "Guarda en la caché de disco una copia del vídeo sin audio. Volver a convertir la misma\n"
+            "secuencia con otra música solo multiplexa el audio, a cambio de ocupar el tamaño del vídeo\n"
+            "(la caché se limita a 20 GB; FFMPEG_GUI_CACHE_MAX_GB lo cambia)."
+        )
+        config_layout.addWidget(self.cache_video_checkbox)
+
+        # Codificación paralela por rangos de frames
+        config_layout.addWidget(QLabel("Procesos en paralelo:"))
+        self.parallel_combo = QComboBox()
+        self.parallel_combo.addItems(["1", "2", "4", "8"])
+        self.parallel_combo.setToolTip(
+            "Divide la secuencia en rangos contiguos que se codifican a la vez y se empalman sin recodificar.\n"
+            "Los fundidos se calculan sobre la duración total."
+        )
+        config_layout.addWidget(self.parallel_combo)
+
+        # Perfil de la casa: GOPs cerrados y fotogramas clave en instantes conocidos
+        self.keyframes_checkbox = QCheckBox(f"Fotogramas clave planificados (cada {HOUSE_GOP_SECONDS:g} s)")
+        self.keyframes_checkbox.setToolTip(
+            "Codifica con GOPs cerrados y un fotograma clave cada pocos segundos, y guarda el plan junto\n"
+            "al vídeo (.keyframes.json) para que los cortes y uniones posteriores se hagan sin recodificar.\n"
+            "No se aplica en los modos reanudable ni seguir render."
+        )
+        config_layout.addWidget(self.keyframes_checkbox)
+
+        # Seguir un render en curso: codifica las imágenes a medida que aparecen
+        self.follow_checkbox = QCheckBox("Seguir render (codificar mientras se generan las imágenes)")
+        self.follow_checkbox.setToolTip(
+            "Empieza a codificar con las primeras imágenes y va añadiendo las siguientes en orden\n"
+            "cuando están completas. Termina al llegar a los frames esperados o tras el tiempo\n"
+            "de espera sin imágenes nuevas."
+        )
+        config_layout.addWidget(self.follow_checkbox)
+        config_layout.addWidget(QLabel("Frames esperados (vacío = desconocido):"))
+        self.follow_frames_input = QLineEdit("")
+        config_layout.addWidget(self.follow_frames_input)
+        config_layout.addWidget(QLabel("Espera sin imágenes nuevas (segundos):"))
+        self.follow_timeout_input = QLineEdit(str(int(DEFAULT_IDLE_TIMEOUT)))
+        config_layout.addWidget(self.follow_timeout_input)
+
         group_config.setLayout(config_layout)
         layout.addWidget(group_config)
 
+        # Grupo: Extraer un vídeo a secuencia de imágenes (lo inverso de la conversión)
+        group_extract = QGroupBox("Extraer imágenes de un vídeo")
+        extract_layout = QVBoxLayout()
+        extract_layout.addWidget(QLabel("Formato de imagen:"))
+        self.extract_format_combo = QComboBox()
+        self.extract_format_combo.addItems(list(EXTRACT_FORMATS))
+        extract_layout.addWidget(self.extract_format_combo)
+        extract_layout.addWidget(QLabel("Compresión PNG (0 = más rápido, 9 = más pequeño):"))
+        self.extract_compression_combo = QComboBox()
+        self.extract_compression_combo.addItems([str(level) for level in range(10)])
+        self.extract_compression_combo.setCurrentText(str(DEFAULT_PNG_COMPRESSION))
+        extract_layout.addWidget(self.extract_compression_combo)
+        extract_layout.addWidget(QLabel("Procesos en paralelo:"))
+        self.extract_parallel_combo = QComboBox()
+        self.extract_parallel_combo.addItems(["1", "2", "4", "8"])
+        self.extract_parallel_combo.setCurrentText("4")
+        self.extract_parallel_combo.setToolTip(
+            "Divide el vídeo en rangos que empiezan en un fotograma clave y los extrae a la vez.\n"
+            "La numeración de las imágenes es la misma que con un solo proceso."
+        )
+        extract_layout.addWidget(self.extract_parallel_combo)
+        self.btn_extract_video = QPushButton("Seleccionar vídeo y extraer imágenes")
+        self.btn_extract_video.clicked.connect(self.extract_video_frames)
+        extract_layout.addWidget(self.btn_extract_video)
+        group_extract.setLayout(extract_layout)
+        layout.addWidget(group_extract)
+
         # Botón para iniciar la conversión
         self.btn_convert_images = QPushButton("Convertir imágenes a video")
         self.btn_convert_images.clicked.connect(self.convert_images_to_video)
@@ -139,6 +248,19 @@ class ImagesTab(QWidget):
             self.img_seq_label.setText(f"Carpeta seleccionada: <span style='color:blue;'>{folder_name}</span>")
             self.image_folder = folder_path
 
+    def select_image_archive(self):
+        """Abre un diálogo para seleccionar un archivo ZIP/TAR con la secuencia de imágenes."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Seleccionar archivo de imágenes",
+            "",
+            "Archivos (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tbz2 *.tar.xz *.txz)"
+        )
+        if file_path:
+            archive_name = os.path.basename(file_path)
+            self.img_seq_label.setText(f"Archivo seleccionado: <span style='color:blue;'>{archive_name}</span>")
+            self.image_folder = file_path
+
     def select_audio_file(self):
         """Abre un diálogo para seleccionar un archivo de audio."""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -176,6 +298,11 @@ class ImagesTab(QWidget):
                     self.image_folder = file_path
                     folder_name = os.path.basename(file_path)
                     self.img_seq_label.setText(f"Carpeta seleccionada: <span style='color:blue;'>{folder_name}</span>")
+                elif is_image_archive(file_path):
+                    # Un archivo ZIP/TAR se usa como secuencia de imágenes sin extraerlo
+                    self.image_folder = file_path
+                    archive_name = os.path.basename(file_path)
+                    self.img_seq_label.setText(f"Archivo seleccionado: <span style='color:blue;'>{archive_name}</span>")
                 elif os.path.isfile(file_path):
                     # Si se suelta un archivo, verificamos si es audio
                     ext = os.path.splitext(file_path)[1].lower()
@@ -205,11 +332,13 @@ class ImagesTab(QWidget):
         selected_yuv = self.yuv_combo.currentText()
 
         # Validación: se comprueba que la carpeta contenga imágenes en formato .png
-        images = sorted(os.listdir(self.image_folder))
+        # (los archivos ZIP/TAR se validan al indexarlos, en segundo plano)
+        from_archive = is_image_archive(self.image_folder)
+        images = [] if from_archive else sorted(os.listdir(self.image_folder))
         # Filtra los archivos que terminan en .png, .jpg o .jpeg (en minúsculas)
         valid_extensions = ('.png', '.jpg', '.jpeg')
         total_images = len([img for img in images if img.lower().endswith(valid_extensions)])
-        if total_images == 0:
+        if total_images == 0 and not from_archive:
             error_widget = ConversionTaskWidget("Error: Patrón inválido")
             error_widget.update_status("No se detectó un patrón correcto (se requiere al menos dos dígitos).")
             self.tasks_layout.addWidget(error_widget)
@@ -225,26 +354,179 @@ class ImagesTab(QWidget):
         except ValueError:
             fade_out = 1
 
-        # Construye el comando FFmpeg, pasando la selección de formato YUV
-        command, output_file = convert_images_to_video_command(
-            self.image_folder, fps, audio_path, user_format, crf, fade_in, fade_out, selected_yuv,
-            prioritize_audio=prioritize_audio
+        follow_options = None
+        if self.follow_checkbox.isChecked():
+            try:
+                expected = int(self.follow_frames_input.text()) if self.follow_frames_input.text().strip() else None
+            except ValueError:
+                expected = None
+            try:
+                idle_timeout = float(self.follow_timeout_input.text())
+            except ValueError:
+                idle_timeout = DEFAULT_IDLE_TIMEOUT
+            follow_options = (expected, idle_timeout)
+
+        settings = (self.image_folder, fps, audio_path, user_format, crf, fade_in, fade_out, selected_yuv,
+                    prioritize_audio, self.checkpoint_checkbox.isChecked(), self.incremental_checkbox.isChecked(),
+                    int(self.parallel_combo.currentText()), follow_options,
+                    keyframe_plan(HOUSE_GOP_SECONDS) if self.keyframes_checkbox.isChecked() else None,
+                    self.cache_video_checkbox.isChecked())
+        with_loudness_filter(self, audio_path, lambda audio_filter: self.start_conversion(*settings, audio_filter))
+
+    def start_conversion(self, image_folder, fps, audio_path, user_format, crf, fade_in, fade_out,
+                         selected_yuv, prioritize_audio, use_checkpoints, incremental, workers, follow_options,
+                         keyframes, cache_video, audio_filter):
+        """Construye el comando (o el plan reanudable) de la conversión y lanza el worker."""
+        from_archive = is_image_archive(image_folder)
+        if follow_options and not from_archive:
+            expected, idle_timeout = follow_options
+            job = follow_images_job(
+                image_folder, fps, audio_path, user_format, crf, fade_in, fade_out, selected_yuv,
+                prioritize_audio=prioritize_audio, audio_filter=audio_filter,
+                expected_count=expected, idle_timeout=idle_timeout
+            )
+            if not job:
+                error_widget = ConversionTaskWidget("Error: Patrón inválido")
+                error_widget.update_status("No se detectó un patrón correcto en las imágenes.")
+                self.tasks_layout.addWidget(error_widget)
+                return
+            task_widget = ConversionTaskWidget(f"Conversión: {os.path.basename(job['output_file'])}", pausable=True)
+            task_widget.update_status("Siguiendo el render...")
+            self.tasks_layout.addWidget(task_widget)
+            worker = FFmpegPipelineWorker(job["stages"], job["output_file"], operation="convert_images",
+                                          cleanup_files=job["cleanup_files"])
+            # Al cancelar deja de esperar imágenes nuevas
+            task_widget.cancelRequested.connect(job["stop_event"].set)
+            self.connect_worker(worker, task_widget)
+            return
+
+        if use_checkpoints and not from_archive:
+            job = convert_images_checkpoint_job(
+                image_folder, fps, audio_path, user_format, crf, fade_in, fade_out, selected_yuv,
+                prioritize_audio=prioritize_audio, audio_filter=audio_filter
+            )
+            if not job:
+                error_widget = ConversionTaskWidget("Error: Patrón inválido")
+                error_widget.update_status("No se detectó un patrón correcto en las imágenes.")
+                self.tasks_layout.addWidget(error_widget)
+                return
+            output_file = job["output_file"]
+            task_widget = ConversionTaskWidget(f"Conversión: {os.path.basename(output_file)}", pausable=True)
+            if job["done_segments"]:
+                task_widget.update_status(
+                    f"Reanudando: {job['done_segments']}/{job['total_segments']} segmentos hechos"
+                )
+            self.tasks_layout.addWidget(task_widget)
+            worker = FFmpegPipelineWorker(job["stages"], output_file, operation="convert_images")
+            self.connect_worker(worker, task_widget)
+            return
+
+        task_widget = ConversionTaskWidget("Conversión: preparando...", pausable=True)
+        # Mientras se planifica (hashes de las imágenes en modo incremental) no hay procesos que pausar
+        task_widget.set_pause_enabled(False)
+        task_widget.cancel_button.setEnabled(False)
+        self.tasks_layout.addWidget(task_widget)
+
+        if from_archive:
+            # Se indexa el archivo y las imágenes se envían a FFmpeg por una tubería, sin extraerlas
+            workers = 1
+            plan = partial(archive_images_job, image_folder, fps, audio_path, user_format, crf, fade_in,
+                           fade_out, selected_yuv, prioritize_audio=prioritize_audio, audio_filter=audio_filter,
+                           keyframes=keyframes)
+        else:
+            # La imagen se codifica sin audio (o se reutiliza de la caché) y el audio se añade con -c:v copy
+            plan = partial(convert_images_job, image_folder, fps, audio_path, user_format, crf, fade_in, fade_out,
+                           selected_yuv, prioritize_audio=prioritize_audio, audio_filter=audio_filter,
+                           incremental=incremental, workers=workers, keyframes=keyframes,
+                           cache_video=cache_video)
+        planner = AnalysisWorker(plan)
+        planner.resultReady.connect(lambda job: self.start_planned_conversion(job, task_widget, planner, workers))
+        planner.failed.connect(lambda message: (
+            task_widget.update_status(f"Error: {message}"), self.active_workers.remove(planner)
+        ))
+        self.active_workers.append(planner)
+        planner.start()
+
+    def start_planned_conversion(self, job, task_widget, planner, workers):
+        """Lanza los pasos de una conversión ya planificada (convert_images_job o archive_images_job)."""
+        self.active_workers.remove(planner)
+        if not job:
+            task_widget.full_task_name = "Error: Patrón inválido"
+            task_widget.update_task_name()
+            task_widget.update_status("No se detectó un patrón correcto en las imágenes.")
+            return
+
+        output_file = job["output_file"]
+        task_widget.full_task_name = f"Conversión: {os.path.basename(output_file)}"
+        task_widget.update_task_name()
+        task_widget.set_pause_enabled(True)
+        task_widget.cancel_button.setEnabled(True)
+        if job.get("cached"):
+            task_widget.update_status("Vídeo ya codificado: solo se añade el audio")
+        elif job.get("total_chunks"):
+            task_widget.update_status(
+                f"Incremental: {job['encoded_chunks']}/{job['total_chunks']} tramos a codificar"
+            )
+
+        # Se crea el worker que ejecutará los pasos de esta conversión
+        worker = FFmpegPipelineWorker(job["stages"], output_file, enable_logs=False, operation="convert_images",
+                                      max_parallel=max(2, workers), cleanup_files=job["cleanup_files"])
+        if "stop_event" in job:
+            # Al cancelar, el hilo lector del archivo deja de descomprimir imágenes
+            task_widget.cancelRequested.connect(job["stop_event"].set)
+        self.connect_worker(worker, task_widget)
+
+    def extract_video_frames(self):
+        """Selecciona un vídeo y lo extrae a una carpeta de imágenes numeradas, en paralelo."""
+        video_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Seleccionar vídeo",
+            "",
+            "Videos (*.mp4 *.mov *.mkv *.avi)"
         )
-        if not command:
-            error_widget = ConversionTaskWidget("Error: Patrón inválido")
-            error_widget.update_status("No se detectó un patrón correcto en las imágenes.")
-            self.tasks_layout.addWidget(error_widget)
+        if not video_path:
             return
 
-        # Se crea un widget de tarea para esta conversión
-        task_name = f"Conversión: {os.path.basename(output_file)}"
-        task_widget = ConversionTaskWidget(task_name)
+        workers = int(self.extract_parallel_combo.currentText())
+        task_widget = ConversionTaskWidget(f"Extracción: {os.path.basename(video_path)}", pausable=True)
+        task_widget.set_pause_enabled(False)
+        task_widget.cancel_button.setEnabled(False)
+        task_widget.update_status("Indexando fotogramas clave...")
         self.tasks_layout.addWidget(task_widget)
 
-        # Se crea el worker que ejecutará FFmpeg para esta conversión
-        worker = FFmpegWorker(command, total_images, output_file, enable_logs=False)
+        # El índice de fotogramas se construye en segundo plano (ffprobe lee todos los paquetes)
+        planner = AnalysisWorker(
+            partial(extract_sequence_job, video_path, self.extract_format_combo.currentText(),
+                    int(self.extract_compression_combo.currentText()), workers)
+        )
+
+        def planned(result):
+            self.active_workers.remove(planner)
+            job, error = result
+            if job is None:
+                task_widget.update_status(f"Error: {error}")
+                return
+            task_widget.set_pause_enabled(True)
+            task_widget.cancel_button.setEnabled(True)
+            task_widget.update_status(f"{len(job['ranges'])} rangos en paralelo")
+            worker = FFmpegPipelineWorker(job["stages"], job["output_file"], operation="extract_images",
+                                          max_parallel=workers, cleanup_files=job["cleanup_files"])
+            self.connect_worker(worker, task_widget)
+
+        planner.resultReady.connect(planned)
+        planner.failed.connect(lambda message: (
+            task_widget.update_status(f"Error: {message}"), self.active_workers.remove(planner)
+        ))
+        self.active_workers.append(planner)
+        planner.start()
+
+    def connect_worker(self, worker, task_widget):
+        """Conecta las señales del worker con el widget de la tarea y lo inicia."""
         # Conectamos la señal de progreso para actualizar la barra del widget de tarea
         worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
         # Conectamos la señal de finalización para actualizar el estado del widget
         worker.finishedSignal.connect(lambda success, message: self.handle_task_finished(task_widget, success, message))
         # Permite cancelar la tarea: se conecta la señal del widget a una función que llama a cancel()
@@ -7,7 +7,7 @@ generando un video recortado.
 
 import os
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QGroupBox, QPushButton, QLabel, QLineEdit, QFileDialog, QScrollArea
+    QWidget, QVBoxLayout, QGroupBox, QPushButton, QLabel, QLineEdit, QFileDialog, QScrollArea, QCheckBox
 )
 from PyQt6.QtCore import Qt, QUrl
 from PyQt6.QtGui import QDesktopServices, QFontMetrics
@@ -15,7 +15,9 @@ from PyQt6.QtGui import QDesktopServices, QFontMetrics
 # Importa la función para construir el comando de recorte
 from logic.ffmpeg_logic import crop_video_command
 # Importa el worker para ejecutar FFmpeg
-from logic.ffmpeg_worker import FFmpegWorker
+from logic.ffmpeg_worker import FFmpegWorker, FFmpegPipelineWorker
+# Importa la versión reanudable por segmentos
+from logic.segmented_encode import crop_video_checkpoint_job
 # Importa el widget de tarea para mostrar el progreso
 from gui.task_widget import ConversionTaskWidget
 
@@ -65,6 +67,14 @@ class CropVideoTab(QWidget):
         self.right_input = QLineEdit("0")
         params_layout.addWidget(self.right_input)
         
+        # Codificación reanudable por segmentos
+        self.checkpoint_checkbox = QCheckBox("Reanudable (checkpoints por segmentos)")
+        self.checkpoint_checkbox.setToolTip(
+            "Codifica el video en segmentos independientes. Si la tarea se interrumpe,\n"
+            "al relanzarla con los mismos parámetros continúa desde el primer segmento pendiente."
+        )
+        params_layout.addWidget(self.checkpoint_checkbox)
+        
         group_params.setLayout(params_layout)
         layout.addWidget(group_params)
         
@@ -151,6 +161,30 @@ class CropVideoTab(QWidget):
             self.tasks_layout.addWidget(error_widget)
             return
         
+        if self.checkpoint_checkbox.isChecked():
+            job = crop_video_checkpoint_job(
+                self.input_video,
+                crop_top=crop_top,
+                crop_bottom=crop_bottom,
+                crop_left=crop_left,
+                crop_right=crop_right
+            )
+            if not job:
+                error_widget = ConversionTaskWidget("Error: Comando inválido")
+                error_widget.update_status("No se pudo analizar el video de entrada.")
+                self.tasks_layout.addWidget(error_widget)
+                return
+            output_file = job["output_file"]
+            task_widget = ConversionTaskWidget(f"Recorte: {os.path.basename(output_file)}", pausable=True)
+            if job["done_segments"]:
+                task_widget.update_status(
+                    f"Reanudando: {job['done_segments']}/{job['total_segments']} segmentos hechos"
+                )
+            self.tasks_layout.addWidget(task_widget)
+            worker = FFmpegPipelineWorker(job["stages"], output_file, operation="crop")
+            self.connect_crop_worker(worker, task_widget)
+            return
+        
         command, output_file = crop_video_command(
             self.input_video,
             crop_top=crop_top,
@@ -165,11 +199,19 @@ class CropVideoTab(QWidget):
             return
         
         task_name = f"Recorte: {os.path.basename(output_file)}"
-        task_widget = ConversionTaskWidget(task_name)
+        task_widget = ConversionTaskWidget(task_name, pausable=True)
         self.tasks_layout.addWidget(task_widget)
         
-        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False)
+        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False,
+                              operation="crop")
+        self.connect_crop_worker(worker, task_widget)
+        
+    def connect_crop_worker(self, worker, task_widget):
+        """Conecta las señales del worker con el widget de la tarea y lo inicia."""
         worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
         worker.finishedSignal.connect(lambda success, message: self.handle_crop_task_finished(task_widget, success, message))
         task_widget.cancelRequested.connect(lambda: self.cancel_crop_task(worker, task_widget))
         worker.start()
@@ -3,21 +3,41 @@
 CutVideoTab: Pestaña para cortar un video.
 Permite seleccionar un video, definir el inicio y la duración del corte
 ya sea por tiempo (segundos o hh:mm:ss) o por frames (en cuyo caso se debe indicar FPS).
+Al cargar un video se muestra una línea de tiempo con miniaturas para elegir
+visualmente los puntos de inicio y final, y se construye en segundo plano su
+índice de fotogramas: con él los cortes por frames son exactos (sin depender
+del FPS indicado) y empiezan a decodificar desde el fotograma clave anterior.
+El corte por lotes extrae varios clips del mismo video con una sola decodificación.
+La detección de escenas sugiere puntos de corte y permite dividir el video en escenas.
+Al recodificar se usa un perfil de intermedio (mezzanine) elegido a mano o, en
+automático, según un benchmark sobre una muestra del propio video.
 También permite añadir fundido a negro al principio y/o al final.
 Luego ejecuta el corte mediante FFmpeg.
 """
 
 import os
+import threading
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGroupBox, QPushButton, QLabel, QLineEdit,
-    QScrollArea, QFileDialog, QComboBox
+    QScrollArea, QFileDialog, QComboBox, QHBoxLayout, QPlainTextEdit, QCheckBox, QListWidget,
+    QListWidgetItem
 )
 from PyQt6.QtCore import Qt, QUrl
 from PyQt6.QtGui import QDesktopServices, QFontMetrics
 
-from logic.ffmpeg_logic import cut_video_command
-from logic.ffmpeg_worker import FFmpegWorker
+from logic.ffmpeg_logic import (
+    cut_video_command, get_video_duration, parse_time_to_seconds, stream_copy_keyframe,
+    MEZZANINE_PROFILES, MP4_LAYOUTS, DEFAULT_MP4_LAYOUT
+)
+from logic.ffmpeg_worker import FFmpegWorker, AnalysisWorker
+from logic.thumbnail_strip import get_thumbnail_strip
+from logic.frame_index import get_frame_index
+from logic.batch_cut import parse_cut_ranges, load_cut_ranges_file, multi_cut_command, clip_progress
+from logic.scene_detect import detect_scenes, scene_ranges, DEFAULT_THRESHOLD
+from logic.waveform import get_waveform_peaks, numpy_available
+from logic.mezzanine import AUTO_MEZZANINE, cached_mezzanine, pick_mezzanine_profile, describe_results
 from gui.task_widget import ConversionTaskWidget
+from gui.widgets import ThumbnailTimeline, WaveformView
 
 
 class CutVideoTab(QWidget):
@@ -26,6 +46,12 @@ class CutVideoTab(QWidget):
         self.setAcceptDrops(True)
         self.cut_video_file = None
         self.active_workers = []
+        self.thumbnail_worker = None
+        self.index_worker = None
+        self.scene_worker = None
+        self.waveform_worker = None
+        self.scenes = []  # Cambios de escena detectados en el video actual
+        self.frame_index = None  # Índice de fotogramas del video actual (cuando esté listo)
         self.init_ui()
 
     def init_ui(self):
@@ -45,6 +71,67 @@ class CutVideoTab(QWidget):
         group_video.setLayout(video_layout)
         layout.addWidget(group_video)
 
+        # --- Grupo: Línea de tiempo ---
+        group_timeline = QGroupBox("Línea de Tiempo")
+        timeline_layout = QVBoxLayout()
+
+        self.timeline = ThumbnailTimeline()
+        self.timeline.positionChanged.connect(self.update_timeline_position)
+        timeline_layout.addWidget(self.timeline)
+
+        # Forma de onda (zoom con la rueda, desplazamiento con Mayús + rueda)
+        self.waveform = WaveformView()
+        self.timeline.positionChanged.connect(self.waveform.set_position)
+        self.waveform.positionChanged.connect(self.timeline.set_position)
+        timeline_layout.addWidget(self.waveform)
+
+        row_timeline = QHBoxLayout()
+        self.preview_label = QLabel()
+        self.preview_label.setFixedHeight(72)
+        row_timeline.addWidget(self.preview_label)
+
+        self.position_label = QLabel("Posición: 0.000 s")
+        row_timeline.addWidget(self.position_label)
+
+        self.btn_mark_start = QPushButton("Marcar inicio")
+        self.btn_mark_start.clicked.connect(self.mark_start_from_timeline)
+        row_timeline.addWidget(self.btn_mark_start)
+
+        self.btn_mark_end = QPushButton("Marcar final")
+        self.btn_mark_end.clicked.connect(self.mark_end_from_timeline)
+        row_timeline.addWidget(self.btn_mark_end)
+
+        timeline_layout.addLayout(row_timeline)
+
+        # Detección de escenas: sugiere puntos de corte sobre la línea de tiempo
+        row_scenes = QHBoxLayout()
+        row_scenes.addWidget(QLabel("Umbral de escena (0-1):"))
+        self.scene_threshold_input = QLineEdit(str(DEFAULT_THRESHOLD))
+        self.scene_threshold_input.setFixedWidth(60)
+        row_scenes.addWidget(self.scene_threshold_input)
+
+        self.btn_detect_scenes = QPushButton("Detectar escenas")
+        self.btn_detect_scenes.clicked.connect(self.detect_scenes)
+        row_scenes.addWidget(self.btn_detect_scenes)
+
+        self.btn_split_scenes = QPushButton("Dividir en escenas")
+        self.btn_split_scenes.clicked.connect(self.split_at_scenes)
+        row_scenes.addWidget(self.btn_split_scenes)
+
+        self.scenes_status_label = QLabel("")
+        row_scenes.addWidget(self.scenes_status_label)
+        timeline_layout.addLayout(row_scenes)
+
+        self.scenes_list = QListWidget()
+        self.scenes_list.setFixedHeight(70)
+        self.scenes_list.itemClicked.connect(
+            lambda item: self.timeline.set_position(item.data(Qt.ItemDataRole.UserRole))
+        )
+        timeline_layout.addWidget(self.scenes_list)
+
+        group_timeline.setLayout(timeline_layout)
+        layout.addWidget(group_timeline)
+
         # --- Grupo: Parámetros de Corte ---
         group_params = QGroupBox("Parámetros de Corte")
         params_layout = QVBoxLayout()
@@ -107,6 +194,36 @@ class CutVideoTab(QWidget):
         group_process = QGroupBox("Procesar Corte de Video")
         process_layout = QVBoxLayout()
 
+        self.copy_cut_checkbox = QCheckBox("Copiar sin recodificar si el inicio es un fotograma clave")
+        self.copy_cut_checkbox.setToolTip(
+            "Solo sin fundidos. Usa el plan de fotogramas clave guardado junto al vídeo (.keyframes.json)\n"
+            "o el índice de fotogramas; si el inicio no es un fotograma clave, se recodifica."
+        )
+        process_layout.addWidget(self.copy_cut_checkbox)
+
+        self.mezzanine_label = QLabel("Perfil al recodificar:")
+        process_layout.addWidget(self.mezzanine_label)
+
+        self.mezzanine_combo = QComboBox()
+        self.mezzanine_combo.addItems([AUTO_MEZZANINE, *MEZZANINE_PROFILES])
+        self.mezzanine_combo.setToolTip(
+            "Automático: codifica unos segundos del video con cada perfil sin pérdida y elige\n"
+            "el más pequeño entre los casi tan rápidos como el más rápido (se mide una vez por video)."
+        )
+        process_layout.addWidget(self.mezzanine_combo)
+
+        self.mp4_layout_label = QLabel("Salida MP4:")
+        process_layout.addWidget(self.mp4_layout_label)
+
+        self.mp4_layout_combo = QComboBox()
+        self.mp4_layout_combo.addItems(list(MP4_LAYOUTS))
+        self.mp4_layout_combo.setCurrentText(DEFAULT_MP4_LAYOUT)
+        self.mp4_layout_combo.setToolTip(
+            "faststart reescribe el archivo entero al terminar para mover el índice (moov) al principio.\n"
+            "Fragmentado se puede reproducir en streaming igual y se escribe una sola vez."
+        )
+        process_layout.addWidget(self.mp4_layout_combo)
+
         self.btn_cut_video = QPushButton("Cortar Video")
         self.btn_cut_video.clicked.connect(self.cut_video)
         process_layout.addWidget(self.btn_cut_video)
@@ -114,6 +231,42 @@ class CutVideoTab(QWidget):
         group_process.setLayout(process_layout)
         layout.addWidget(group_process)
 
+        # --- Grupo: Corte por Lotes ---
+        group_batch = QGroupBox("Corte por Lotes (varios clips en una pasada)")
+        batch_layout = QVBoxLayout()
+
+        self.batch_hint_label = QLabel("Un clip por línea: inicio, fin[, fade_in, fade_out, nombre]")
+        batch_layout.addWidget(self.batch_hint_label)
+
+        self.batch_ranges_input = QPlainTextEdit()
+        self.batch_ranges_input.setPlaceholderText("00:00:10, 00:00:25, 0.5, 0.5, intro\n95, 110")
+        self.batch_ranges_input.setFixedHeight(90)
+        batch_layout.addWidget(self.batch_ranges_input)
+
+        row_batch = QHBoxLayout()
+        self.btn_import_ranges = QPushButton("Importar CSV")
+        self.btn_import_ranges.clicked.connect(self.import_batch_ranges)
+        row_batch.addWidget(self.btn_import_ranges)
+
+        self.btn_add_timeline_range = QPushButton("Añadir rango marcado")
+        self.btn_add_timeline_range.clicked.connect(self.add_timeline_range)
+        row_batch.addWidget(self.btn_add_timeline_range)
+
+        self.batch_copy_checkbox = QCheckBox("Copiar sin recodificar")
+        self.batch_copy_checkbox.setToolTip(
+            "Solo sin fundidos: cada clip empieza en el fotograma clave anterior a su inicio.\n"
+            "Necesita el índice de fotogramas; si aún no está listo, el lote se recodifica."
+        )
+        row_batch.addWidget(self.batch_copy_checkbox)
+
+        self.btn_batch_cut = QPushButton("Cortar Lote")
+        self.btn_batch_cut.clicked.connect(self.batch_cut_video)
+        row_batch.addWidget(self.btn_batch_cut)
+        batch_layout.addLayout(row_batch)
+
+        group_batch.setLayout(batch_layout)
+        layout.addWidget(group_batch)
+
         # --- Grupo: Tareas de Corte ---
         group_tasks = QGroupBox("Tareas de Corte")
         self.tasks_layout = QVBoxLayout()
@@ -159,10 +312,127 @@ class CutVideoTab(QWidget):
             "Videos (*.mp4 *.avi *.mkv *.mov)"
         )
         if file_path:
-            self.cut_video_file_label.setText(
-                f"Video: <span style='color:blue;'>{os.path.basename(file_path)}</span>"
-            )
-            self.cut_video_file = file_path
+            self.set_cut_video(file_path)
+
+    def set_cut_video(self, file_path):
+        """Asigna el video a cortar y carga su línea de tiempo en segundo plano."""
+        self.cut_video_file = file_path
+        self.cut_video_file_label.setText(
+            f"Video: <span style='color:blue;'>{os.path.basename(file_path)}</span>"
+        )
+        self.load_timeline(file_path)
+        self.load_frame_index(file_path)
+        self.load_waveform(file_path)
+        self.scenes = []
+        self.scenes_list.clear()
+        self.scenes_status_label.setText("")
+
+    def load_waveform(self, file_path):
+        """Genera (o lee de la caché) los picos de la forma de onda en segundo plano."""
+        if not numpy_available():
+            self.waveform.set_message("Instala numpy para ver la forma de onda")
+            return
+        self.waveform.set_message("Generando forma de onda...")
+        worker = AnalysisWorker(get_waveform_peaks, file_path)
+        worker.resultReady.connect(lambda peaks: self.handle_waveform_ready(file_path, peaks))
+        self.waveform_worker = worker
+        worker.start()
+
+    def handle_waveform_ready(self, file_path, peaks):
+        """Muestra la forma de onda si sigue correspondiendo al video seleccionado."""
+        if file_path != self.cut_video_file:
+            return
+        if peaks is None:
+            self.waveform.set_message("Sin audio")
+            return
+        self.waveform.set_peaks(peaks)
+
+    def load_frame_index(self, file_path):
+        """Construye (o lee de la caché) el índice de fotogramas sin bloquear la interfaz."""
+        self.frame_index = None
+        self.fps_frame_label.setText("FPS (Del video de entrada):")
+        worker = AnalysisWorker(get_frame_index, file_path)
+        worker.resultReady.connect(lambda index: self.handle_frame_index_ready(file_path, index))
+        self.index_worker = worker
+        worker.start()
+
+    def handle_frame_index_ready(self, file_path, index):
+        """Guarda el índice si sigue correspondiendo al video seleccionado."""
+        if file_path != self.cut_video_file or index is None:
+            return
+        self.frame_index = index
+        self.fps_frame_label.setText(f"FPS (no necesario: índice de {index.frame_count} frames listo):")
+
+    def load_timeline(self, file_path):
+        """Genera (o lee de la caché) la tira de miniaturas sin bloquear la interfaz."""
+        self.timeline.set_message("Generando miniaturas...")
+        self.preview_label.clear()
+        self.timeline.set_range()
+
+        worker = AnalysisWorker(get_thumbnail_strip, file_path)
+        worker.resultReady.connect(lambda info: self.handle_timeline_ready(file_path, info))
+        worker.failed.connect(lambda message: self.timeline.set_message("No se pudieron generar las miniaturas"))
+        # Se guarda la referencia para que el hilo no se destruya mientras trabaja
+        self.thumbnail_worker = worker
+        worker.start()
+
+    def handle_timeline_ready(self, file_path, info):
+        """Muestra la tira si sigue correspondiendo al video seleccionado."""
+        if file_path != self.cut_video_file:
+            return
+        if info is None:
+            self.timeline.set_message("No se pudieron generar las miniaturas")
+            return
+        self.timeline.set_strip(info)
+        self.update_timeline_position(0.0)
+
+    def update_timeline_position(self, seconds):
+        """Actualiza la vista previa y la etiqueta con la posición elegida en la línea de tiempo."""
+        self.position_label.setText(f"Posición: {seconds:.3f} s")
+        thumbnail = self.timeline.thumbnail_at(seconds)
+        if thumbnail is not None:
+            self.preview_label.setPixmap(thumbnail)
+
+    def timeline_fps(self):
+        """FPS indicados por el usuario para convertir la posición a frames (None si no es válido)."""
+        try:
+            fps_value = float(self.fps_frame_input.text().strip())
+        except ValueError:
+            return None
+        return fps_value if fps_value > 0 else None
+
+    def mark_start_from_timeline(self):
+        """Usa la posición de la línea de tiempo como inicio del corte."""
+        seconds = self.timeline.position
+        if self.cut_mode_combo.currentText() == "Tiempo":
+            self.cut_start_input.setText(f"{seconds:.3f}")
+        elif self.frame_index is not None:
+            self.cut_start_input.setText(str(self.frame_index.frame_at(seconds)))
+        else:
+            fps_value = self.timeline_fps()
+            if fps_value is None:
+                return
+            self.cut_start_input.setText(str(int(round(seconds * fps_value))))
+        self.timeline.set_range(seconds, self.timeline.range_end)
+
+    def mark_end_from_timeline(self):
+        """Usa la posición de la línea de tiempo como final del corte."""
+        seconds = self.timeline.position
+        start = self.timeline.range_start or 0.0
+        if seconds <= start:
+            return
+        if self.cut_mode_combo.currentText() == "Tiempo":
+            self.cut_end_input.setText(f"{seconds:.3f}")
+            self.cut_duration_input.clear()
+        elif self.frame_index is not None:
+            frames = self.frame_index.frame_at(seconds) - self.frame_index.frame_at(start)
+            self.cut_duration_input.setText(str(max(1, frames)))
+        else:
+            fps_value = self.timeline_fps()
+            if fps_value is None:
+                return
+            self.cut_duration_input.setText(str(int(round((seconds - start) * fps_value))))
+        self.timeline.set_range(start, seconds)
 
     def dragEnterEvent(self, event):
         """
@@ -185,10 +455,7 @@ class CutVideoTab(QWidget):
                 video_exts = [".mp4", ".avi", ".mkv", ".mov"]
                 ext = os.path.splitext(file_path)[1].lower()
                 if ext in video_exts:
-                    self.cut_video_file = file_path
-                    self.cut_video_file_label.setText(
-                        f"Video: <span style='color:blue;'>{os.path.basename(file_path)}</span>"
-                    )
+                    self.set_cut_video(file_path)
             event.acceptProposedAction()
         else:
             event.ignore()
@@ -215,7 +482,8 @@ class CutVideoTab(QWidget):
 
         else:
             try:
-                fps_value = float(self.fps_frame_input.text().strip())
+                # Con el índice de fotogramas los frames se traducen a tiempos exactos
+                fps_value = 1.0 if self.frame_index is not None else float(self.fps_frame_input.text().strip())
                 if fps_value <= 0:
                     raise ValueError
             except ValueError:
@@ -233,6 +501,8 @@ class CutVideoTab(QWidget):
                 return
 
             start_time = str(start_frames / fps_value)
+            if self.frame_index is not None:
+                start_time = start_frames
 
             raw_duration_frames = self.cut_duration_input.text().strip() or None
             if raw_duration_frames is not None:
@@ -249,6 +519,8 @@ class CutVideoTab(QWidget):
                 # Para el cálculo correcto del fade en la lógica,
                 # pasamos la duración convertida a segundos.
                 duration = str(duration_frames / fps_value)
+                if self.frame_index is not None:
+                    duration = duration_frames
             else:
                 duration = None
 
@@ -269,15 +541,97 @@ class CutVideoTab(QWidget):
             self.tasks_layout.addWidget(error_widget)
             return
 
+        # El vídeo y su índice se fijan ahora: el benchmark es asíncrono y mientras
+        # tanto se puede elegir otro vídeo (y el índice se reinicia)
+        video_path = self.cut_video_file
+        frame_index = self.frame_index
+        # Sin índice ya convertimos los frames a tiempo real con el FPS indicado
+        cut_mode = "frames" if cut_mode == "frames" and frame_index is not None else "time"
+
+        def cut_with(profile):
+            self.start_cut(video_path, start_time, duration, end_time, cut_mode,
+                           fade_in_duration, fade_out_duration, profile, frame_index)
+
+        if self.copy_cut_checkbox.isChecked() and fade_in_duration == 0 and fade_out_duration == 0:
+            # Si el corte se va a copiar no hace falta medir perfiles de intermedio
+            start_seconds = (frame_index.frame_time(start_time) if cut_mode == "frames"
+                             else parse_time_to_seconds(start_time))
+            if stream_copy_keyframe(video_path, start_seconds, frame_index) is not None:
+                cut_with(None)
+                return
+        self.with_mezzanine_profile(video_path, cut_with)
+
+    def with_mezzanine_profile(self, video_path, callback):
+        """
+        Llama a callback(perfil) con el perfil de intermedio elegido. En
+        automático, si el benchmark de este video no está en la caché, se mide en
+        segundo plano mostrando una tarea de análisis.
+        """
+        choice = self.mezzanine_combo.currentText()
+        if choice != AUTO_MEZZANINE:
+            callback(choice)
+            return
+        cached = cached_mezzanine(video_path)
+        if cached is not None:
+            callback(cached[0])
+            return
+
+        status_widget = ConversionTaskWidget(f"Medir perfiles: {os.path.basename(video_path)}")
+        status_widget.update_status("Codificando muestras...")
+        self.tasks_layout.addWidget(status_widget)
+
+        # Cancelar mata la muestra en curso y libera su hueco en el planificador
+        stop_event = threading.Event()
+
+        def cancel_benchmark():
+            stop_event.set()
+            status_widget.cancel_button.setEnabled(False)
+            status_widget.update_status("Cancelando...")
+
+        status_widget.cancelRequested.connect(cancel_benchmark)
+        worker = AnalysisWorker(pick_mezzanine_profile, video_path, stop_event)
+
+        def profile_ready(result):
+            self.remove_worker_reference(worker)
+            status_widget.cancel_button.setEnabled(False)
+            if result is None:
+                status_widget.update_status("Cancelado")
+                return
+            profile, results = result
+            status_widget.update_status(f"Elegido: {profile}")
+            status_widget.setToolTip(describe_results(results, profile))
+            status_widget.update_progress(100)
+            callback(profile)
+
+        def benchmark_failed(message):
+            self.remove_worker_reference(worker)
+            status_widget.cancel_button.setEnabled(False)
+            status_widget.update_status(f"Error: {message}")
+
+        worker.resultReady.connect(profile_ready)
+        worker.failed.connect(benchmark_failed)
+        self.active_workers.append(worker)
+        worker.start()
+
+    def start_cut(self, video_path, start_time, duration, end_time, cut_mode,
+                  fade_in_duration, fade_out_duration, mezzanine_profile, frame_index):
+        """
+        Construye el comando del corte y lanza el worker que lo ejecuta.
+        'frame_index' es el índice de 'video_path' capturado al pedir el corte.
+        """
         command, output_file = cut_video_command(
-            self.cut_video_file,
+            video_path,
             start_time,
             duration=duration,
             end_time=end_time,
             output_format="mp4",
-            cut_mode="time",  # ya convertimos todo a tiempo real
+            cut_mode=cut_mode,
             fade_in_duration=fade_in_duration,
-            fade_out_duration=fade_out_duration
+            fade_out_duration=fade_out_duration,
+            frame_index=frame_index,
+            stream_copy=self.copy_cut_checkbox.isChecked(),
+            mezzanine_profile=mezzanine_profile,
+            mp4_layout=self.mp4_layout_combo.currentText()
         )
 
         if not command:
@@ -287,13 +641,17 @@ class CutVideoTab(QWidget):
             return
 
         task_name = f"Corte: {os.path.basename(output_file)}"
-        task_widget = ConversionTaskWidget(task_name)
+        task_widget = ConversionTaskWidget(task_name, pausable=True)
         self.tasks_layout.addWidget(task_widget)
 
-        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False)
+        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False,
+                              operation="cut")
         self.active_workers.append(worker)
 
         worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
         worker.finishedSignal.connect(
             lambda success, message: self.handle_cut_task_finished(task_widget, success, message, worker)
         )
@@ -333,6 +691,188 @@ class CutVideoTab(QWidget):
             task_widget.update_status(f"Error: {message}")
             task_widget.update_progress(0)
 
+    def detect_scenes(self):
+        """Analiza (o lee de la caché) los cambios de escena del video en segundo plano."""
+        if not self.cut_video_file:
+            return
+        try:
+            threshold = float(self.scene_threshold_input.text().strip())
+            if not 0 < threshold < 1:
+                raise ValueError
+        except ValueError:
+            self.scenes_status_label.setText("Umbral inválido (entre 0 y 1)")
+            return
+
+        file_path = self.cut_video_file
+        self.scenes_status_label.setText("Analizando escenas...")
+        self.btn_detect_scenes.setEnabled(False)
+        worker = AnalysisWorker(detect_scenes, file_path, threshold)
+        worker.resultReady.connect(lambda scenes: self.handle_scenes_ready(file_path, scenes))
+        worker.failed.connect(lambda message: self.handle_scenes_ready(file_path, None))
+        self.scene_worker = worker
+        worker.start()
+
+    def handle_scenes_ready(self, file_path, scenes):
+        """Muestra los cambios de escena como puntos de corte sugeridos."""
+        self.btn_detect_scenes.setEnabled(True)
+        if file_path != self.cut_video_file:
+            return
+        if scenes is None:
+            self.scenes_status_label.setText("Error al detectar escenas")
+            return
+
+        self.scenes = scenes
+        self.scenes_status_label.setText(f"{len(scenes)} cambios de escena")
+        self.scenes_list.clear()
+        for seconds, score in scenes:
+            item = QListWidgetItem(f"{int(seconds // 60):02d}:{seconds % 60:06.3f}  (puntuación {score:.2f})")
+            item.setData(Qt.ItemDataRole.UserRole, seconds)
+            self.scenes_list.addItem(item)
+        self.timeline.set_markers([seconds for seconds, _ in scenes])
+
+    def split_at_scenes(self):
+        """Rellena el corte por lotes con un clip por escena y lo lanza."""
+        if not self.cut_video_file or not self.scenes:
+            self.scenes_status_label.setText("Detecta las escenas primero")
+            return
+        duration = get_video_duration(self.cut_video_file)
+        if duration <= 0:
+            return
+        lines = [
+            f"{r['start']:.3f}, {r['end']:.3f}, 0, 0, {r['name']}"
+            for r in scene_ranges(self.scenes, duration)
+        ]
+        self.batch_ranges_input.setPlainText("\n".join(lines))
+        self.batch_cut_video()
+
+    def import_batch_ranges(self):
+        """Carga la lista de rangos desde un archivo CSV/TXT."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Importar rangos",
+            "",
+            "Listas de rangos (*.csv *.txt)"
+        )
+        if not file_path:
+            return
+        ranges, error_message = load_cut_ranges_file(file_path)
+        if error_message:
+            error_widget = ConversionTaskWidget("Error: Lista de rangos")
+            error_widget.update_status(error_message)
+            self.tasks_layout.addWidget(error_widget)
+            return
+        lines = [
+            f"{r['start']:.3f}, {r['end']:.3f}, {r['fade_in']}, {r['fade_out']}, {r['name']}".rstrip(", ")
+            for r in ranges
+        ]
+        self.batch_ranges_input.setPlainText("\n".join(lines))
+
+    def add_timeline_range(self):
+        """Añade a la lista el rango marcado en la línea de tiempo."""
+        start, end = self.timeline.range_start, self.timeline.range_end
+        if start is None or end is None:
+            return
+        self.batch_ranges_input.appendPlainText(f"{start:.3f}, {end:.3f}")
+
+    def batch_cut_video(self):
+        """
+        Extrae todos los clips de la lista con un único proceso FFmpeg.
+        Se crea una tarea para el lote (con pausa y cancelación) y una por clip
+        que muestra su progreso.
+        """
+        if not self.cut_video_file:
+            error_widget = ConversionTaskWidget("Error: Sin video")
+            error_widget.update_status("Selecciona un video primero.")
+            self.tasks_layout.addWidget(error_widget)
+            return
+
+        ranges, error_message = parse_cut_ranges(self.batch_ranges_input.toPlainText())
+        if error_message:
+            error_widget = ConversionTaskWidget("Error: Lista de rangos")
+            error_widget.update_status(error_message)
+            self.tasks_layout.addWidget(error_widget)
+            return
+
+        stream_copy = self.batch_copy_checkbox.isChecked()
+        if stream_copy and any(r["fade_in"] > 0 or r["fade_out"] > 0 for r in ranges):
+            error_widget = ConversionTaskWidget("Error: Fundidos en copia")
+            error_widget.update_status("Los fundidos requieren recodificar: desmarca 'Copiar sin recodificar'.")
+            self.tasks_layout.addWidget(error_widget)
+            return
+
+        video_path = self.cut_video_file
+        frame_index = self.frame_index
+        if stream_copy and frame_index is not None:
+            self.start_batch_cut(video_path, ranges, stream_copy, None, frame_index)
+        else:
+            self.with_mezzanine_profile(
+                video_path,
+                lambda profile: self.start_batch_cut(video_path, ranges, stream_copy, profile, frame_index)
+            )
+
+    def start_batch_cut(self, video_path, ranges, stream_copy, mezzanine_profile, frame_index):
+        """Construye el comando del lote y lanza el worker con una tarea por clip."""
+        job = multi_cut_command(video_path, ranges, stream_copy=stream_copy,
+                                frame_index=frame_index,
+                                mezzanine_profile=mezzanine_profile,
+                                mp4_layout=self.mp4_layout_combo.currentText())
+        output_files = job["output_files"]
+
+        batch_widget = ConversionTaskWidget(f"Lote de cortes: {len(ranges)} clips", pausable=True)
+        self.tasks_layout.addWidget(batch_widget)
+        clip_widgets = []
+        for output_file in output_files:
+            clip_widget = ConversionTaskWidget(f"Corte: {os.path.basename(output_file)}")
+            self.tasks_layout.addWidget(clip_widget)
+            clip_widgets.append(clip_widget)
+
+        worker = FFmpegWorker(job["command"], total_frames=job["total_frames"], output_file=output_files[0],
+                              enable_logs=False, operation="cut_batch")
+        self.active_workers.append(worker)
+
+        def update_clips(value):
+            batch_widget.update_progress(value)
+            for clip_widget, progress in zip(
+                clip_widgets, clip_progress(ranges, job["span_start"], job["span_end"], value)
+            ):
+                clip_widget.update_progress(progress)
+
+        def finished(success, message):
+            self.remove_worker_reference(worker)
+            if success:
+                batch_widget.update_status("Completado")
+                batch_widget.update_progress(100)
+            elif str(message).lower() == "cancelado":
+                batch_widget.update_status("Cancelado")
+                batch_widget.update_progress(0)
+            else:
+                batch_widget.update_status(f"Error: {message}")
+                batch_widget.update_progress(0)
+            for clip_widget, output_file in zip(clip_widgets, output_files):
+                if not success and os.path.exists(output_file):
+                    # Ningún clip de un lote fallido o cancelado queda a medias en disco
+                    try:
+                        os.remove(output_file)
+                    except OSError:
+                        pass
+                self.handle_cut_task_finished(clip_widget, success, output_file if success else message, None)
+
+        def cancel():
+            worker.cancel()
+            for widget in [batch_widget] + clip_widgets:
+                widget.update_status("Cancelado")
+                widget.update_progress(0)
+            self.remove_worker_reference(worker)
+
+        worker.progressChanged.connect(update_clips)
+        worker.metricsReady.connect(batch_widget.show_metrics)
+        worker.etaChanged.connect(batch_widget.update_eta)
+        batch_widget.pauseToggled.connect(worker.set_paused)
+        worker.finishedSignal.connect(finished)
+        for widget in [batch_widget] + clip_widgets:
+            widget.cancelRequested.connect(cancel)
+        worker.start()
+
     def cancel_cut_task(self, worker, task_widget):
         """Cancela la tarea forzando la terminación del worker y actualizando el widget."""
         worker.cancel()
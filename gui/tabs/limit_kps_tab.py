@@ -149,12 +149,16 @@ class LimitKpsTab(QWidget):
             return
 
         task_name = f"Limitación: {os.path.basename(output_file)}"
-        task_widget = ConversionTaskWidget(task_name)
+        task_widget = ConversionTaskWidget(task_name, pausable=True)
         self.tasks_layout.addWidget(task_widget)
 
         # En este caso se usa total_frames=100 como referencia para el progreso
-        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False)
+        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False,
+                              operation="limit_kps")
         worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
         worker.finishedSignal.connect(lambda success, message: self.handle_task_finished(task_widget, success, message))
         task_widget.cancelRequested.connect(lambda: self.cancel_task(worker, task_widget))
         worker.start()
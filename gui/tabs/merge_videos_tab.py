@@ -20,18 +20,25 @@ import os
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGroupBox, QPushButton, QLabel, QFileDialog,
-    QScrollArea, QListWidget, QListWidgetItem, QHBoxLayout, QComboBox, QLineEdit
+    QScrollArea, QListWidget, QListWidgetItem, QHBoxLayout, QComboBox, QLineEdit, QCheckBox
 )
 from PyQt6.QtCore import Qt, QUrl
 from PyQt6.QtGui import QDesktopServices, QFontMetrics
 
-from logic.ffmpeg_worker import FFmpegWorker
+from logic.ffmpeg_worker import FFmpegWorker, FFmpegPipelineWorker, AnalysisWorker
+from logic.segmented_encode import merge_videos_checkpoint_job
+from logic.timeline_render import load_timeline_file, timeline_render_job
+from logic.job_scheduler import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
 from gui.task_widget import ConversionTaskWidget
 from logic.ffmpeg_logic import (
     merge_videos_command,
+    merge_keyframe_plan,
     pair_videos_by_resolution,
-    build_auto_merge_output_name
+    build_auto_merge_output_name,
+    MP4_LAYOUTS,
+    DEFAULT_MP4_LAYOUT
 )
+from logic.keyframe_plan import HOUSE_GOP_SECONDS, write_keyframe_sidecar
 
 
 class MergeVideosTab(QWidget):
@@ -41,6 +48,7 @@ class MergeVideosTab(QWidget):
 
         self.input_videos = []
         self.active_workers = []
+        self.timeline_clips = []  # Clips de la línea de tiempo importada
 
         self.folder_1_path = None
         self.folder_2_path = None
@@ -130,6 +138,36 @@ class MergeVideosTab(QWidget):
         group_auto.setLayout(auto_layout)
         layout.addWidget(group_auto)
 
+        # =========================================================
+        # Línea de tiempo (EDL / CSV)
+        # =========================================================
+        group_timeline = QGroupBox("Línea de Tiempo (EDL / CSV)")
+        timeline_layout = QVBoxLayout()
+
+        self.timeline_label = QLabel("Línea de tiempo: no cargada")
+        self.timeline_label.setWordWrap(True)
+        timeline_layout.addWidget(self.timeline_label)
+
+        row_timeline = QHBoxLayout()
+        self.btn_import_timeline = QPushButton("Importar EDL / CSV")
+        self.btn_import_timeline.clicked.connect(self.import_timeline)
+        row_timeline.addWidget(self.btn_import_timeline)
+
+        self.timeline_parallel_label = QLabel("Segmentos en paralelo:")
+        row_timeline.addWidget(self.timeline_parallel_label)
+        self.timeline_parallel_combo = QComboBox()
+        self.timeline_parallel_combo.addItems(["1", "2", "4", "8"])
+        self.timeline_parallel_combo.setCurrentText("2")
+        row_timeline.addWidget(self.timeline_parallel_combo)
+
+        self.btn_render_timeline = QPushButton("Renderizar Línea de Tiempo")
+        self.btn_render_timeline.clicked.connect(self.render_timeline)
+        row_timeline.addWidget(self.btn_render_timeline)
+        timeline_layout.addLayout(row_timeline)
+
+        group_timeline.setLayout(timeline_layout)
+        layout.addWidget(group_timeline)
+
         # =========================================================
         # Configuración general
         # =========================================================
@@ -170,6 +208,34 @@ class MergeVideosTab(QWidget):
         self.crf_input = QLineEdit("19")
         config_layout.addWidget(self.crf_input)
 
+        self.checkpoint_checkbox = QCheckBox("Reanudable (checkpoints por segmentos)")
+        self.checkpoint_checkbox.setToolTip(
+            "Recodifica los vídeos en segmentos independientes. Si la tarea se interrumpe,\n"
+            "al relanzarla con los mismos parámetros continúa desde el primer segmento pendiente."
+        )
+        config_layout.addWidget(self.checkpoint_checkbox)
+
+        self.keyframes_checkbox = QCheckBox(
+            f"Fotogramas clave planificados (inicio de cada clip y cada {HOUSE_GOP_SECONDS:g} s)"
+        )
+        self.keyframes_checkbox.setToolTip(
+            "Codifica con GOPs cerrados y fotogramas clave en las fronteras entre clips, y guarda el plan\n"
+            "junto al vídeo (.keyframes.json) para que los cortes y uniones posteriores se hagan sin recodificar."
+        )
+        config_layout.addWidget(self.keyframes_checkbox)
+
+        self.mp4_layout_label = QLabel("Salida MP4 (solo modo compatible):")
+        config_layout.addWidget(self.mp4_layout_label)
+
+        self.mp4_layout_combo = QComboBox()
+        self.mp4_layout_combo.addItems(list(MP4_LAYOUTS))
+        self.mp4_layout_combo.setCurrentText(DEFAULT_MP4_LAYOUT)
+        self.mp4_layout_combo.setToolTip(
+            "faststart reescribe el archivo entero al terminar para mover el índice (moov) al principio.\n"
+            "Fragmentado se puede reproducir en streaming igual y se escribe una sola vez."
+        )
+        config_layout.addWidget(self.mp4_layout_combo)
+
         group_config.setLayout(config_layout)
         layout.addWidget(group_config)
 
@@ -371,6 +437,10 @@ class MergeVideosTab(QWidget):
         self.preset_combo.setVisible(compatible_mode)
         self.crf_label.setVisible(compatible_mode)
         self.crf_input.setVisible(compatible_mode)
+        self.checkpoint_checkbox.setVisible(compatible_mode)
+        self.keyframes_checkbox.setVisible(compatible_mode)
+        self.mp4_layout_label.setVisible(compatible_mode)
+        self.mp4_layout_combo.setVisible(compatible_mode)
 
     def validate_mode_inputs(self):
         """
@@ -406,6 +476,28 @@ class MergeVideosTab(QWidget):
         mode_text = self.mode_combo.currentText()
         mode = "fast" if mode_text == "Rápido (sin recodificar)" else "compatible"
 
+        if mode == "compatible" and self.checkpoint_checkbox.isChecked():
+            job, error_message = merge_videos_checkpoint_job(
+                self.input_videos,
+                output_name=self.output_name_input.text().strip(),
+                preset=self.preset_combo.currentText(),
+                crf=self.crf_input.text().strip(),
+                output_format="mp4",
+                mp4_layout=self.mp4_layout_combo.currentText()
+            )
+            if not job:
+                error_widget = ConversionTaskWidget("Error: Preparación de unión")
+                error_widget.update_status(error_message or "No se pudo preparar la unión por segmentos.")
+                self.tasks_layout.addWidget(error_widget)
+                return
+            self.start_merge_task(None, job["output_file"], None, "Unión compatible: ",
+                                  operation="merge_compatible", stages=job["stages"])
+            return
+
+        keyframes = None
+        if mode == "compatible" and self.keyframes_checkbox.isChecked():
+            keyframes = merge_keyframe_plan(self.input_videos, HOUSE_GOP_SECONDS)
+
         try:
             command, output_file, concat_file, error_message = merge_videos_command(
                 self.input_videos,
@@ -413,7 +505,9 @@ class MergeVideosTab(QWidget):
                 output_name=self.output_name_input.text().strip(),
                 preset=self.preset_combo.currentText(),
                 crf=self.crf_input.text().strip(),
-                output_format="mp4"
+                output_format="mp4",
+                keyframes=keyframes,
+                mp4_layout=self.mp4_layout_combo.currentText()
             )
 
             if not command:
@@ -429,7 +523,16 @@ class MergeVideosTab(QWidget):
             return
 
         task_prefix = "Unión rápida: " if mode_text == "Rápido (sin recodificar)" else "Unión compatible: "
-        self.start_merge_task(command, output_file, concat_file, task_prefix)
+        if keyframes:
+            # El plan se guarda junto al vídeo cuando la unión ha terminado
+            stages = [
+                [{"command": command, "total_frames": 100}],
+                [{"callable": lambda: write_keyframe_sidecar(output_file, keyframes), "weight": 0}],
+            ]
+            self.start_merge_task(None, output_file, concat_file, task_prefix, operation=f"merge_{mode}",
+                                  stages=stages)
+            return
+        self.start_merge_task(command, output_file, concat_file, task_prefix, operation=f"merge_{mode}")
 
     # =========================================================
     # Procesado automático por carpetas
@@ -494,8 +597,32 @@ class MergeVideosTab(QWidget):
             summary_parts.append(f"Advertencias: {len(warnings)}")
         self.auto_summary_label.setText(" | ".join(summary_parts))
 
+        checkpoint = mode == "compatible" and self.checkpoint_checkbox.isChecked()
         for pair_info in pairs:
             output_name = os.path.splitext(os.path.basename(pair_info["video_1"]))[0]
+            variant_suffix = " sin logo" if pair_info["variant"] == "sin_logo" else ""
+            task_prefix = f"Auto {pair_info['resolution']}{variant_suffix}: "
+
+            if checkpoint:
+                job, error_message = merge_videos_checkpoint_job(
+                    [pair_info["video_1"], pair_info["video_2"]],
+                    output_name=output_name,
+                    preset=self.preset_combo.currentText(),
+                    crf=self.crf_input.text().strip(),
+                    output_format="mp4",
+                    output_dir=output_dir,
+                    mp4_layout=self.mp4_layout_combo.currentText()
+                )
+                if not job:
+                    error_widget = ConversionTaskWidget(f"Error: {output_name}")
+                    error_widget.update_status(error_message or "No se pudo preparar la unión por segmentos.")
+                    self.tasks_layout.addWidget(error_widget)
+                    continue
+                self.start_merge_task(
+                    None, job["output_file"], None, task_prefix,
+                    operation="merge_compatible", priority=PRIORITY_BACKGROUND, stages=job["stages"]
+                )
+                continue
 
             command, output_file, concat_file, error_message = merge_videos_command(
                 [pair_info["video_1"], pair_info["video_2"]],
@@ -504,7 +631,8 @@ class MergeVideosTab(QWidget):
                 preset=self.preset_combo.currentText(),
                 crf=self.crf_input.text().strip(),
                 output_format="mp4",
-                output_dir=output_dir
+                output_dir=output_dir,
+                mp4_layout=self.mp4_layout_combo.currentText()
             )
 
             if not command:
@@ -513,25 +641,139 @@ class MergeVideosTab(QWidget):
                 self.tasks_layout.addWidget(error_widget)
                 continue
 
-            variant_suffix = " sin logo" if pair_info["variant"] == "sin_logo" else ""
-            task_prefix = f"Auto {pair_info['resolution']}{variant_suffix}: "
-            self.start_merge_task(command, output_file, concat_file, task_prefix)
+            # El lote por carpetas corre en segundo plano para no frenar el trabajo interactivo
+            self.start_merge_task(
+                command, output_file, concat_file, task_prefix,
+                operation=f"merge_{mode}", priority=PRIORITY_BACKGROUND
+            )
 
     # =========================================================
     # Arranque común de tareas
     # =========================================================
-    def start_merge_task(self, command, output_file, concat_file, task_prefix):
+    # =========================================================
+    # Línea de tiempo (EDL / CSV)
+    # =========================================================
+    def import_timeline(self):
+        """Carga una línea de tiempo desde un EDL (CMX3600) o un CSV."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Importar línea de tiempo",
+            "",
+            "Líneas de tiempo (*.edl *.csv *.txt)"
+        )
+        if not file_path:
+            return
+
+        clips, error_message = load_timeline_file(file_path)
+        if error_message:
+            self.timeline_clips = []
+            self.timeline_label.setText(f"Línea de tiempo: <span style='color:red;'>{error_message}</span>")
+            return
+
+        self.timeline_clips = clips
+        total = sum(clip["end"] - clip["start"] for clip in clips)
+        sources = len({clip["source"] for clip in clips})
+        self.timeline_label.setText(
+            f"Línea de tiempo: <span style='color:blue;'>{os.path.basename(file_path)}</span> · "
+            f"{len(clips)} clips de {sources} fuentes · {total:.1f} s"
+        )
+
+    def render_timeline(self):
+        """
+        Prepara el render en segundo plano (puede necesitar indexar los fotogramas
+        clave de las fuentes) y después lo lanza como una tarea por segmentos.
+        """
+        if not self.timeline_clips:
+            error_widget = ConversionTaskWidget("Error: Sin línea de tiempo")
+            error_widget.update_status("Importa un EDL o CSV primero.")
+            self.tasks_layout.addWidget(error_widget)
+            return
+
+        clips = list(self.timeline_clips)
+        output_name = self.output_name_input.text().strip()
+        max_parallel = int(self.timeline_parallel_combo.currentText())
+
+        task_widget = ConversionTaskWidget("Línea de tiempo: preparando segmentos...", pausable=True)
+        # Mientras se planifica aún no hay procesos que pausar o cancelar
+        task_widget.set_pause_enabled(False)
+        task_widget.cancel_button.setEnabled(False)
+        self.tasks_layout.addWidget(task_widget)
+
+        planner = AnalysisWorker(timeline_render_job, clips, None, None, output_name)
+        planner.resultReady.connect(
+            lambda job: self.start_timeline_task(job, task_widget, max_parallel, planner)
+        )
+        planner.failed.connect(lambda message: (
+            task_widget.update_status(f"Error: {message}"), self.remove_worker_reference(planner)
+        ))
+        self.active_workers.append(planner)
+        planner.start()
+
+    def start_timeline_task(self, job, task_widget, max_parallel, planner):
+        """Lanza el render de la línea de tiempo con una tarea por segmento y una global."""
+        self.remove_worker_reference(planner)
+        task_prefix = "Línea de tiempo: "
+        task_widget.full_task_name = task_prefix + os.path.basename(job["output_file"])
+        task_widget.update_task_name()
+        task_widget.set_pause_enabled(True)
+        task_widget.cancel_button.setEnabled(True)
+
+        segment_widgets = []
+        for clip_number, start, end, copy in job["segments"]:
+            mode = "copia" if copy else "recodificado"
+            segment_widget = ConversionTaskWidget(
+                f"  Clip {clip_number + 1} [{start:.2f}-{end:.2f}s, {mode}]"
+            )
+            segment_widget.cancel_button.hide()
+            self.tasks_layout.addWidget(segment_widget)
+            segment_widgets.append(segment_widget)
+
+        worker = FFmpegPipelineWorker(
+            job["stages"], job["output_file"], operation="timeline_render",
+            max_parallel=max_parallel, cleanup_files=[job["temp_dir"]]
+        )
+        self.active_workers.append(worker)
+
+        def update_segment(index, value):
+            if index < len(segment_widgets):
+                segment_widgets[index].update_progress(value)
+                if value >= 100:
+                    segment_widgets[index].update_status("Completado")
+
+        worker.stepProgressChanged.connect(update_segment)
+        worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
+        worker.finishedSignal.connect(
+            lambda success, message: self.handle_merge_task_finished(
+                task_widget, success, message, None, worker, task_prefix
+            )
+        )
+        task_widget.cancelRequested.connect(lambda: self.cancel_merge_task(worker, task_widget, None))
+        worker.start()
+
+    def start_merge_task(self, command, output_file, concat_file, task_prefix, operation="merge",
+                         priority=PRIORITY_INTERACTIVE, stages=None):
         """
-        Crea el widget de tarea y lanza un FFmpegWorker.
+        Crea el widget de tarea y lanza un FFmpegWorker (o un FFmpegPipelineWorker
+        si se indican las etapas de una unión por segmentos).
         """
         task_name = task_prefix + os.path.basename(output_file)
-        task_widget = ConversionTaskWidget(task_name)
+        task_widget = ConversionTaskWidget(task_name, pausable=True)
         self.tasks_layout.addWidget(task_widget)
 
-        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False)
+        if stages is not None:
+            worker = FFmpegPipelineWorker(stages, output_file, operation=operation, priority=priority)
+        else:
+            worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False,
+                                  operation=operation, priority=priority)
         self.active_workers.append(worker)
 
         worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
         worker.finishedSignal.connect(
             lambda success, message: self.handle_merge_task_finished(
                 task_widget, success, message, concat_file, worker, task_prefix
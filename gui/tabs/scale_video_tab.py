@@ -9,7 +9,7 @@ El video se reescala sin recortar, lo que puede deformarlo si las proporciones c
 import os
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGroupBox, QPushButton, QLabel, QLineEdit,
-    QFileDialog, QScrollArea, QComboBox
+    QFileDialog, QScrollArea, QComboBox, QCheckBox
 )
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QDesktopServices, QFontMetrics
@@ -18,7 +18,9 @@ from PyQt6.QtCore import QUrl
 # Importa la función de lógica para escalar videos
 from logic.ffmpeg_logic import scale_video_command
 # Importa el worker para ejecutar FFmpeg
-from logic.ffmpeg_worker import FFmpegWorker
+from logic.ffmpeg_worker import FFmpegWorker, FFmpegPipelineWorker
+# Importa la versión reanudable por segmentos
+from logic.segmented_encode import scale_video_checkpoint_job
 # Importa el widget de tarea para mostrar el progreso
 from gui.task_widget import ConversionTaskWidget
 
@@ -78,6 +80,14 @@ class ScaleVideoTab(QWidget):
         self.crf_input = QLineEdit("19")
         params_layout.addWidget(self.crf_input)
 
+        # Codificación reanudable por segmentos
+        self.checkpoint_checkbox = QCheckBox("Reanudable (checkpoints por segmentos)")
+        self.checkpoint_checkbox.setToolTip(
+            "Codifica el video en segmentos independientes. Si la tarea se interrumpe,\n"
+            "al relanzarla con los mismos parámetros continúa desde el primer segmento pendiente."
+        )
+        params_layout.addWidget(self.checkpoint_checkbox)
+
         group_params.setLayout(params_layout)
         layout.addWidget(group_params)
 
@@ -170,6 +180,10 @@ class ScaleVideoTab(QWidget):
             self.tasks_layout.addWidget(error_widget)
             return
 
+        if self.checkpoint_checkbox.isChecked():
+            self.start_checkpoint_scale(scale_width, scale_height, preset, crf)
+            return
+
         # Construye el comando FFmpeg para reescalar el video
         command, output_file = scale_video_command(
             self.input_video, scale_width, scale_height, preset, crf
@@ -181,12 +195,42 @@ class ScaleVideoTab(QWidget):
             return
 
         task_name = f"Reescalado: {os.path.basename(output_file)}"
-        task_widget = ConversionTaskWidget(task_name)
+        task_widget = ConversionTaskWidget(task_name, pausable=True)
         self.tasks_layout.addWidget(task_widget)
 
         # Usamos un valor de referencia para total_frames (p.ej. 100) ya que el escalado suele ser rápido.
-        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False)
+        worker = FFmpegWorker(command, total_frames=100, output_file=output_file, enable_logs=False,
+                              operation="scale")
+        worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
+        worker.finishedSignal.connect(lambda success, message: self.handle_scale_task_finished(task_widget, success, message))
+        task_widget.cancelRequested.connect(lambda: self.cancel_scale_task(worker, task_widget))
+        worker.start()
+
+    def start_checkpoint_scale(self, scale_width, scale_height, preset, crf):
+        """Lanza el reescalado reanudable por segmentos."""
+        job = scale_video_checkpoint_job(self.input_video, scale_width, scale_height, preset, crf)
+        if not job:
+            error_widget = ConversionTaskWidget("Error: Comando inválido")
+            error_widget.update_status("No se pudo analizar el video de entrada.")
+            self.tasks_layout.addWidget(error_widget)
+            return
+
+        output_file = job["output_file"]
+        task_widget = ConversionTaskWidget(f"Reescalado: {os.path.basename(output_file)}", pausable=True)
+        if job["done_segments"]:
+            task_widget.update_status(
+                f"Reanudando: {job['done_segments']}/{job['total_segments']} segmentos hechos"
+            )
+        self.tasks_layout.addWidget(task_widget)
+
+        worker = FFmpegPipelineWorker(job["stages"], output_file, operation="scale")
         worker.progressChanged.connect(lambda value: task_widget.update_progress(value))
+        worker.metricsReady.connect(task_widget.show_metrics)
+        worker.etaChanged.connect(task_widget.update_eta)
+        task_widget.pauseToggled.connect(worker.set_paused)
         worker.finishedSignal.connect(lambda success, message: self.handle_scale_task_finished(task_widget, success, message))
         task_widget.cancelRequested.connect(lambda: self.cancel_scale_task(worker, task_widget))
         worker.start()
@@ -4,12 +4,16 @@ from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QPushBut
 from PyQt6.QtCore import pyqtSignal, Qt
 from PyQt6.QtGui import QFontMetrics
 
+from logic.job_metrics import format_metrics_summary, format_metrics_details
+
 class ConversionTaskWidget(QWidget):
     cancelRequested = pyqtSignal()
+    pauseToggled = pyqtSignal(bool)  # True para pausar, False para reanudar
 
-    def __init__(self, task_name: str, parent=None):
+    def __init__(self, task_name: str, parent=None, pausable=False):
         super().__init__(parent)
         self.full_task_name = task_name  # Guarda el nombre completo
+        self.pausable = pausable  # Solo las tareas en curso que admiten pausa muestran el botón
         self.init_ui()
 
     def init_ui(self):
@@ -31,6 +35,24 @@ class ConversionTaskWidget(QWidget):
         self.status_label = QLabel("En progreso")
         layout.addWidget(self.status_label)
 
+        # Etiqueta del tiempo restante (separada del estado para no pisarlo)
+        self.eta_label = QLabel()
+        self.eta_label.hide()
+        layout.addWidget(self.eta_label)
+
+        # Etiqueta de métricas (visible al terminar la tarea)
+        self.metrics_label = QLabel()
+        self.metrics_label.hide()
+        layout.addWidget(self.metrics_label)
+
+        # Botón de pausar / reanudar (solo en tareas pausables)
+        self.paused = False
+        self.pause_button = None
+        if self.pausable:
+            self.pause_button = QPushButton("Pausar")
+            self.pause_button.clicked.connect(self.toggle_pause)
+            layout.addWidget(self.pause_button)
+
         # Botón de cancelar
         self.cancel_button = QPushButton("Cancelar")
         self.cancel_button.clicked.connect(self.cancelRequested.emit)
@@ -52,6 +74,48 @@ class ConversionTaskWidget(QWidget):
     def update_status(self, text: str):
         self.status_label.setText(text)
 
+    def toggle_pause(self):
+        """Alterna entre pausar y reanudar la tarea y notifica el cambio."""
+        self.paused = not self.paused
+        self.pause_button.setText("Reanudar" if self.paused else "Pausar")
+        self.update_status("Pausado" if self.paused else "En progreso")
+        if self.paused:
+            # La estimación deja de valer mientras la tarea está detenida
+            self.clear_eta()
+        self.pauseToggled.emit(self.paused)
+
+    def set_pause_enabled(self, enabled: bool):
+        """Habilita o deshabilita el botón de pausa, si la tarea lo tiene."""
+        if self.pause_button is not None:
+            self.pause_button.setEnabled(enabled)
+
+    def update_eta(self, seconds: float):
+        """Muestra el tiempo restante estimado junto al estado."""
+        if self.paused:
+            return
+        minutes, secs = divmod(int(seconds), 60)
+        self.eta_label.setText(f"ETA {minutes}m {secs:02d}s")
+        self.eta_label.show()
+
+    def clear_eta(self):
+        """Oculta el tiempo restante estimado."""
+        self.eta_label.clear()
+        self.eta_label.hide()
+
+    def show_metrics(self, metrics: dict):
+        """Muestra un resumen de las métricas de la tarea y el detalle completo en el tooltip."""
+        # Las métricas llegan al terminar la tarea: ya no tiene sentido pausarla
+        # ni estimar el tiempo restante
+        if self.pause_button is not None:
+            self.pause_button.hide()
+        self.clear_eta()
+        summary = format_metrics_summary(metrics)
+        if not summary:
+            return
+        self.metrics_label.setText(summary)
+        self.metrics_label.setToolTip(format_metrics_details(metrics))
+        self.metrics_label.show()
+
     def resizeEvent(self, event):
         """Recalcula el texto elidido al redimensionar el widget para adaptarse al nuevo ancho."""
         self.update_task_name()
@@ -1,11 +1,14 @@
 # gui/widgets.py
 """
 Módulo para widgets personalizados utilizados en la aplicación FFmpeg GUI.
-Por ejemplo, se define un QLabel que emite una señal al ser clicado.
+Por ejemplo, se define un QLabel que emite una señal al ser clicado, una
+línea de tiempo con miniaturas que se puede recorrer con el ratón y una
+vista de forma de onda con zoom.
 """
 
-from PyQt6.QtWidgets import QLabel
-from PyQt6.QtCore import pyqtSignal, Qt
+from PyQt6.QtWidgets import QLabel, QWidget, QSizePolicy
+from PyQt6.QtCore import pyqtSignal, Qt, QRect
+from PyQt6.QtGui import QPainter, QPixmap, QColor, QPen
 
 class ClickableLabel(QLabel):
     """
@@ -17,3 +20,226 @@ class ClickableLabel(QLabel):
     def mousePressEvent(self, event):
         self.clicked.emit()  # Emite la señal cuando se hace clic
         super().mousePressEvent(event)
+
+
+class ThumbnailTimeline(QWidget):
+    """
+    Línea de tiempo con una tira de miniaturas (ver logic/thumbnail_strip.py).
+    Al hacer clic o arrastrar emite 'positionChanged' con el instante en segundos.
+    Opcionalmente sombrea el rango de corte seleccionado.
+    """
+    positionChanged = pyqtSignal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pixmap = None
+        self.count = 0
+        self.duration = 0.0
+        self.position = 0.0
+        self.range_start = None
+        self.range_end = None
+        self.markers = []  # Instantes destacados (p.ej. cambios de escena)
+        self.message = "Sin video"
+        self.setMinimumHeight(60)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.setMouseTracking(True)
+
+    def set_message(self, message):
+        """Quita la tira actual y muestra un texto (p.ej. 'Generando miniaturas...')."""
+        self.pixmap = None
+        self.markers = []
+        self.message = message
+        self.update()
+
+    def set_strip(self, info):
+        """Carga la tira devuelta por get_thumbnail_strip."""
+        pixmap = QPixmap(info["path"])
+        if pixmap.isNull():
+            self.set_message("No se pudieron cargar las miniaturas")
+            return
+        self.pixmap = pixmap
+        self.count = info["count"]
+        self.duration = info["duration"]
+        self.position = 0.0
+        self.update()
+
+    def set_range(self, start=None, end=None):
+        """Sombrea el rango [start, end] (en segundos); None para quitarlo."""
+        self.range_start = start
+        self.range_end = end
+        self.update()
+
+    def set_markers(self, markers):
+        """Marca instantes (en segundos) sobre la tira, p.ej. los cambios de escena."""
+        self.markers = list(markers)
+        self.update()
+
+    def set_position(self, seconds):
+        """Mueve el cursor a un instante y emite 'positionChanged' como si se hubiera hecho clic."""
+        if self.pixmap is None:
+            return
+        self.position = min(self.duration, max(0.0, seconds))
+        self.update()
+        self.positionChanged.emit(self.position)
+
+    def thumbnail_at(self, seconds):
+        """Devuelve la miniatura correspondiente a un instante (o None si no hay tira)."""
+        if self.pixmap is None or not self.count or self.duration <= 0:
+            return None
+        tile_width = self.pixmap.width() // self.count
+        index = min(self.count - 1, max(0, int(seconds / self.duration * self.count)))
+        return self.pixmap.copy(index * tile_width, 0, tile_width, self.pixmap.height())
+
+    def seconds_at(self, x):
+        if self.width() <= 0:
+            return 0.0
+        return min(self.duration, max(0.0, x / self.width() * self.duration))
+
+    def x_at(self, seconds):
+        if self.duration <= 0:
+            return 0
+        return int(seconds / self.duration * self.width())
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = self.rect()
+        painter.fillRect(rect, QColor(30, 30, 30))
+
+        if self.pixmap is None:
+            painter.setPen(QColor(200, 200, 200))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, self.message)
+            return
+
+        painter.drawPixmap(rect, self.pixmap)
+
+        if self.range_start is not None:
+            end = self.range_end if self.range_end is not None else self.duration
+            x1, x2 = self.x_at(self.range_start), self.x_at(end)
+            painter.fillRect(QRect(0, 0, x1, rect.height()), QColor(0, 0, 0, 150))
+            painter.fillRect(QRect(x2, 0, rect.width() - x2, rect.height()), QColor(0, 0, 0, 150))
+
+        painter.setPen(QPen(QColor(255, 210, 0), 1))
+        for marker in self.markers:
+            x = self.x_at(marker)
+            painter.drawLine(x, 0, x, rect.height() // 3)
+
+        painter.setPen(QPen(QColor(255, 60, 60), 2))
+        x = self.x_at(self.position)
+        painter.drawLine(x, 0, x, rect.height())
+
+    def mousePressEvent(self, event):
+        self.scrub(event.position().x())
+
+    def mouseMoveEvent(self, event):
+        seconds = self.seconds_at(event.position().x())
+        self.setToolTip(f"{int(seconds // 60)}:{seconds % 60:06.3f}")
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self.scrub(event.position().x())
+
+    def scrub(self, x):
+        if self.pixmap is None:
+            return
+        self.position = self.seconds_at(x)
+        self.update()
+        self.positionChanged.emit(self.position)
+
+
+class WaveformView(QWidget):
+    """
+    Forma de onda dibujada desde la caché de picos (ver logic/waveform.py).
+    La rueda del ratón hace zoom alrededor del cursor y con Mayús desplaza la
+    vista; al hacer clic o arrastrar emite 'positionChanged' en segundos.
+    Ni el zoom ni el desplazamiento vuelven a decodificar el audio.
+    """
+    positionChanged = pyqtSignal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.peaks = None
+        self.view_start = 0.0
+        self.view_end = 0.0
+        self.position = 0.0
+        self.message = "Sin audio"
+        self.setMinimumHeight(70)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+
+    def set_message(self, message):
+        self.peaks = None
+        self.message = message
+        self.update()
+
+    def set_peaks(self, peaks):
+        """Muestra unos picos de forma de onda completos (sin zoom)."""
+        self.peaks = peaks
+        self.view_start = 0.0
+        self.view_end = peaks.duration
+        self.position = 0.0
+        self.update()
+
+    def set_position(self, seconds):
+        """Mueve el cursor (sin emitir señal); desplaza la vista si queda fuera."""
+        self.position = seconds
+        span = self.view_end - self.view_start
+        if self.peaks is not None and not self.view_start <= seconds <= self.view_end:
+            self.set_view(seconds - span / 2, span)
+        self.update()
+
+    def set_view(self, start, span):
+        duration = self.peaks.duration if self.peaks is not None else 0.0
+        span = min(max(span, 0.05), duration) if duration else span
+        start = min(max(0.0, start), max(0.0, duration - span))
+        self.view_start, self.view_end = start, start + span
+        self.update()
+
+    def seconds_at(self, x):
+        if self.width() <= 0:
+            return self.view_start
+        return self.view_start + x / self.width() * (self.view_end - self.view_start)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = self.rect()
+        painter.fillRect(rect, QColor(25, 25, 35))
+
+        if self.peaks is None:
+            painter.setPen(QColor(200, 200, 200))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, self.message)
+            return
+
+        mid = rect.height() / 2
+        columns = self.peaks.peaks_for_range(self.view_start, self.view_end, rect.width()).tolist()
+        painter.setPen(QColor(90, 200, 255))
+        for x, (low, high) in enumerate(columns):
+            painter.drawLine(x, int(mid - high * mid), x, int(mid - low * mid))
+
+        if self.view_start <= self.position <= self.view_end:
+            painter.setPen(QPen(QColor(255, 60, 60), 2))
+            x = int((self.position - self.view_start) / (self.view_end - self.view_start) * rect.width())
+            painter.drawLine(x, 0, x, rect.height())
+
+    def wheelEvent(self, event):
+        if self.peaks is None:
+            return
+        span = self.view_end - self.view_start
+        steps = event.angleDelta().y() / 120
+        if event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+            self.set_view(self.view_start - steps * span * 0.1, span)
+            return
+        anchor = self.seconds_at(event.position().x())
+        new_span = span * (0.8 ** steps)
+        ratio = (anchor - self.view_start) / span if span else 0.0
+        self.set_view(anchor - ratio * new_span, new_span)
+
+    def mousePressEvent(self, event):
+        self.scrub(event.position().x())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self.scrub(event.position().x())
+
+    def scrub(self, x):
+        if self.peaks is None:
+            return
+        self.position = self.seconds_at(x)
+        self.update()
+        self.positionChanged.emit(self.position)
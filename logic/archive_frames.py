@@ -0,0 +1,388 @@
+# logic/archive_frames.py
+"""
+Secuencias de imágenes dentro de un archivo ZIP o TAR.
+
+Los miembros se indexan con la misma detección de prefijo y relleno que una
+carpeta (detect_image_prefix) y se envían en orden de frame a FFmpeg por una
+tubería (-f image2pipe), sin extraer nada a disco. Un hilo lector descomprime
+las imágenes por delante de FFmpeg en una cola acotada (READ_AHEAD imágenes),
+así que la memoria usada depende del tamaño de una imagen y no del archivo.
+
+ZIP tiene índice central y cada miembro se abre por separado; un .tar sin
+comprimir se recorre saltando los datos. En TAR comprimido (.tar.gz,
+.tar.xz...) no hay acceso aleatorio: listar los miembros ya obliga a
+descomprimirlo entero, así que el índice se construye en la misma pasada en
+modo flujo que envía las imágenes. Al planificar solo se lee hasta la primera
+imagen (para conocer el patrón de nombres). Los miembros desordenados se
+reordenan con un margen de READ_AHEAD imágenes; si el desorden es mayor, la
+conversión se detiene con un mensaje claro. El índice de una pasada completa
+se guarda en la caché por identidad del archivo; solo si hace falta el número
+de imágenes (fundido de salida) y no está en la caché se hace una pasada
+previa que lee las cabeceras.
+"""
+
+import heapq
+import json
+import os
+import queue
+import re
+import tarfile
+import tempfile
+import threading
+import zipfile
+
+from logic.ffmpeg_logic import (
+    get_unique_filename, get_output_extension, build_video_codec_args,
+    detect_image_prefix_in_names, select_sequence_images
+)
+from logic.image_render import parse_fps, image_pipe_command, piped_audio_stages, pipe_fade_filter
+from logic.keyframe_plan import keyframe_codec_args, write_keyframe_sidecar
+from logic.media_cache import file_identity, cache_path
+
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+READ_AHEAD = 8        # Imágenes descomprimidas como máximo por delante de FFmpeg
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+QUEUE_TIMEOUT = 0.5   # Segundos entre comprobaciones de cancelación del hilo lector
+
+
+def is_image_archive(path):
+    """True si 'path' es un archivo ZIP/TAR admitido como origen de imágenes."""
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_compressed_tar(archive_path):
+    """True si es un TAR comprimido: sin índice ni acceso aleatorio a sus miembros."""
+    return not zipfile.is_zipfile(archive_path) and not archive_path.lower().endswith(".tar")
+
+
+def _archive_members(archive_path):
+    """Lista de (nombre_miembro, nombre_base) de los archivos regulares, en el orden del archivo."""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            return [(info.filename, os.path.basename(info.filename))
+                    for info in zf.infolist() if not info.is_dir()]
+    with tarfile.open(archive_path, "r:*") as tf:
+        return [(member.name, os.path.basename(member.name)) for member in tf if member.isfile()]
+
+
+def _head_members(archive_path):
+    """Miembros de un TAR comprimido hasta la primera imagen con número; el resto no se descomprime."""
+    members = []
+    with tarfile.open(archive_path, "r|*") as tf:
+        for member in tf:
+            if not member.isfile():
+                continue
+            base = os.path.basename(member.name)
+            members.append((member.name, base))
+            if base.lower().endswith(IMAGE_EXTENSIONS) and detect_image_prefix_in_names([base])[2]:
+                break
+    return members
+
+
+def _index_cache_path(archive_path):
+    identity = file_identity(archive_path)
+    if identity is None:
+        return None
+    return cache_path("archive_index", identity, (), "json")
+
+
+def _load_index(archive_path):
+    """Miembros guardados por una pasada completa anterior sobre este archivo, o None."""
+    path = _index_cache_path(archive_path)
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [tuple(member) for member in json.load(f)]
+    except (OSError, ValueError):
+        return None
+
+
+def _save_index(archive_path, members):
+    path = _index_cache_path(archive_path)
+    if path is None:
+        return
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(members, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print("No se pudo guardar el índice del archivo:", e)
+
+
+def _number_re(prefix, ext):
+    return re.compile(re.escape(prefix) + r"(\d+)" + re.escape(ext) + "$")
+
+
+def _reorder(items, read_ahead):
+    """
+    Entrega los pares (número, dato) de 'items' ordenados por número con como
+    mucho 'read_ahead' pendientes; ValueError si alguno llega fuera de ese margen.
+    """
+    pending = []
+    last = None
+    for number, data in items:
+        if last is not None and number < last:
+            raise ValueError(
+                f"El TAR comprimido no guarda las imágenes en orden de frame (la {number} aparece "
+                f"después de la {last}, fuera del margen de {read_ahead}); descomprímelo a .tar o "
+                "conviértelo a ZIP."
+            )
+        heapq.heappush(pending, (number, data))
+        if len(pending) > read_ahead:
+            last, data = heapq.heappop(pending)
+            yield last, data
+    while pending:
+        yield heapq.heappop(pending)
+
+
+def _sequence_pattern(names):
+    """(prefix, width, ext) de la secuencia entre 'names', o None."""
+    prefix, width, found, _ = detect_image_prefix_in_names(names)
+    if not found:
+        return None
+    images = select_sequence_images(names, prefix)
+    if not images:
+        return None
+    return prefix, width, os.path.splitext(images[0])[1]
+
+
+def _indexed_sequence(members, compressed, read_ahead):
+    """Secuencia a partir de la lista completa de miembros (ver archive_sequence_info)."""
+    # Solo las imágenes de la carpeta interna que contiene la secuencia
+    pattern = _sequence_pattern([base for _, base in members if base])
+    if pattern is None:
+        return None
+    prefix, width, ext = pattern
+    number_re = _number_re(prefix, ext)
+
+    by_number = {}
+    archive_order = []
+    for member, base in members:
+        match = number_re.match(base)
+        if match and int(match.group(1)) not in by_number:
+            by_number[int(match.group(1))] = member
+            archive_order.append(int(match.group(1)))
+    ordered = [by_number[number] for number in sorted(by_number)]
+    in_order = archive_order == sorted(archive_order)
+    if compressed and not in_order:
+        # Se comprueba ya al planificar si el margen de reordenación basta
+        for _ in _reorder(((number, None) for number in archive_order), read_ahead):
+            pass
+    return {
+        "prefix": prefix,
+        "width": width,
+        "start_number": min(by_number),
+        "ext": ext,
+        "images": [os.path.basename(member) for member in ordered],
+        "members": ordered,
+        "in_order": in_order,
+        "streamed": compressed,
+    }
+
+
+def archive_sequence_info(archive_path, need_count=False, read_ahead=READ_AHEAD):
+    """
+    Detecta la secuencia de imágenes del archivo; mismo dict que
+    get_image_sequence_info (prefix, width, start_number, ext, images) con
+    'members' (rutas dentro del archivo en orden de frame), 'in_order' (True
+    si el archivo ya las guarda en ese orden) y 'streamed' (TAR comprimido,
+    que se lee en una sola pasada). En un TAR comprimido sin índice en la
+    caché, 'images' y 'members' son None salvo que 'need_count' pida indexarlo.
+    None si no hay secuencia; ValueError si el TAR comprimido está demasiado
+    desordenado para reordenarlo con 'read_ahead' imágenes.
+    """
+    compressed = _is_compressed_tar(archive_path)
+    try:
+        members = _load_index(archive_path) if compressed else _archive_members(archive_path)
+        if members is None and need_count:
+            members = _archive_members(archive_path)
+            _save_index(archive_path, members)
+        if members is None:
+            # Los miembros completos se conocen al enviar las imágenes
+            members = _head_members(archive_path)
+            first = members[-1][1] if members else ""
+            pattern = _sequence_pattern([first]) if first.lower().endswith(IMAGE_EXTENSIONS) else None
+            match = _number_re(pattern[0], pattern[2]).match(first) if pattern else None
+            if not match:
+                return None
+            prefix, width, ext = pattern
+            return {"prefix": prefix, "width": width, "start_number": int(match.group(1)), "ext": ext,
+                    "images": None, "members": None, "in_order": None, "streamed": True}
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        print("Error leyendo el archivo:", e)
+        return None
+    return _indexed_sequence(members, compressed, max(1, read_ahead))
+
+
+def _stream_tar(archive_path, sequence, read_ahead):
+    """
+    Una sola pasada en modo flujo por un TAR comprimido: entrega el contenido de
+    cada imagen de la secuencia en orden de frame y, si llega al final, guarda
+    en la caché el índice de miembros que ha ido viendo.
+    """
+    number_re = _number_re(sequence["prefix"], sequence["ext"])
+    members = []
+    seen = set()
+
+    def images(tf):
+        for member in tf:
+            if not member.isfile():
+                continue
+            base = os.path.basename(member.name)
+            members.append((member.name, base))
+            match = number_re.match(base)
+            if match and int(match.group(1)) not in seen:
+                seen.add(int(match.group(1)))
+                yield int(match.group(1)), tf.extractfile(member).read()
+
+    with tarfile.open(archive_path, "r|*") as tf:
+        for _, data in _reorder(images(tf), max(1, read_ahead)):
+            yield data
+    _save_index(archive_path, members)
+
+
+def _read_members(archive_path, sequence, read_ahead):
+    """Generador con el contenido de cada imagen de la secuencia, en orden de frame."""
+    if sequence["streamed"]:
+        yield from _stream_tar(archive_path, sequence, read_ahead)
+        return
+
+    members = sequence["members"]
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for member in members:
+                yield zf.read(member)
+        return
+
+    if sequence["in_order"]:
+        # Una sola pasada en modo flujo
+        wanted = set(members)
+        with tarfile.open(archive_path, "r|*") as tf:
+            for member in tf:
+                if member.name in wanted:
+                    yield tf.extractfile(member).read()
+        return
+
+    # TAR sin comprimir: extractfile salta a la posición de cada miembro
+    with tarfile.open(archive_path, "r:") as tf:
+        for member in members:
+            yield tf.extractfile(member).read()
+
+
+def archive_frames(archive_path, sequence, read_ahead=READ_AHEAD, stop_event=None, on_frame=None):
+    """
+    Generador con el contenido de cada imagen de la secuencia en orden de frame.
+    Un hilo lee y descomprime como mucho 'read_ahead' imágenes por delante del
+    consumidor; al cerrar el generador (o activar 'stop_event') el hilo termina.
+    'on_frame(n)' se llama tras entregar cada imagen.
+    """
+    buffer = queue.Queue(maxsize=max(1, read_ahead))
+    done = object()
+    stop = stop_event or threading.Event()
+    result = {"error": None}
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            for data in _read_members(archive_path, sequence, read_ahead):
+                if not put(data):
+                    return
+        except Exception as e:
+            result["error"] = e
+        put(done)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    count = 0
+    try:
+        while True:
+            try:
+                item = buffer.get(timeout=QUEUE_TIMEOUT)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if item is done:
+                break
+            yield item
+            count += 1
+            if on_frame:
+                on_frame(count)
+        if result["error"] is not None:
+            raise RuntimeError(f"Error leyendo el archivo: {result['error']}")
+    finally:
+        stop.set()
+        thread.join()
+
+
+def archive_images_job(archive_path, fps, audio_path=None, user_format="mp4 (H.264 8-bit)", crf="19",
+                       fade_in_duration=1, fade_out_duration=1, pix_fmt=None, prioritize_audio=False,
+                       audio_filter=None, read_ahead=READ_AHEAD, keyframes=None):
+    """
+    Planifica la conversión de la secuencia de un archivo ZIP/TAR para
+    FFmpegPipelineWorker: la imagen se codifica desde la tubería y, con audio,
+    se multiplexa después con -c:v copy como en logic/image_render.py.
+    'keyframes' es un plan de fotogramas clave (logic/keyframe_plan.py).
+    En un TAR comprimido el número de imágenes solo se averigua antes de
+    codificar si lo necesitan el fundido de salida o la cola con el plan de
+    fotogramas clave; si no, se cuenta durante la única pasada.
+    Retorna un dict con stages, output_file, cleanup_files y stop_event; o None
+    si el archivo no contiene una secuencia válida.
+    """
+    need_count = fade_out_duration > 0 or bool(keyframes and audio_path and prioritize_audio)
+    sequence = archive_sequence_info(archive_path, need_count, read_ahead)
+    if not sequence:
+        return None
+
+    fps_val = parse_fps(fps)
+    num_images = len(sequence["members"]) if sequence["members"] is not None else None
+    extension = get_output_extension(user_format)
+    output_file = get_unique_filename(os.path.join(
+        os.path.dirname(archive_path), f"{sequence['prefix']}video.{extension}"))
+    codec_args = build_video_codec_args(user_format, crf, pix_fmt)
+    fade_filter = pipe_fade_filter(num_images, fps_val, fade_in_duration, fade_out_duration)
+
+    stop_event = threading.Event()
+    sent = {"frames": 0}
+    cleanup_files = []
+    if audio_path:
+        temp_dir = tempfile.mkdtemp(prefix="archive_")
+        cleanup_files.append(temp_dir)
+        video_path = os.path.join(temp_dir, f"video.{extension}")
+    else:
+        video_path = output_file
+
+    # La cola negra de "Priorizar audio" empieza donde acaba la secuencia en la línea de tiempo
+    video_args = codec_args + keyframe_codec_args(codec_args, keyframes)
+    tail_args = codec_args + keyframe_codec_args(codec_args, keyframes, (num_images or 0) / fps_val)
+
+    def on_frame(count):
+        sent["frames"] = count
+
+    stages = [[{
+        "command": image_pipe_command(sequence["ext"], fps, video_args, fade_filter, video_path),
+        "stdin": lambda: archive_frames(archive_path, sequence, read_ahead, stop_event, on_frame),
+        "total_frames": num_images or 0,
+        "weight": num_images or 100,
+    }]]
+    if audio_path:
+        stages.extend(piped_audio_stages(
+            video_path, temp_dir, audio_path, output_file, extension, fps, tail_args,
+            prioritize_audio, audio_filter, frame_count=lambda: sent["frames"],
+            total_frames=num_images or 0,
+        ))
+    if keyframes:
+        stages.append([{"callable": lambda: write_keyframe_sidecar(output_file, keyframes), "weight": 0}])
+    return {"stages": stages, "output_file": output_file, "cleanup_files": cleanup_files,
+            "stop_event": stop_event}
@@ -0,0 +1,111 @@
+# logic/audio_batch.py
+"""
+Aplicar una misma pista de audio a una carpeta de vídeos.
+
+Si el audio ya es compatible con el contenedor de salida (p. ej. AAC en MP4)
+se copia tal cual en cada vídeo. Si no (WAV, FLAC...), se codifica una sola
+vez a AAC en un intermedio de la caché de disco (por identidad del archivo) y
+todos los vídeos del lote lo multiplexan con copia de streams, en lugar de
+recodificar el mismo audio una vez por vídeo.
+"""
+
+import os
+
+from logic.ffmpeg_logic import (
+    is_video_file, can_copy_audio, get_audio_streams, add_audio_to_video_command,
+    replace_audio_command, remove_audio_command, AUDIO_ENCODE_ARGS
+)
+from logic.media_cache import file_identity, cache_path
+
+
+# Sufijos de las salidas de esta pestaña: no se vuelven a procesar en la misma carpeta
+OUTPUT_SUFFIXES = ("_CON_AUDIO", "_REPLACE_AUDIO", "_SIN_AUDIO")
+
+
+def list_folder_videos(folder_path):
+    """Vídeos de la carpeta (sin subcarpetas), ordenados y sin las salidas de lotes anteriores."""
+    videos = []
+    for name in sorted(os.listdir(folder_path)):
+        full_path = os.path.join(folder_path, name)
+        stem = os.path.splitext(name)[0]
+        if is_video_file(full_path) and not any(suffix in stem for suffix in OUTPUT_SUFFIXES):
+            videos.append(full_path)
+    return videos
+
+
+def shared_audio_track(audio_path, output_format="mp4", audio_filter=None):
+    """
+    Pista de audio a multiplexar en todos los vídeos del lote.
+    Retorna (ruta_pista, comando): 'comando' es None si el audio se puede copiar
+    directamente o si el intermedio ya está en la caché; si no, es el comando que
+    lo codifica en 'ruta_pista' + ".tmp.m4a" (hay que renombrarlo al terminar).
+    Con 'audio_filter' (normalización) la pista siempre se codifica, una vez.
+    """
+    streams = get_audio_streams(audio_path)
+    if not audio_filter and streams and can_copy_audio(streams[0]["codec_name"], output_format):
+        return audio_path, None
+
+    identity = file_identity(audio_path)
+    if identity is None:
+        return None, None
+    params = (*AUDIO_ENCODE_ARGS, audio_filter or "")
+    track_path = cache_path("audio_tracks", identity, params, "m4a")
+    if os.path.exists(track_path):
+        return track_path, None
+
+    command = [
+        "ffmpeg", "-y",
+        "-i", audio_path,
+        "-map", "0:a:0", "-vn",
+    ]
+    if audio_filter:
+        command.extend(["-af", audio_filter])
+    command.extend([
+        *AUDIO_ENCODE_ARGS,
+        track_path + ".tmp.m4a",
+    ])
+    return track_path, command
+
+
+def batch_audio_job(folder_path, operation, audio_path=None, output_format="mp4", audio_filter=None):
+    """
+    Planifica la operación ("add", "replace" o "remove") sobre todos los vídeos
+    de la carpeta; 'audio_filter' se aplica una sola vez a la pista compartida.
+    Retorna (trabajo, mensaje_error); el trabajo es un dict con 'stages' para
+    FFmpegPipelineWorker y 'output_files'.
+    """
+    videos = list_folder_videos(folder_path)
+    if not videos:
+        return None, "La carpeta no contiene vídeos."
+
+    stages = []
+    track_path = None
+    if operation in ("add", "replace"):
+        if not audio_path:
+            return None, "Selecciona un archivo de audio."
+        track_path, encode_command = shared_audio_track(audio_path, output_format, audio_filter)
+        if track_path is None:
+            return None, "No se pudo leer el archivo de audio."
+        if encode_command:
+            tmp_path = encode_command[-1]
+            stages.append([{
+                "command": encode_command,
+                "weight": len(videos),
+                "on_success": lambda: os.replace(tmp_path, track_path),
+            }])
+
+    mux_steps, output_files = [], []
+    for video_path in videos:
+        if operation == "add":
+            command, output_file = add_audio_to_video_command(
+                video_path, track_path, output_format, audio_args=["-c:a", "copy"])
+        elif operation == "replace":
+            command, output_file = replace_audio_command(
+                video_path, track_path, output_format, audio_args=["-c:a", "copy"])
+        else:
+            command, output_file = remove_audio_command(video_path, output_format)
+        mux_steps.append({"command": command})
+        output_files.append(output_file)
+    stages.append(mux_steps)
+
+    return {"stages": stages, "output_files": output_files}, ""
@@ -0,0 +1,218 @@
+# logic/batch_cut.py
+"""
+Corte por lotes: extrae varios clips de un mismo vídeo con un único proceso FFmpeg.
+
+En lugar de lanzar un corte (y una decodificación completa) por clip, se
+hace input-seek al fotograma clave anterior al primer clip, se decodifica una
+sola vez el tramo cubierto y se reparte con split/trim a una salida por clip.
+Así el tiempo total se acerca al de decodificar una vez ese tramo.
+
+Si no hay fundidos y se permite, cada clip se copia sin recodificar con
+-ss/-t por salida; en ese caso el inicio de cada clip se ajusta al fotograma
+clave anterior (es la única forma de copiar sin recodificar).
+
+Formato de la lista de rangos (una línea por clip; separador coma, punto y coma o tabulador):
+    inicio, fin[, fade_in[, fade_out[, nombre]]]
+Los tiempos aceptan segundos o hh:mm:ss. Las líneas vacías o que empiezan
+por '#' se ignoran, igual que una cabecera no numérica en la primera línea.
+"""
+
+import math
+import os
+import re
+
+from logic.ffmpeg_logic import (
+    get_unique_filename, parse_time_to_seconds, sanitize_filename_part, get_audio_streams,
+    get_video_fps, MEZZANINE_PROFILES, DEFAULT_MEZZANINE, mp4_layout_args, can_copy_audio,
+    AUDIO_ENCODE_ARGS, keyframe_seek_time
+)
+
+
+def parse_cut_ranges(text):
+    """
+    Interpreta una lista de rangos (texto escrito, pegado o leído de un CSV).
+    Retorna (rangos, mensaje_error); cada rango es un dict con
+    start, end, fade_in, fade_out y name (segundos como float).
+    """
+    ranges = []
+    for line_number, raw_line in enumerate(str(text).splitlines(), start=1):
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        fields = [field.strip() for field in re.split(r"[,;\t]", line)]
+        try:
+            start = parse_time_to_seconds(fields[0])
+            end = parse_time_to_seconds(fields[1])
+            fade_in = float(fields[2]) if len(fields) > 2 and fields[2] else 0.0
+            fade_out = float(fields[3]) if len(fields) > 3 and fields[3] else 0.0
+        except (ValueError, IndexError):
+            if not ranges and line_number == 1:
+                continue  # Cabecera del CSV
+            return [], f"Línea {line_number}: formato inválido ('inicio, fin[, fade_in, fade_out, nombre]')."
+
+        if end <= start:
+            return [], f"Línea {line_number}: el final debe ser posterior al inicio."
+        if fade_in < 0 or fade_out < 0:
+            return [], f"Línea {line_number}: los fundidos no pueden ser negativos."
+
+        name = fields[4] if len(fields) > 4 else ""
+        ranges.append({"start": start, "end": end, "fade_in": fade_in, "fade_out": fade_out, "name": name})
+
+    if not ranges:
+        return [], "La lista de rangos está vacía."
+    return ranges, ""
+
+
+def load_cut_ranges_file(file_path):
+    """Lee una lista de rangos desde un archivo CSV/TXT. Retorna (rangos, mensaje_error)."""
+    try:
+        with open(file_path, "r", encoding="utf-8-sig") as f:
+            return parse_cut_ranges(f.read())
+    except OSError as e:
+        return [], f"No se pudo leer el archivo: {e}"
+
+
+def clip_output_files(video_path, ranges, output_format="mp4"):
+    """Nombres de salida de cada clip: <base>_<nombre>.ext o <base>_clipNN.ext."""
+    base = os.path.splitext(video_path)[0]
+    output_files = []
+    for i, clip in enumerate(ranges, start=1):
+        suffix = sanitize_filename_part(clip["name"]) if clip["name"] else f"clip{i:02d}"
+        output_file = get_unique_filename(f"{base}_{suffix}.{output_format}")
+        # Evita colisiones entre clips del mismo lote que aún no existen en disco
+        counter = i
+        while output_file in output_files:
+            output_file = get_unique_filename(f"{base}_{suffix}_{counter:02d}.{output_format}")
+            counter += 1
+        output_files.append(output_file)
+    return output_files
+
+
+def clip_progress(ranges, span_start, span_end, overall):
+    """
+    Progreso (0-100) de cada clip a partir del progreso global del tramo decodificado:
+    el tramo se recorre en orden, así que un clip avanza mientras la posición
+    de lectura está dentro de su rango.
+    """
+    position = span_start + (span_end - span_start) * overall / 100.0
+    progress = []
+    for clip in ranges:
+        length = clip["end"] - clip["start"]
+        value = (position - clip["start"]) / length * 100 if length > 0 else 100
+        progress.append(int(min(100, max(0, value))))
+    return progress
+
+
+def multi_cut_command(video_path, ranges, output_format="mp4", stream_copy=False, frame_index=None,
+                      mezzanine_profile=None, mp4_layout=None):
+    """
+    Construye un único comando FFmpeg que extrae todos los clips de 'ranges'.
+    Al recodificar se usa el perfil 'mezzanine_profile' (ver MEZZANINE_PROFILES).
+    'mp4_layout' elige faststart o MP4 fragmentado para cada clip (ver MP4_LAYOUTS).
+    La copia de streams necesita 'frame_index' para empezar cada clip en un
+    fotograma clave; sin él, el lote se recodifica. Al recodificar, el audio se
+    copia si el contenedor admite su códec y si no se codifica a AAC.
+
+    Retorna un dict con:
+        command: lista de argumentos.
+        output_files: ruta de salida de cada clip (mismo orden que 'ranges').
+        span_start / span_end: tramo del vídeo que se decodifica (segundos).
+        total_frames: frames del tramo (para el progreso global).
+    """
+    if stream_copy and frame_index is None:
+        # Sin índice no se conoce el fotograma clave anterior: la copia empezaría en un frame no clave
+        print("[DEBUG] Sin índice de fotogramas: el lote se recodifica en vez de copiarse.")
+        stream_copy = False
+    profile = MEZZANINE_PROFILES.get(mezzanine_profile or DEFAULT_MEZZANINE, MEZZANINE_PROFILES[DEFAULT_MEZZANINE])
+    if not stream_copy and profile["format"] != "mp4":
+        output_format = profile["format"]
+    output_files = clip_output_files(video_path, ranges, output_format)
+    span_end = max(clip["end"] for clip in ranges)
+    first_start = min(clip["start"] for clip in ranges)
+    span_start = frame_index.keyframe_before(first_start) if frame_index is not None else first_start
+
+    fps = get_video_fps(video_path) or 30.0
+    total_frames = int((span_end - span_start) * fps)
+
+    # Con copia se busca como en un corte suelto: sin caer antes del fotograma clave por redondeo
+    seek_start = keyframe_seek_time(span_start) if stream_copy else round(span_start, 6)
+    command = ["ffmpeg", "-y"]
+    if span_start > 0:
+        command.extend(["-ss", str(seek_start)])
+    command.extend(["-i", video_path])
+
+    if stream_copy:
+        # Una salida por clip con copia de streams; el inicio se alinea al fotograma clave anterior
+        for clip, output_file in zip(ranges, output_files):
+            start = frame_index.keyframe_before(clip["start"])
+            # El -ss de salida descarta los paquetes anteriores: hacia abajo, para conservar el clave
+            offset = max(0.0, math.floor((start - seek_start) * 1e6 + 1e-3) / 1e6)
+            if offset > 0:
+                command.extend(["-ss", str(offset)])
+            command.extend([
+                "-t", str(round(clip["end"] - start, 6)),
+                "-map", "0", "-c", "copy",
+                "-map_metadata", "0",
+                "-avoid_negative_ts", "make_zero",
+                *mp4_layout_args(output_format, mp4_layout),
+                output_file,
+            ])
+        print(" ".join(command))
+        return {"command": command, "output_files": output_files,
+                "span_start": span_start, "span_end": span_end, "total_frames": total_frames}
+
+    audio_streams = get_audio_streams(video_path)
+    has_audio = bool(audio_streams)
+    # El audio copiado se lee de una entrada aparte por clip, con su propio seek
+    copy_audio = has_audio and can_copy_audio(audio_streams[0]["codec_name"], output_format)
+    count = len(ranges)
+    if copy_audio:
+        for clip in ranges:
+            command.extend([
+                "-ss", str(round(clip["start"], 6)),
+                "-t", str(round(clip["end"] - clip["start"], 6)),
+                "-i", video_path,
+            ])
+
+    # La primera salida (nula) recorre el tramo completo: su contador de frames
+    # es la posición de lectura y sirve para el progreso global y por clip
+    video_labels = "".join(f"[v{i}]" for i in range(count))
+    filters = [f"[0:v]split={count + 1}[vprog]{video_labels}"]
+    filters.append(f"[vprog]trim=end={round(span_end - span_start, 6)}[progress]")
+    if has_audio and not copy_audio:
+        audio_labels = "".join(f"[a{i}]" for i in range(count))
+        filters.append(f"[0:a]asplit={count}{audio_labels}")
+
+    for i, clip in enumerate(ranges):
+        start = round(clip["start"] - span_start, 6)
+        end = round(clip["end"] - span_start, 6)
+        duration = clip["end"] - clip["start"]
+
+        chain = [f"trim=start={start}:end={end}", "setpts=PTS-STARTPTS"]
+        if clip["fade_in"] > 0:
+            chain.append(f"fade=t=in:st=0:d={clip['fade_in']}")
+        if clip["fade_out"] > 0 and duration > clip["fade_out"]:
+            chain.append(f"fade=t=out:st={round(duration - clip['fade_out'], 6)}:d={clip['fade_out']}")
+        filters.append(f"[v{i}]{','.join(chain)}[vout{i}]")
+
+        if has_audio and not copy_audio:
+            filters.append(f"[a{i}]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[aout{i}]")
+
+    command.extend(["-filter_complex", ";".join(filters)])
+    command.extend(["-map", "[progress]", "-f", "null", "-"])
+
+    for i, output_file in enumerate(output_files):
+        command.extend(["-map", f"[vout{i}]"])
+        if copy_audio:
+            command.extend(["-map", f"{i + 1}:a:0", "-c:a", "copy"])
+        elif has_audio:
+            command.extend(["-map", f"[aout{i}]", *AUDIO_ENCODE_ARGS])
+        command.extend(profile["codec_args"])
+        command.extend(["-map_metadata", "0"])
+        command.extend(mp4_layout_args(output_format, mp4_layout))
+        command.append(output_file)
+
+    print(" ".join(command))
+    return {"command": command, "output_files": output_files,
+            "span_start": span_start, "span_end": span_end, "total_frames": total_frames}
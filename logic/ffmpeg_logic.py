@@ -9,16 +9,81 @@ Módulo que contiene funciones para construir comandos FFmpeg para diversas oper
 - Emparejar automáticamente videos por resolución entre dos carpetas.
 """
 
+import math
 import os
 import re
 import time
 import tempfile
 import subprocess
+import threading
+
+from logic.media_cache import file_identity
+from logic.metrics_exporter import REGISTRY
+from logic.keyframe_plan import (
+    keyframe_plan, boundary_times, keyframe_codec_args, load_keyframe_sidecar, planned_keyframe_time
+)
 
 
 VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov"}
+
+# Códecs de audio que cada contenedor admite con copia de streams (None = cualquiera)
+AUDIO_COPY_CODECS = {
+    "mp4": {"aac", "mp3", "alac", "ac3", "eac3"},
+    "mov": {"aac", "mp3", "alac", "ac3", "eac3", "pcm_s16le", "pcm_s24le"},
+    "mkv": None,
+    "avi": {"mp3", "ac3", "pcm_s16le"},
+}
+AUDIO_ENCODE_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+
+# Perfiles de intermedio (mezzanine) para los cortes recodificados: códec y contenedor.
+# Los sin pérdida se comparan con el benchmark de logic/mezzanine.py.
+MEZZANINE_PROFILES = {
+    "x264 sin pérdida ultrafast": {
+        "codec_args": ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "0", "-pix_fmt", "yuv420p"],
+        "format": "mp4", "lossless": True,
+    },
+    "x264 sin pérdida fast": {
+        "codec_args": ["-c:v", "libx264", "-preset", "fast", "-crf", "0", "-pix_fmt", "yuv420p"],
+        "format": "mp4", "lossless": True,
+    },
+    "x264 sin pérdida veryslow": {
+        "codec_args": ["-c:v", "libx264", "-preset", "veryslow", "-crf", "0", "-pix_fmt", "yuv420p"],
+        "format": "mp4", "lossless": True,
+    },
+    "FFV1 (mkv, 16 slices)": {
+        "codec_args": ["-c:v", "ffv1", "-level", "3", "-slices", "16", "-slicecrc", "1", "-g", "1",
+                       "-pix_fmt", "yuv420p"],
+        "format": "mkv", "lossless": True,
+    },
+    "x264 CRF 12 (visualmente sin pérdida)": {
+        "codec_args": ["-c:v", "libx264", "-preset", "fast", "-crf", "12", "-pix_fmt", "yuv420p"],
+        "format": "mp4", "lossless": False,
+    },
+}
+DEFAULT_MEZZANINE = "x264 sin pérdida veryslow"  # El de siempre, si no se elige otro
+
+# Disposición de las salidas MP4/MOV. Con +faststart FFmpeg escribe el moov al
+# final y luego reescribe el archivo entero para moverlo al principio (una
+# segunda escritura completa). El MP4 fragmentado escribe un moov vacío al
+# principio y fragmentos autocontenidos en cada fotograma clave, así que se
+# puede reproducir en streaming sin esa segunda pasada.
+MP4_LAYOUTS = {
+    "faststart (moov al principio)": ["-movflags", "+faststart"],
+    "Fragmentado (sin reescritura)": ["-movflags", "+frag_keyframe+empty_moov+default_base_moof"],
+}
+DEFAULT_MP4_LAYOUT = "faststart (moov al principio)"
 SIN_LOGO_MARKERS = ("sin logo", "sin_logo", "sin-logo")
 
+_probe_cache = {}
+_probe_cache_lock = threading.Lock()
+
+
+def mp4_layout_args(output_format, layout=None):
+    """Argumentos de -movflags de la disposición 'layout' (solo para mp4/mov)."""
+    if output_format not in ("mp4", "mov"):
+        return []
+    return list(MP4_LAYOUTS.get(layout or DEFAULT_MP4_LAYOUT, MP4_LAYOUTS[DEFAULT_MP4_LAYOUT]))
+
 
 def get_unique_filename(file_path):
     """
@@ -41,7 +106,16 @@ def get_unique_filename(file_path):
 
 
 def detect_image_prefix(folder_path):
-    files = sorted([f for f in os.listdir(folder_path) if f.lower() != "thumbs.db"])
+    return detect_image_prefix_in_names(os.listdir(folder_path))
+
+
+def detect_image_prefix_in_names(names):
+    """
+    Detecta prefijo, ancho y primer número de una secuencia a partir de una lista
+    de nombres (de una carpeta o de los miembros de un archivo ZIP/TAR).
+    Retorna (prefix, width, found, start_number).
+    """
+    files = sorted([f for f in names if f.lower() != "thumbs.db"])
 
     if not files:
         print("[DEBUG] No se encontraron archivos en la carpeta.")
@@ -70,18 +144,43 @@ def detect_image_prefix(folder_path):
     return None, 0, False, None
 
 
+def run_ffprobe(args, media_path):
+    """
+    Ejecuta ffprobe con los argumentos dados sobre 'media_path' y devuelve su salida.
+    Los resultados se cachean por identidad del archivo (ruta, tamaño y mtime),
+    así que consultar varias veces el mismo archivo sin cambios no relanza ffprobe.
+    Propaga las excepciones de subprocess para que el llamador decida cómo tratarlas.
+    """
+    identity = file_identity(media_path)
+    key = (identity, tuple(args)) if identity else None
+
+    if key is not None:
+        with _probe_cache_lock:
+            cached = _probe_cache.get(key)
+        if cached is not None:
+            REGISTRY.ffprobe_call(cache_hit=True)
+            return cached
+
+    REGISTRY.ffprobe_call(cache_hit=False)
+    output = subprocess.check_output(["ffprobe", *args, media_path], universal_newlines=True)
+
+    if key is not None:
+        with _probe_cache_lock:
+            _probe_cache[key] = output
+    return output
+
+
 def get_audio_duration(audio_path):
     """
     Devuelve la duración en segundos del audio usando ffprobe.
     """
-    cmd = [
-        "ffprobe", "-v", "error", "-select_streams", "a:0",
+    args = [
+        "-v", "error", "-select_streams", "a:0",
         "-show_entries", "stream=duration",
         "-of", "default=noprint_wrappers=1:nokey=1",
-        audio_path
     ]
     try:
-        output = subprocess.check_output(cmd, universal_newlines=True)
+        output = run_ffprobe(args, audio_path)
         return float(output.strip())
     except Exception as e:
         print("Error obteniendo duración del audio:", e)
@@ -92,35 +191,52 @@ def get_video_duration(video_path):
     """
     Devuelve la duración en segundos del vídeo usando ffprobe.
     """
-    cmd = [
-        "ffprobe", "-v", "error",
+    args = [
+        "-v", "error",
         "-show_entries", "format=duration",
         "-of", "default=noprint_wrappers=1:nokey=1",
-        video_path
     ]
     try:
-        output = subprocess.check_output(cmd, universal_newlines=True)
+        output = run_ffprobe(args, video_path)
         return float(output.strip())
     except Exception as e:
         print("Error obteniendo duración del vídeo:", e)
         return 0.0
 
 
+def get_video_fps(video_path):
+    """
+    Devuelve los FPS del primer stream de vídeo usando ffprobe (r_frame_rate).
+    Si falla, devuelve 0.0.
+    """
+    args = [
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=r_frame_rate",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+    ]
+    try:
+        output = run_ffprobe(args, video_path).strip()
+        num, _, den = output.partition("/")
+        return float(num) / float(den or 1)
+    except Exception as e:
+        print("Error obteniendo FPS del vídeo:", e)
+        return 0.0
+
+
 def get_video_resolution(video_path):
     """
     Devuelve la resolución del vídeo como string 'ANCHOxALTO', por ejemplo '1080x1920'.
     Si falla, devuelve None.
     """
-    cmd = [
-        "ffprobe",
+    args = [
         "-v", "error",
         "-select_streams", "v:0",
         "-show_entries", "stream=width,height",
         "-of", "csv=s=x:p=0",
-        video_path
     ]
     try:
-        output = subprocess.check_output(cmd, universal_newlines=True).strip()
+        output = run_ffprobe(args, video_path).strip()
         if not output or "x" not in output:
             return None
         return output
@@ -129,6 +245,84 @@ def get_video_resolution(video_path):
         return None
 
 
+def get_video_stream_info(video_path):
+    """
+    Devuelve los parámetros del primer stream de vídeo como diccionario
+    (codec_name, width, height, pix_fmt, fps) o None si falla.
+    """
+    args = [
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,width,height,pix_fmt,r_frame_rate",
+        "-of", "csv=p=0",
+    ]
+    try:
+        fields = run_ffprobe(args, video_path).strip().split(",")
+        codec_name, width, height, pix_fmt, rate = fields[:5]
+        num, _, den = rate.partition("/")
+        return {
+            "codec_name": codec_name,
+            "width": int(width),
+            "height": int(height),
+            "pix_fmt": pix_fmt,
+            "fps": float(num) / float(den or 1),
+        }
+    except Exception as e:
+        print("Error obteniendo información del stream de vídeo:", e)
+        return None
+
+
+def get_video_profile_level(video_path):
+    """
+    Devuelve el perfil y el nivel del primer stream de vídeo tal como los da
+    ffprobe (p. ej. ("High", 40)) o None si falla.
+    """
+    args = [
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=profile,level",
+        "-of", "default=noprint_wrappers=1",
+    ]
+    try:
+        output = run_ffprobe(args, video_path)
+        values = dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+        return values["profile"], int(values["level"])
+    except Exception as e:
+        print("Error obteniendo el perfil del stream de vídeo:", e)
+        return None
+
+
+def get_audio_streams(media_path):
+    """
+    Devuelve la lista de streams de audio del archivo como diccionarios con
+    codec_name, sample_rate y channels. Si falla o no hay audio, devuelve [].
+    """
+    args = [
+        "-v", "error",
+        "-select_streams", "a",
+        "-show_entries", "stream=codec_name,sample_rate,channels",
+        "-of", "csv=p=0",
+    ]
+    try:
+        output = run_ffprobe(args, media_path)
+    except Exception as e:
+        print("Error obteniendo streams de audio:", e)
+        return []
+
+    streams = []
+    for line in output.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) < 3:
+            continue
+        codec_name, sample_rate, channels = fields[:3]
+        streams.append({
+            "codec_name": codec_name,
+            "sample_rate": int(sample_rate) if sample_rate.isdigit() else None,
+            "channels": int(channels) if channels.isdigit() else None,
+        })
+    return streams
+
+
 def is_video_file(file_path):
     """
     Devuelve True si la ruta parece corresponder a un vídeo soportado.
@@ -277,92 +471,140 @@ def pair_videos_by_resolution(folder_1, folder_2):
     return pairs, ignored_1, ignored_2, warnings
 
 
-def convert_images_to_video_command(folder_path, fps, audio_path=None, user_format="mp4 (H.264 8-bit)",
-                                    crf="19", fade_in_duration=1, fade_out_duration=1, pix_fmt=None,
-                                    prioritize_audio=False):
+def get_image_sequence_info(folder_path):
     """
-    Construye un comando FFmpeg para convertir una secuencia de imágenes en un video.
+    Detecta la secuencia de imágenes de una carpeta y devuelve un dict con:
+    prefix, width (dígitos), start_number, ext, images (nombres ordenados) y pattern.
+    Si no se detecta una secuencia válida, devuelve None.
     """
     prefix, width, found, start_number = detect_image_prefix(folder_path)
     if not found:
-        return [], ""
+        return None
 
-    valid_extensions = ('.png', '.jpg', '.jpeg')
-    files = sorted(os.listdir(folder_path))
-    images = [f for f in files if f.lower().endswith(valid_extensions) and f.startswith(prefix)]
-    num_images = len(images)
-    if num_images == 0:
-        return [], ""
+    images = select_sequence_images(os.listdir(folder_path), prefix)
+    if not images:
+        return None
 
     ext = os.path.splitext(images[0])[1]
+    return {
+        "prefix": prefix,
+        "width": width,
+        "start_number": start_number,
+        "ext": ext,
+        "images": images,
+        "pattern": os.path.join(folder_path, f"{prefix}%0{width}d{ext}"),
+    }
 
-    try:
-        fps_val = float(fps)
-    except ValueError:
-        fps_val = 30.0
-    video_duration = num_images / fps_val if fps_val > 0 else 0
 
+def select_sequence_images(names, prefix):
+    """Nombres de imagen (PNG/JPEG) que empiezan por 'prefix', ordenados."""
+    valid_extensions = ('.png', '.jpg', '.jpeg')
+    return [f for f in sorted(names) if f.lower().endswith(valid_extensions) and f.startswith(prefix)]
+
+
+def get_output_extension(user_format):
+    """Devuelve la extensión del contenedor de salida para un formato de la interfaz."""
     if user_format.lower().startswith("mp4"):
-        extension = "mp4"
+        return "mp4"
     elif user_format.lower() == "avi":
-        extension = "avi"
+        return "avi"
     elif user_format.lower() == "mkv":
-        extension = "mkv"
+        return "mkv"
     elif user_format.lower() == "mov":
-        extension = "mov"
-    else:
-        extension = "mp4"
+        return "mov"
+    return "mp4"
 
-    output_file = os.path.join(folder_path, f"{prefix}video.{extension}")
-    output_file = get_unique_filename(output_file)
-
-    image_pattern = os.path.join(folder_path, f"{prefix}%0{width}d{ext}")
-    command = [
-        "ffmpeg",
-        "-y",
-        "-start_number", str(start_number),
-        "-framerate", str(fps),
-        "-i", image_pattern
-    ]
-
-    if audio_path:
-        command.extend(["-i", audio_path])
 
+def build_video_codec_args(user_format, crf="19", pix_fmt=None):
+    """
+    Devuelve los argumentos de códec de vídeo (-c:v, -pix_fmt, -crf) para un formato de la interfaz.
+    """
     if user_format == "mp4 (H.265 8-bit)":
         default_fmt = "yuv420p"
         chosen_fmt = pix_fmt if pix_fmt else default_fmt
-        command.extend(["-c:v", "libx265", "-pix_fmt", chosen_fmt, "-crf", crf])
+        return ["-c:v", "libx265", "-pix_fmt", chosen_fmt, "-crf", crf]
     elif user_format == "mp4 (H.265 10-bit)":
         default_fmt = "yuv420p10le"
         chosen_fmt = pix_fmt if pix_fmt else default_fmt
-        command.extend(["-c:v", "libx265", "-pix_fmt", chosen_fmt, "-crf", crf])
+        return ["-c:v", "libx265", "-pix_fmt", chosen_fmt, "-crf", crf]
     elif user_format == "mp4 (H.265 16-bit)":
         default_fmt = "yuv420p16le"
         chosen_fmt = pix_fmt if pix_fmt else default_fmt
-        command.extend(["-c:v", "libx265", "-pix_fmt", chosen_fmt, "-crf", crf])
+        return ["-c:v", "libx265", "-pix_fmt", chosen_fmt, "-crf", crf]
     elif user_format == "mp4 (H.264 10-bit)":
         default_fmt = "yuv420p10le"
         chosen_fmt = pix_fmt if pix_fmt else default_fmt
-        command.extend(["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf])
+        return ["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf]
     elif user_format == "mp4 (H.264 16-bit)":
         default_fmt = "yuv420p16le"
         chosen_fmt = pix_fmt if pix_fmt else default_fmt
-        command.extend(["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf])
+        return ["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf]
     elif user_format == "mp4 (H.264 8-bit)" or user_format.lower().startswith("mp4"):
         default_fmt = "yuv420p"
         chosen_fmt = pix_fmt if pix_fmt else default_fmt
-        command.extend(["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf])
+        return ["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf]
     else:
         default_fmt = "yuv420p"
         chosen_fmt = pix_fmt if pix_fmt else default_fmt
-        command.extend(["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf])
+        return ["-c:v", "libx264", "-pix_fmt", chosen_fmt, "-crf", crf]
 
-    vf_filters = []
+
+def build_fade_filter(video_duration, fade_in_duration, fade_out_duration):
+    """
+    Devuelve el filtro de fundido de entrada/salida para un vídeo de 'video_duration'
+    segundos, o None si no aplica (sin fundidos o vídeo demasiado corto).
+    """
     if (fade_in_duration > 0 or fade_out_duration > 0) and video_duration > (fade_in_duration + fade_out_duration):
-        fade_filter = (
+        return (
             f"fade=t=in:st=0:d={fade_in_duration},"
             f"fade=t=out:st={video_duration - fade_out_duration}:d={fade_out_duration}"
         )
+    return None
+
+
+def convert_images_to_video_command(folder_path, fps, audio_path=None, user_format="mp4 (H.264 8-bit)",
+                                    crf="19", fade_in_duration=1, fade_out_duration=1, pix_fmt=None,
+                                    prioritize_audio=False, audio_filter=None):
+    """
+    Construye un comando FFmpeg para convertir una secuencia de imágenes en un video.
+    'audio_filter' se aplica al audio (p. ej. la normalización de logic/loudness.py).
+    """
+    sequence = get_image_sequence_info(folder_path)
+    if not sequence:
+        return [], ""
+
+    prefix = sequence["prefix"]
+    start_number = sequence["start_number"]
+    num_images = len(sequence["images"])
+
+    try:
+        fps_val = float(fps)
+    except ValueError:
+        fps_val = 30.0
+    video_duration = num_images / fps_val if fps_val > 0 else 0
+
+    extension = get_output_extension(user_format)
+
+    output_file = os.path.join(folder_path, f"{prefix}video.{extension}")
+    output_file = get_unique_filename(output_file)
+
+    image_pattern = sequence["pattern"]
+    command = [
+        "ffmpeg",
+        "-y",
+        "-start_number", str(start_number),
+        "-framerate", str(fps),
+        "-i", image_pattern
+    ]
+
+    if audio_path:
+        command.extend(["-i", audio_path])
+
+    command.extend(build_video_codec_args(user_format, crf, pix_fmt))
+
+    vf_filters = []
+    fade_filter = build_fade_filter(video_duration, fade_in_duration, fade_out_duration)
+    if fade_filter:
         vf_filters.append(fade_filter)
 
     if audio_path and prioritize_audio:
@@ -376,6 +618,8 @@ def convert_images_to_video_command(folder_path, fps, audio_path=None, user_form
         command.extend(["-vf", ",".join(vf_filters)])
 
     if audio_path:
+        if audio_filter:
+            command.extend(["-af", audio_filter])
         if not prioritize_audio:
             command.extend(["-c:a", "aac", "-b:a", "192k", "-shortest"])
         else:
@@ -386,53 +630,207 @@ def convert_images_to_video_command(folder_path, fps, audio_path=None, user_form
     return command, output_file
 
 
-def add_audio_to_video_command(video_path, audio_path, output_format="mp4"):
+def can_copy_audio(codec_name, output_format="mp4"):
+    """True si un audio con 'codec_name' puede copiarse sin recodificar en el contenedor 'output_format'."""
+    if not codec_name:
+        return False
+    allowed = AUDIO_COPY_CODECS.get(output_format.lower(), set())
+    return allowed is None or codec_name in allowed
+
+
+def audio_codec_args(audio_path, output_format="mp4"):
+    """
+    Argumentos de códec para el primer audio de 'audio_path': copia si el
+    contenedor lo admite (p. ej. AAC en MP4) y AAC 192k si no.
+    """
+    streams = get_audio_streams(audio_path)
+    if streams and can_copy_audio(streams[0]["codec_name"], output_format):
+        return ["-c:a", "copy"]
+    return list(AUDIO_ENCODE_ARGS)
+
+
+def audio_policy_args(input_file, output_format="mp4", audio_policy="copy", input_index=0):
+    """
+    Mapeo y códec del audio cuando solo se transforma la imagen de un vídeo.
+    Conserva todas las pistas de audio y los metadatos de la entrada 'input_index':
+      - "copy" (por defecto): copia sin recodificar si el contenedor admite todos
+        los códecs de audio; si alguno no es compatible, se codifica a AAC.
+      - "encode": siempre AAC.
+      - "none": sin audio.
+    """
+    args = ["-map_metadata", str(input_index)]
+    if audio_policy == "none":
+        return args + ["-an"]
+    args.extend(["-map", f"{input_index}:a?"])
+    streams = get_audio_streams(input_file)
+    if audio_policy == "copy" and all(can_copy_audio(s["codec_name"], output_format) for s in streams):
+        return args + ["-c:a", "copy"]
+    return args + list(AUDIO_ENCODE_ARGS)
+
+
+def add_audio_to_video_command(video_path, audio_path, output_format="mp4", audio_args=None,
+                               audio_filter=None):
     """
     Construye un comando FFmpeg para agregar audio a un video sin sonido.
+    El audio se copia si el contenedor lo admite; 'audio_args' permite forzar
+    los argumentos de códec (p. ej. en lotes con una pista ya preparada).
+    Con 'audio_filter' (p. ej. la normalización de logic/loudness.py) el audio
+    se filtra y se codifica.
     """
     output_file = video_path.rsplit('.', 1)[0] + "_CON_AUDIO." + output_format
     output_file = get_unique_filename(output_file)
+    if audio_filter:
+        audio_args = ["-af", audio_filter, *AUDIO_ENCODE_ARGS]
+    elif audio_args is None:
+        audio_args = audio_codec_args(audio_path, output_format)
     command = [
         "ffmpeg",
         "-y",
         "-i", video_path,
         "-i", audio_path,
         "-c:v", "copy",
-        "-c:a", "aac",
-        "-b:a", "192k",
+        *audio_args,
         "-shortest",
         output_file
     ]
+    print(" ".join(command))
     return command, output_file
 
 
+def keyframe_seek_time(seconds):
+    """
+    Valor de -ss de entrada para copiar desde el fotograma clave en 'seconds':
+    se redondea hacia arriba al microsegundo, porque un instante apenas
+    anterior haría que FFmpeg empezara en el clave previo.
+    """
+    return math.ceil(seconds * 1e6 - 1e-3) / 1e6
+
+
+def stream_copy_keyframe(video_path, start_seconds, frame_index=None):
+    """
+    Instante del fotograma clave en el que empieza un corte con copia de
+    streams pedido en 'start_seconds' (con tolerancia de medio frame), según
+    el índice o, sin él, el plan guardado junto al vídeo. None si el inicio
+    no es un fotograma clave y el corte se recodifica.
+    """
+    fps = get_video_fps(video_path) or 30.0
+    if frame_index is not None:
+        # El índice dice en qué frame cayó de verdad cada fotograma clave
+        keyframe_time = frame_index.keyframe_after(start_seconds - 0.5 / fps)
+        if keyframe_time is not None and keyframe_time - start_seconds > 0.5 / fps:
+            return None
+        return keyframe_time
+    return planned_keyframe_time(load_keyframe_sidecar(video_path), start_seconds, fps)
+
+
 def cut_video_command(video_path, start_time, duration=None, end_time=None,
                       output_format="mp4", cut_mode="time",
-                      fade_in_duration=0, fade_out_duration=0):
+                      fade_in_duration=0, fade_out_duration=0, frame_index=None, stream_copy=False,
+                      mezzanine_profile=None, mp4_layout=None):
     """
     Corta un vídeo con calidad máxima y permite añadir fundido a negro
     al inicio y/o al final del fragmento resultante.
+
+    Con cut_mode="frames", start_time es el frame inicial y duration la cantidad
+    de frames; requiere 'frame_index' (ver logic/frame_index.py) para conocer el
+    instante exacto de cada frame. Sin él retorna (None, None) en vez de tomar
+    los frames por segundos.
+    Al recodificar se hace input-seek al inicio: FFmpeg decodifica desde el
+    fotograma clave anterior y descarta lo previo antes de los filtros, así que
+    los fundidos cuentan desde el primer frame del corte. Con el índice, el
+    instante se redondea hacia abajo al microsegundo para no perder ese frame.
+    Con stream_copy=True (y sin fundidos) el corte se hace con copia de streams
+    si el inicio cae en un fotograma clave, según el índice o, sin él, el plan
+    guardado junto al vídeo (logic/keyframe_plan.py); el corte empieza en el
+    frame real de ese clave. Si no, se recodifica como siempre.
+    'mezzanine_profile' es el nombre de un perfil de MEZZANINE_PROFILES para la
+    recodificación; si su contenedor es otro (FFV1 en mkv), la salida lo usa.
+    'mp4_layout' es una disposición de MP4_LAYOUTS (faststart o fragmentado).
     """
+    if cut_mode == "frames" and frame_index is None:
+        print("Error: el corte por frames necesita el índice de fotogramas del vídeo.")
+        return None, None
+
+    profile = MEZZANINE_PROFILES.get(mezzanine_profile or DEFAULT_MEZZANINE, MEZZANINE_PROFILES[DEFAULT_MEZZANINE])
+    if profile["format"] != "mp4":
+        # También con stream_copy: si el inicio no es clave se recodifica con este perfil
+        output_format = profile["format"]
+
     base = os.path.splitext(video_path)[0]
     output_file = f"{base}_cut.{output_format}"
     output_file = get_unique_filename(output_file)
 
-    command = ["ffmpeg", "-y", "-i", video_path]
-
     clip_duration = None
-    start_seconds = parse_time_to_seconds(start_time)
-
-    if end_time:
-        end_seconds = parse_time_to_seconds(end_time)
-        real_duration = max(0.0, end_seconds - start_seconds)
-        clip_duration = real_duration
-        command.extend(["-ss", str(start_seconds), "-t", str(real_duration)])
-    elif duration:
-        dur_seconds = parse_time_to_seconds(duration)
-        clip_duration = dur_seconds
-        command.extend(["-ss", str(start_seconds), "-t", str(dur_seconds)])
+    end_seconds = None
+    frame_count = None
+
+    if cut_mode == "frames":
+        start_frame = int(start_time)
+        start_seconds = frame_index.frame_time(start_frame)
+        if duration:
+            frame_count = int(duration)
+            end_frame = start_frame + frame_count
+            if end_frame < frame_index.frame_count:
+                clip_duration = frame_index.frame_time(end_frame) - start_seconds
     else:
-        command.extend(["-ss", str(start_seconds)])
+        start_seconds = parse_time_to_seconds(start_time)
+        if end_time:
+            end_seconds = parse_time_to_seconds(end_time)
+            clip_duration = max(0.0, end_seconds - start_seconds)
+        elif duration:
+            clip_duration = parse_time_to_seconds(duration)
+
+    # Duración real del fragmento para situar el fundido de salida, también
+    # cuando el corte llega hasta el final del vídeo (sin -t)
+    fade_span = clip_duration
+    if fade_span is None and fade_out_duration > 0:
+        if frame_index is not None and frame_index.frame_count:
+            times = frame_index.frame_times
+            last_frame = times[-1] - times[-2] if len(times) > 1 else 1 / (get_video_fps(video_path) or 30.0)
+            fade_span = times[-1] + last_frame - start_seconds
+        else:
+            fade_span = get_video_duration(video_path) - start_seconds
+
+    if stream_copy and not (fade_in_duration > 0 or fade_out_duration > 0):
+        keyframe_time = stream_copy_keyframe(video_path, start_seconds, frame_index)
+        if keyframe_time is not None:
+            # Se corta justo en el fotograma clave: buscar un instante anterior
+            # (2 s en vez de 2.002 s) haría empezar la copia en el clave previo
+            if end_seconds is not None:
+                clip_duration = max(0.0, end_seconds - keyframe_time)
+            command = ["ffmpeg", "-y"]
+            if keyframe_time > 0:
+                command.extend(["-ss", str(keyframe_seek_time(keyframe_time))])
+            command.extend(["-i", video_path])
+            if clip_duration is not None:
+                command.extend(["-t", str(round(clip_duration, 6))])
+            if frame_count is not None:
+                command.extend(["-frames:v", str(frame_count)])
+            command.extend([
+                "-map", "0", "-c", "copy",
+                "-map_metadata", "0",
+                "-avoid_negative_ts", "make_zero",
+                *mp4_layout_args(output_format, mp4_layout),
+                output_file,
+            ])
+            print(" ".join(command))
+            return command, output_file
+        print("[DEBUG] El inicio del corte no es un fotograma clave: se recodifica.")
+
+    # Un -ss de salida recortaría después de -vf y desplazaría los fundidos
+    command = ["ffmpeg", "-y"]
+    if start_seconds > 0:
+        if frame_index is not None:
+            seek = math.floor(start_seconds * 1e6 + 1e-3) / 1e6
+        else:
+            seek = round(start_seconds, 6)
+        command.extend(["-ss", str(seek)])
+    command.extend(["-i", video_path])
+
+    if clip_duration is not None:
+        command.extend(["-t", str(round(clip_duration, 6))])
+    if frame_count is not None:
+        command.extend(["-frames:v", str(frame_count)])
 
     vf_filters = []
 
@@ -442,29 +840,26 @@ def cut_video_command(video_path, start_time, duration=None, end_time=None,
     if fade_in_duration > 0:
         vf_filters.append(f"fade=t=in:st=0:d={fade_in_duration}")
 
-    if fade_out_duration > 0 and clip_duration and clip_duration > fade_out_duration:
-        fade_out_start = max(0, clip_duration - fade_out_duration)
+    if fade_out_duration > 0 and fade_span and fade_span > fade_out_duration:
+        fade_out_start = round(max(0, fade_span - fade_out_duration), 6)
         vf_filters.append(f"fade=t=out:st={fade_out_start}:d={fade_out_duration}")
 
     if vf_filters:
         command.extend(["-vf", ",".join(vf_filters)])
 
-    video_codec_args = [
-        "-c:v", "libx264",
-        "-preset", "veryslow",
-        "-crf", "0",
-        "-pix_fmt", "yuv420p",
-    ]
+    video_codec_args = list(profile["codec_args"])
 
     audio_codec_args = [
         "-c:a", "copy",
     ]
 
+    container_args = mp4_layout_args(output_format, mp4_layout)
+
     command.extend(
         video_codec_args
         + audio_codec_args
+        + container_args
         + [
-            "-movflags", "+faststart",
             "-map_metadata", "0",
             "-map", "0",
             output_file,
@@ -504,9 +899,11 @@ def parse_time_to_seconds(time_str):
     return float(s)
 
 
-def limit_kps_command(input_file, video_bitrate="57M", maxrate="60M", output_format="mp4"):
+def limit_kps_command(input_file, video_bitrate="57M", maxrate="60M", output_format="mp4",
+                      audio_policy="copy"):
     """
     Construye un comando FFmpeg para limitar los kps (bitrate de video).
+    El audio sigue 'audio_policy' (ver audio_policy_args).
     """
     base = os.path.splitext(input_file)[0]
     output_file = f"{base}_limited.{output_format}"
@@ -516,18 +913,22 @@ def limit_kps_command(input_file, video_bitrate="57M", maxrate="60M", output_for
         "ffmpeg",
         "-y",
         "-i", input_file,
+        "-map", "0:v:0",
         "-c:v", "libx264",
         "-b:v", video_bitrate,
         "-maxrate", maxrate,
+        *audio_policy_args(input_file, output_format, audio_policy),
         output_file
     ]
     print(" ".join(command))
     return command, output_file
 
 
-def scale_video_command(input_file, scale_width, scale_height, preset="slow", crf="18", output_format="mp4"):
+def scale_video_command(input_file, scale_width, scale_height, preset="slow", crf="18", output_format="mp4",
+                        audio_policy="copy"):
     """
     Construye un comando FFmpeg para reescalar un video sin recortar.
+    El audio sigue 'audio_policy' (ver audio_policy_args).
     """
     base = os.path.splitext(input_file)[0]
     output_file = f"{base}_scaled.{output_format}"
@@ -537,9 +938,11 @@ def scale_video_command(input_file, scale_width, scale_height, preset="slow", cr
         "ffmpeg",
         "-y",
         "-i", input_file,
+        "-map", "0:v:0",
         "-vf", f"scale={scale_width}:{scale_height}",
         "-preset", preset,
         "-crf", crf,
+        *audio_policy_args(input_file, output_format, audio_policy),
         output_file
     ]
 
@@ -547,18 +950,23 @@ def scale_video_command(input_file, scale_width, scale_height, preset="slow", cr
     return command, output_file
 
 
+def build_crop_filter(crop_top=0, crop_bottom=0, crop_left=0, crop_right=0):
+    """Devuelve el filtro crop que elimina los píxeles indicados de cada lado."""
+    return f"crop=iw-{crop_left + crop_right}:ih-{crop_top + crop_bottom}:{crop_left}:{crop_top}"
+
+
 def crop_video_command(input_file, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0,
-                       fade_in_duration=0, fade_out_duration=0, output_format="mp4"):
+                       fade_in_duration=0, fade_out_duration=0, output_format="mp4", audio_policy="copy"):
     """
     Construye un comando FFmpeg para recortar un video y opcionalmente añadir
-    fundido a negro al inicio y/o al final.
+    fundido a negro al inicio y/o al final. El fundido solo afecta a la imagen;
+    el audio sigue 'audio_policy' (ver audio_policy_args).
     """
     base = os.path.splitext(input_file)[0]
     output_file = f"{base}_cropped.{output_format}"
     output_file = get_unique_filename(output_file)
 
-    crop_filter = f"crop=iw-{crop_left + crop_right}:ih-{crop_top + crop_bottom}:{crop_left}:{crop_top}"
-    vf_filters = [crop_filter]
+    vf_filters = [build_crop_filter(crop_top, crop_bottom, crop_left, crop_right)]
 
     video_duration = get_video_duration(input_file)
 
@@ -573,7 +981,9 @@ def crop_video_command(input_file, crop_top=0, crop_bottom=0, crop_left=0, crop_
         "ffmpeg",
         "-y",
         "-i", input_file,
+        "-map", "0:v:0",
         "-vf", ",".join(vf_filters),
+        *audio_policy_args(input_file, output_format, audio_policy),
         output_file
     ]
 
@@ -600,21 +1010,26 @@ def remove_audio_command(video_path, output_format="mp4"):
     return command, output_file
 
 
-def replace_audio_command(video_path, new_audio_path, output_format="mp4"):
+def replace_audio_command(video_path, new_audio_path, output_format="mp4", audio_args=None,
+                          audio_filter=None):
     """
     Construye un comando FFmpeg para sustituir la pista de audio de un video por una nueva.
+    El audio nuevo se copia si el contenedor lo admite (ver add_audio_to_video_command).
     """
     base = os.path.splitext(video_path)[0]
     output_file = f"{base}_REPLACE_AUDIO.{output_format}"
     output_file = get_unique_filename(output_file)
+    if audio_filter:
+        audio_args = ["-af", audio_filter, *AUDIO_ENCODE_ARGS]
+    elif audio_args is None:
+        audio_args = audio_codec_args(new_audio_path, output_format)
     command = [
         "ffmpeg",
         "-y",
         "-i", video_path,
         "-i", new_audio_path,
         "-c:v", "copy",
-        "-c:a", "aac",
-        "-b:a", "192k",
+        *audio_args,
         "-map", "0:v:0",
         "-map", "1:a:0",
         "-shortest",
@@ -646,17 +1061,32 @@ def build_concat_file(video_paths):
     fd, concat_file = tempfile.mkstemp(prefix="ffmpeg_concat_", suffix=".txt", text=True)
     os.close(fd)
 
+    write_concat_file(concat_file, video_paths)
+    return concat_file
+
+
+def write_concat_file(concat_file, video_paths):
+    """
+    Escribe en 'concat_file' la lista de vídeos en el formato del demuxer concat de FFmpeg.
+    """
     with open(concat_file, "w", encoding="utf-8") as f:
         for video_path in video_paths:
             normalized = os.path.abspath(video_path).replace("\\", "/")
             escaped = normalized.replace("'", r"'\''")
             f.write(f"file '{escaped}'\n")
 
-    return concat_file
+
+def merge_keyframe_plan(video_paths, interval=None):
+    """
+    Plan de fotogramas clave de una unión: uno al principio de cada clip y,
+    opcionalmente, cada 'interval' segundos.
+    """
+    durations = [get_video_duration(path) for path in video_paths]
+    return keyframe_plan(interval, boundary_times(durations))
 
 
 def merge_videos_command(video_paths, mode="fast", output_name=None, preset="slow",
-                         crf="19", output_format="mp4", output_dir=None):
+                         crf="19", output_format="mp4", output_dir=None, keyframes=None, mp4_layout=None):
     """
     Construye un comando FFmpeg para unir múltiples vídeos.
 
@@ -668,6 +1098,8 @@ def merge_videos_command(video_paths, mode="fast", output_name=None, preset="slo
         crf: calidad de codificación
         output_format: formato de salida
         output_dir: directorio de salida opcional. Si es None, usa la carpeta del primer vídeo.
+        keyframes: plan de fotogramas clave para el modo 'compatible' (ver merge_keyframe_plan).
+        mp4_layout: disposición de la salida del modo 'compatible' (ver MP4_LAYOUTS).
 
     Retorna:
         (command, output_file, concat_file, error_message)
@@ -709,19 +1141,18 @@ def merge_videos_command(video_paths, mode="fast", output_name=None, preset="slo
             output_file
         ]
     else:
+        video_codec_args = ["-c:v", "libx264", "-preset", str(preset), "-crf", str(crf), "-pix_fmt", "yuv420p"]
         command = [
             "ffmpeg",
             "-y",
             "-f", "concat",
             "-safe", "0",
             "-i", concat_file,
-            "-c:v", "libx264",
-            "-preset", str(preset),
-            "-crf", str(crf),
-            "-pix_fmt", "yuv420p",
+            *video_codec_args,
+            *keyframe_codec_args(video_codec_args, keyframes),
             "-c:a", "aac",
             "-b:a", "192k",
-            "-movflags", "+faststart",
+            *mp4_layout_args(output_format, mp4_layout),
             output_file
         ]
 
@@ -3,24 +3,41 @@
 Módulo que contiene la clase FFmpegWorker.
 Esta clase extiende QThread para ejecutar comandos FFmpeg en un hilo separado,
 manteniendo la interfaz gráfica responsiva durante procesos largos.
-Además, permite cancelar el proceso FFmpeg de forma segura, de modo que si se 
+Además, permite cancelar el proceso FFmpeg de forma segura, de modo que si se
 cancela la operación, se elimine el archivo de salida incompleto para evitar confusiones.
+Cada ejecución registra además sus métricas de recursos (ver logic/job_metrics.py)
+y puede pausarse y reanudarse sin perder el trabajo hecho.
+
+También contiene FFmpegPipelineWorker, que ejecuta tareas de varios pasos
+(p.ej. codificar segmentos y concatenarlos) como una única tarea de la interfaz.
 """
 
+import io
 import os
+import shutil
 import subprocess
 import re
 import sys
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from logic.job_metrics import JobMetrics, wait_with_rusage, record_job_metrics
+from logic.metrics_exporter import REGISTRY
+from logic.job_scheduler import SCHEDULER, PRIORITY_INTERACTIVE
+
 class FFmpegWorker(QThread):
     """
-    Worker que ejecuta un comando FFmpeg y emite señales para actualizar el progreso 
+    Worker que ejecuta un comando FFmpeg y emite señales para actualizar el progreso
     y notificar la finalización. Permite cancelar la ejecución del proceso FFmpeg de forma segura,
     eliminando el archivo de salida incompleto en caso de cancelación.
     """
     progressChanged = pyqtSignal(int)  # Señal para actualizar el progreso (en porcentaje)
     finishedSignal = pyqtSignal(bool, str)  # Señal que indica la finalización: (éxito, mensaje o ruta de salida)
+    metricsReady = pyqtSignal(dict)  # Señal con las métricas de recursos de la tarea (antes de finishedSignal)
+    etaChanged = pyqtSignal(float)  # Segundos restantes estimados (sin contar el tiempo en pausa)
 
     # En Windows se usa un flag para evitar que aparezca la consola al iniciar el proceso
     if sys.platform.startswith("win"):
@@ -28,23 +45,35 @@ class FFmpegWorker(QThread):
     else:
         CREATE_NO_WINDOW = 0
 
-    def __init__(self, command, total_frames, output_file, enable_logs=False):
+    def __init__(self, command, total_frames, output_file, enable_logs=False, operation="ffmpeg",
+                 priority=PRIORITY_INTERACTIVE):
         """
         Inicializa el worker.
-        
+
         Parámetros:
             command: Lista de argumentos para FFmpeg.
             total_frames: Estimación de frames totales para calcular el progreso.
             output_file: Ruta del archivo de salida.
             enable_logs: Si True, guarda logs del proceso FFmpeg en un archivo.
+            operation: Tipo de operación (p.ej. 'cut', 'scale'), usado en las métricas.
+            priority: 'interactive' o 'background' (lotes que se ejecutan con prioridad baja).
         """
         super().__init__()
         self.command = command
         self.total_frames = total_frames
         self.output_file = output_file
         self.enable_logs = enable_logs
-        self.proc = None       # Almacena la instancia del proceso FFmpeg para permitir su cancelación
+        self.operation = operation
+        self.priority = priority
+        self.proc = None       # Almacena la instancia del último proceso FFmpeg lanzado
         self.cancelled = False # Bandera para indicar si se ha solicitado la cancelación
+        self.paused = False    # Pausa solicitada por el usuario (se aplica también si aún no ha arrancado)
+        self.metrics = JobMetrics(operation, output_file)  # La espera en cola empieza al crear el worker
+        self.log_file = None
+        self._tickets = []     # Tickets del planificador de los procesos en curso
+        self._tickets_lock = threading.Lock()
+        self._paused_accum = 0.0  # Tiempo en pausa de los pasos ya terminados
+        REGISTRY.job_queued(operation)
 
     def run(self):
         """
@@ -52,67 +81,218 @@ class FFmpegWorker(QThread):
         Se almacena la instancia del proceso en self.proc para permitir su cancelación.
         Si se cancela, se elimina el archivo de salida incompleto.
         """
-        self.proc = subprocess.Popen(
-            self.command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            shell=False,
-            creationflags=self.CREATE_NO_WINDOW
+        self.open_log()
+        retcode, error_output, paused = self.execute(
+            self.command, self.total_frames, self.report_progress, self.metrics
         )
+        self._paused_accum += paused
 
-        # Si se habilitan logs, abre un archivo para escribir la salida de FFmpeg
-        if self.enable_logs:
-            log_file = open("ffmpeg.log", "a", encoding="utf-8")
-            log_file.write("\n=== Iniciando FFmpeg Worker ===\n")
-            log_file.write("Comando: " + " ".join(self.command) + "\n\n")
-
-        # Lee la salida de stderr línea por línea para capturar el progreso
-        while True:
-            if self.cancelled and self.proc:
-                # si ya se ha pedido cancelar, salimos del bucle
-                break
+        # Si se canceló la operación, consideramos el resultado como fallido
+        success = (retcode == 0) and not self.cancelled
 
-            line = self.proc.stderr.readline()
-            if not line:
-                break
+        # Si se canceló, se elimina el archivo de salida incompleto, si existe
+        if self.cancelled:
+            self.remove_output()
 
-            if self.enable_logs:
-                log_file.write(line)
+        self.finish(success, error_output)
 
-            match = re.search(r"frame=\s*(\d+)", line)
-            if match and self.total_frames and self.total_frames > 0:
-                current_frame = int(match.group(1))
-                progress = int(current_frame / self.total_frames * 100)
-                if progress > 100:
-                    progress = 100
-                self.progressChanged.emit(progress)
+    def execute(self, command, total_frames, on_progress, metrics, stdin_source=None):
+        """
+        Ejecuta un proceso FFmpeg bajo el planificador y devuelve (retcode, error_output, segundos_en_pausa).
+        'on_progress' recibe el porcentaje (0-100) calculado con 'total_frames'.
+        'stdin_source' (opcional) es un iterable de bloques de bytes (bytes, memoryview...)
+        que se escriben por la entrada estándar del proceso desde un hilo aparte;
+        la escritura se bloquea mientras FFmpeg no consume, así que hay contrapresión.
+        Si la tarea se cancela mientras espera turno, devuelve (None, "Cancelado", 0.0).
+        """
+        # El planificador ajusta el comando (hilos, prioridad) y puede retenerlo en cola
+        # si su disco ya está ocupado por otra tarea de E/S
+        ticket = SCHEDULER.acquire(command, self.priority, should_abort=lambda: self.cancelled)
+        if ticket is None:
+            return None, "Cancelado", 0.0
 
-        # Espera a que el proceso FFmpeg finalice y obtiene el código de retorno
-        self.proc.wait()
-        retcode = self.proc.returncode
+        if self.metrics.started_at is None:
+            self.metrics.mark_started()
+            REGISTRY.job_started(self.operation)
+        if metrics is not self.metrics:
+            metrics.mark_started()
 
-        # Si se canceló la operación, consideramos el resultado como fallido
-        success = (retcode == 0) and not self.cancelled
+        # El ticket se libera pase lo que pase: si no, su hueco de E/S y su
+        # presupuesto de hilos quedarían ocupados para siempre
+        proc = None
+        waited = False
+        try:
+            if stdin_source is None:
+                proc = subprocess.Popen(
+                    ticket.command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    universal_newlines=True,
+                    shell=False,
+                    creationflags=self.CREATE_NO_WINDOW | ticket.creationflags
+                )
+                stderr = proc.stderr
+            else:
+                # stdin en binario; stderr se sigue leyendo como texto con saltos de línea universales
+                proc = subprocess.Popen(
+                    ticket.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    shell=False,
+                    creationflags=self.CREATE_NO_WINDOW | ticket.creationflags
+                )
+                stderr = io.TextIOWrapper(proc.stderr, encoding="utf-8", errors="replace", newline=None)
+            self.proc = proc
+            ticket.user_paused = self.paused
+            SCHEDULER.attach_process(ticket, proc)
+            with self._tickets_lock:
+                self._tickets.append(ticket)
+            if self.cancelled:
+                self.kill_process(proc)
 
-        # Si se canceló, se elimina el archivo de salida incompleto, si existe
-        if self.cancelled and os.path.exists(self.output_file):
+            self.write_log("\n=== Iniciando FFmpeg Worker ===\n")
+            self.write_log("Comando: " + " ".join(ticket.command) + "\n\n")
+
+            feed_errors = []
+            feeder = None
+            if stdin_source is not None:
+                feeder = threading.Thread(
+                    target=self.feed_stdin, args=(proc, stdin_source, feed_errors), daemon=True
+                )
+                feeder.start()
+
+            # Lee la salida de stderr línea por línea para capturar el progreso
+            last_lines = deque(maxlen=5)
+            while True:
+                if self.cancelled:
+                    # si ya se ha pedido cancelar, salimos del bucle
+                    break
+
+                line = stderr.readline()
+                if not line:
+                    break
+
+                self.write_log(line)
+                if line.strip() and not line.startswith("frame="):
+                    last_lines.append(line.strip())
+
+                metrics.parse_progress_line(line)
+                metrics.sample_process(proc.pid)
+                if metrics.final_fps is not None:
+                    REGISTRY.job_progress(id(self), self.operation, metrics.final_fps)
+
+                match = re.search(r"frame=\s*(\d+)", line)
+                if match and total_frames and total_frames > 0:
+                    current_frame = int(match.group(1))
+                    progress = int(current_frame / total_frames * 100)
+                    if progress > 100:
+                        progress = 100
+                    on_progress(progress)
+
+            # Espera a que el proceso FFmpeg finalice y obtiene el código de retorno y su rusage
+            metrics.sample_process(proc.pid, force=True)
+            if feeder is not None:
+                feeder.join()
+            retcode, usage = wait_with_rusage(proc)
+            waited = True
+        finally:
+            if proc is not None and not waited:
+                self.kill_process(proc)
+                wait_with_rusage(proc)
+            SCHEDULER.release(ticket)
+            with self._tickets_lock:
+                if ticket in self._tickets:
+                    self._tickets.remove(ticket)
+        metrics.apply_rusage(usage)
+
+        error_output = "" if retcode == 0 else (last_lines[-1] if last_lines else "")
+        if feed_errors and not self.cancelled:
+            # Un fallo de la fuente de datos invalida la salida aunque FFmpeg haya terminado bien
+            retcode = retcode or 1
+            error_output = feed_errors[0]
+        if error_output:
+            self.write_log(error_output + "\n")
+        self.write_log(f"=== Proceso finalizado. Return code: {retcode} ===\n\n")
+        return retcode, error_output, ticket.paused_seconds()
+
+    def feed_stdin(self, proc, stdin_source, errors):
+        """Escribe los bloques de 'stdin_source' en la entrada del proceso y la cierra al terminar."""
+        try:
+            for chunk in stdin_source:
+                if self.cancelled:
+                    break
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, OSError):
+            pass  # FFmpeg terminó antes (error o cancelación): se informa por su código de retorno
+        except Exception as e:
+            errors.append(str(e))
+            self.kill_process(proc)
+        finally:
+            # Cierra el generador para que libere sus recursos (hilos lectores, archivos)
+            close = getattr(stdin_source, "close", None)
+            if close:
+                close()
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    def report_progress(self, progress):
+        """Emite el progreso (porcentaje) y el tiempo restante estimado."""
+        self.progressChanged.emit(progress)
+        self.emit_eta(progress)
+
+    def current_paused_time(self):
+        """Tiempo en pausa acumulado de la tarea, incluyendo los procesos en curso."""
+        with self._tickets_lock:
+            running = max((t.paused_seconds() for t in self._tickets), default=0.0)
+        return self._paused_accum + running
+
+    def emit_eta(self, progress):
+        """Emite el tiempo restante estimado a partir del tiempo activo (sin pausas)."""
+        if progress <= 0:
+            return
+        self.metrics.paused_time = self.current_paused_time()
+        active = self.metrics.active_time(time.monotonic())
+        self.etaChanged.emit(active * (100 - progress) / progress)
+
+    def open_log(self):
+        """Si se habilitan logs, abre un archivo para escribir la salida de FFmpeg."""
+        if self.enable_logs:
+            self.log_file = open("ffmpeg.log", "a", encoding="utf-8")
+
+    def write_log(self, text):
+        if self.log_file:
+            self.log_file.write(text)
+
+    def remove_output(self):
+        """Elimina el archivo de salida incompleto, si existe."""
+        if self.output_file and os.path.exists(self.output_file):
             try:
                 os.remove(self.output_file)
             except Exception as e:
-                if self.enable_logs:
-                    log_file.write(f"Error al eliminar archivo cancelado: {e}\n")
+                self.write_log(f"Error al eliminar archivo cancelado: {e}\n")
 
-        if not success:
-            error_output = self.proc.stderr.read()
-            if self.enable_logs and error_output:
-                log_file.write(error_output)
-        else:
-            error_output = ""
+    def finish(self, success, error_output):
+        """Cierra el log, registra las métricas y emite las señales de finalización."""
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
 
-        if self.enable_logs:
-            log_file.write(f"=== Proceso finalizado. Return code: {retcode} ===\n\n")
-            log_file.close()
+        self.metrics.paused_time = self._paused_accum
+        if self.cancelled:
+            self.metrics.finish("cancelled")
+        else:
+            self.metrics.finish("ok" if success else "error")
+        metrics = self.metrics.to_dict()
+        record_job_metrics(metrics)
+        REGISTRY.job_finished(
+            id(self), self.operation, metrics["status"],
+            duration=metrics["wall_time"], bytes_written=metrics["bytes_written"],
+            started=self.metrics.started_at is not None
+        )
+        self.metricsReady.emit(metrics)
 
         # Emite la señal de finalización con el estado y mensaje (o ruta de salida en caso de éxito)
         if self.cancelled:
@@ -121,15 +301,164 @@ class FFmpegWorker(QThread):
             self.finishedSignal.emit(True, self.output_file)
         else:
             self.finishedSignal.emit(False, error_output or "Error en FFmpeg.")
-            
+
+    def set_paused(self, paused):
+        """
+        Pausa (SIGSTOP) o reanuda (SIGCONT) los procesos FFmpeg en curso.
+        Si la tarea aún no ha arrancado, la pausa se aplica en cuanto arranque.
+        """
+        self.paused = paused
+        with self._tickets_lock:
+            tickets = list(self._tickets)
+        for ticket in tickets:
+            SCHEDULER.set_user_paused(ticket, paused)
+
+    @staticmethod
+    def kill_process(proc):
+        try:
+            proc.kill()  # Fuerza la finalización del proceso FFmpeg
+        except Exception as e:
+            print("Error al cancelar el proceso FFmpeg:", e)
+
     def cancel(self):
         """
         Cancela la ejecución del proceso FFmpeg de forma segura.
-        Se establece la bandera de cancelación y se fuerza la terminación del proceso.
+        Se establece la bandera de cancelación y se fuerza la terminación de los procesos en curso.
         """
         self.cancelled = True
-        if self.proc:
+        with self._tickets_lock:
+            procs = [t.proc for t in self._tickets if t.proc is not None]
+        for proc in procs:
+            self.kill_process(proc)
+
+
+class FFmpegPipelineWorker(FFmpegWorker):
+    """
+    Worker para tareas de varios pasos. 'stages' es una lista de etapas que se
+    ejecutan en orden; cada etapa es una lista de pasos que pueden ejecutarse en
+    paralelo (hasta 'max_parallel' a la vez). Cada paso es un dict con:
+        command: lista de argumentos o función que la devuelve al ejecutarse
+                 (una lista vacía indica que el paso no tiene nada que hacer).
+        callable: alternativa a 'command', función Python que se ejecuta en el hilo del worker.
+        stdin: función que devuelve un iterable de bloques de bytes para la entrada
+               estándar del proceso (p. ej. imágenes para -f image2pipe), opcional.
+        total_frames: frames esperados para el progreso del paso (opcional).
+        weight: peso del paso en el progreso global (por defecto 1).
+        on_success: función a ejecutar cuando el paso termina bien (opcional).
+    Los archivos (o carpetas) de 'cleanup_files' se eliminan siempre al terminar.
+    """
+    stepProgressChanged = pyqtSignal(int, int)  # (índice del paso, porcentaje)
+
+    def __init__(self, stages, output_file, enable_logs=False, operation="pipeline",
+                 priority=PRIORITY_INTERACTIVE, max_parallel=1, cleanup_files=()):
+        super().__init__([], 0, output_file, enable_logs=enable_logs, operation=operation, priority=priority)
+        self.stages = [list(stage) for stage in stages]
+        self.max_parallel = max(1, int(max_parallel))
+        self.cleanup_files = list(cleanup_files)
+        self._steps = [step for stage in self.stages for step in stage]
+        self._step_progress = [0] * len(self._steps)
+        self._progress_lock = threading.Lock()
+
+    def run(self):
+        self.open_log()
+        success, error_output = True, ""
+        step_index = 0
+
+        for stage in self.stages:
+            indices = list(range(step_index, step_index + len(stage)))
+            step_index += len(stage)
+
+            if len(stage) == 1 or self.max_parallel == 1:
+                # En secuencia se detiene en el primer paso que falle
+                results = []
+                for i in indices:
+                    results.append(self.run_step(i))
+                    if not results[-1][0]:
+                        break
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+                    results = list(pool.map(self.run_step, indices))
+
+            self._paused_accum += max((paused for _, _, paused in results), default=0.0)
+            failures = [message for ok, message, _ in results if not ok]
+            if failures or self.cancelled:
+                success, error_output = False, failures[0] if failures else "Cancelado"
+                break
+
+        for path in self.cleanup_files:
             try:
-                self.proc.kill()  # Fuerza la finalización del proceso FFmpeg
-            except Exception as e:
-                print("Error al cancelar el proceso FFmpeg:", e)
+                if path and os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif path and os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                pass
+
+        if not success:
+            self.remove_output()
+        self.finish(success, error_output)
+
+    def run_step(self, index):
+        """Ejecuta un paso y devuelve (éxito, mensaje de error, segundos en pausa)."""
+        step = self._steps[index]
+        if self.cancelled:
+            return False, "Cancelado", 0.0
+
+        paused = 0.0
+        try:
+            if "callable" in step:
+                step["callable"]()
+            else:
+                command = step["command"]() if callable(step["command"]) else step["command"]
+                if command:
+                    child = JobMetrics(self.operation, None)
+                    stdin_source = step["stdin"]() if step.get("stdin") else None
+                    retcode, error_output, paused = self.execute(
+                        command, step.get("total_frames", 100),
+                        lambda value: self.update_step_progress(index, value), child, stdin_source
+                    )
+                    self.metrics.add_process(child)
+                    if retcode != 0 or self.cancelled:
+                        return False, error_output or "Error en FFmpeg.", paused
+            if step.get("on_success"):
+                step["on_success"]()
+        except Exception as e:
+            return False, str(e), paused
+
+        self.update_step_progress(index, 100)
+        return True, "", paused
+
+    def update_step_progress(self, index, value):
+        """Actualiza el progreso de un paso y emite el progreso global ponderado."""
+        with self._progress_lock:
+            self._step_progress[index] = value
+            total_weight = sum(step.get("weight", 1) for step in self._steps) or 1
+            overall = sum(
+                step.get("weight", 1) * progress
+                for step, progress in zip(self._steps, self._step_progress)
+            ) / total_weight
+        self.stepProgressChanged.emit(index, value)
+        self.report_progress(int(overall))
+
+
+class AnalysisWorker(QThread):
+    """
+    Worker genérico para análisis en segundo plano (miniaturas, índices, etc.).
+    Ejecuta 'function(*args)' fuera del hilo de la interfaz y emite su resultado.
+    """
+    resultReady = pyqtSignal(object)  # Valor devuelto por la función (puede ser None)
+    failed = pyqtSignal(str)          # Mensaje de error si la función lanza una excepción
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            print("Error en el análisis en segundo plano:", e)
+            self.failed.emit(str(e))
+            return
+        self.resultReady.emit(result)
@@ -0,0 +1,152 @@
+# logic/follow_encode.py
+"""
+Modo "seguir render": codifica una secuencia de imágenes mientras se está generando.
+
+FFmpeg lee las imágenes por una tubería (-f image2pipe) y un hilo se las
+envía en orden a medida que aparecen en la carpeta. Antes de enviar una
+imagen se comprueba que el archivo está completo (PNG terminado en el bloque
+IEND, JPEG terminado en el marcador FFD9), así que no importa que el render
+la esté escribiendo todavía. La codificación termina al llegar al número de
+frames esperado o, si no se conoce, cuando pasa 'idle_timeout' segundos sin
+imágenes nuevas; con un número esperado, agotar la espera es un error.
+Así el vídeo está listo segundos después de la última imagen.
+
+Con audio, la imagen se codifica primero sin audio y después se multiplexa
+con -c:v copy (y la cola negra de "Priorizar audio", si hace falta), como en
+logic/image_render.py.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from logic.ffmpeg_logic import (
+    get_unique_filename, get_image_sequence_info, get_output_extension, build_video_codec_args
+)
+from logic.image_render import parse_fps, pipe_fade_filter, image_pipe_command, piped_audio_stages
+
+
+DEFAULT_IDLE_TIMEOUT = 60.0   # Segundos sin imágenes nuevas para dar el render por terminado
+POLL_INTERVAL = 0.25          # Segundos entre comprobaciones de la carpeta
+
+PNG_END = b"IEND\xaeB`\x82"
+JPEG_END = b"\xff\xd9"
+
+
+def is_complete_image(file_path):
+    """True si el archivo PNG/JPEG está escrito por completo (termina en su marcador de fin)."""
+    try:
+        with open(file_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size < 16:
+                return False
+            f.seek(size - 16)
+            tail = f.read()
+    except OSError:
+        return False
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".png":
+        return tail.endswith(PNG_END)
+    return tail.rstrip(b"\x00").endswith(JPEG_END)
+
+
+def follow_frames(sequence, expected_count=None, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                  stop_event=None, on_frame=None):
+    """
+    Generador con el contenido de cada imagen de la secuencia, en orden,
+    esperando a que cada una exista y esté completa. Termina al llegar a
+    'expected_count' imágenes, tras 'idle_timeout' segundos sin una nueva o
+    al activarse 'stop_event'. Si se esperaba 'expected_count' y no se llega,
+    el tiempo de espera es un error (el vídeo quedaría truncado).
+    'on_frame(n)' se llama tras enviar cada imagen.
+    """
+    folder = os.path.dirname(sequence["pattern"])
+    number = sequence["start_number"]
+    count = 0
+    last_frame_at = time.monotonic()
+
+    while expected_count is None or count < expected_count:
+        if stop_event is not None and stop_event.is_set():
+            return
+        name = f"{sequence['prefix']}{number:0{sequence['width']}d}{sequence['ext']}"
+        path = os.path.join(folder, name)
+        if is_complete_image(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            yield data
+            count += 1
+            number += 1
+            last_frame_at = time.monotonic()
+            if on_frame:
+                on_frame(count)
+            continue
+
+        if time.monotonic() - last_frame_at > idle_timeout:
+            if count == 0:
+                raise RuntimeError(f"No apareció la imagen {name}.")
+            if expected_count is not None:
+                # El vídeo quedaría truncado y sin el fundido de salida planificado
+                raise RuntimeError(
+                    f"Render incompleto: {count} de {expected_count} imágenes; "
+                    f"{idle_timeout:.0f} s esperando {name}."
+                )
+            print(f"Seguimiento terminado: {idle_timeout:.0f} s sin imágenes nuevas tras {name}.")
+            return
+        time.sleep(POLL_INTERVAL)
+
+
+def follow_images_job(folder_path, fps, audio_path=None, user_format="mp4 (H.264 8-bit)", crf="19",
+                      fade_in_duration=1, fade_out_duration=1, pix_fmt=None, prioritize_audio=False,
+                      audio_filter=None, expected_count=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Planifica la codificación en modo seguimiento para FFmpegPipelineWorker.
+    Necesita que exista al menos la primera imagen para conocer el patrón de nombres.
+    El fundido de salida solo se aplica si se conoce 'expected_count'.
+    Retorna un dict con stages, output_file, cleanup_files y stop_event (para
+    dejar de esperar imágenes al cancelar); o None si no hay secuencia.
+    """
+    sequence = get_image_sequence_info(folder_path)
+    if not sequence:
+        return None
+
+    fps_val = parse_fps(fps)
+    extension = get_output_extension(user_format)
+    output_file = get_unique_filename(os.path.join(folder_path, f"{sequence['prefix']}video.{extension}"))
+    codec_args = build_video_codec_args(user_format, crf, pix_fmt)
+
+    fade_filter = pipe_fade_filter(expected_count, fps_val, fade_in_duration, fade_out_duration)
+
+    stop_event = threading.Event()
+    sent = {"frames": 0}
+    cleanup_files = []
+    if audio_path:
+        temp_dir = tempfile.mkdtemp(prefix="follow_")
+        cleanup_files.append(temp_dir)
+        video_path = os.path.join(temp_dir, f"video.{extension}")
+    else:
+        video_path = output_file
+
+    def on_frame(count):
+        sent["frames"] = count
+
+    encode_step = {
+        "command": image_pipe_command(sequence["ext"], fps, codec_args, fade_filter, video_path),
+        "stdin": lambda: follow_frames(sequence, expected_count, idle_timeout, stop_event, on_frame),
+        "total_frames": expected_count or 0,
+        "weight": expected_count or 100,
+    }
+    stages = [[encode_step]]
+    if not audio_path:
+        return {"stages": stages, "output_file": output_file, "cleanup_files": cleanup_files,
+                "stop_event": stop_event}
+
+    # La cola negra de "Priorizar audio" solo se conoce al terminar el seguimiento
+    stages.extend(piped_audio_stages(
+        video_path, temp_dir, audio_path, output_file, extension, fps, codec_args,
+        prioritize_audio, audio_filter, frame_count=lambda: sent["frames"],
+        total_frames=expected_count or 0,
+    ))
+    return {"stages": stages, "output_file": output_file, "cleanup_files": cleanup_files,
+            "stop_event": stop_event}
@@ -0,0 +1,184 @@
+# logic/frame_index.py
+"""
+Índice de fotogramas clave y timestamps (PTS) de cada fotograma de un vídeo.
+
+El índice se construye una sola vez con ffprobe leyendo los paquetes del
+primer stream de vídeo (sin decodificar) y se guarda de forma compacta
+(arrays de doubles) en la caché de disco, indexado por la identidad del
+archivo. Permite:
+- Convertir un número de frame en su instante exacto, sin depender de los FPS.
+- Buscar el fotograma clave anterior a un instante para hacer input-seek y
+  decodificar solo desde ahí.
+
+Los tiempos se guardan relativos al start_time del contenedor, que es la
+referencia que usa FFmpeg para -ss.
+"""
+
+import os
+import struct
+import subprocess
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+
+from logic.media_cache import file_identity, cache_path
+from logic.metrics_exporter import REGISTRY
+
+
+_HEADER = struct.Struct("<4sII")  # firma, nº de frames, nº de fotogramas clave
+_MAGIC = b"FIX1"
+
+CREATE_NO_WINDOW = 0x08000000 if sys.platform.startswith("win") else 0
+
+_index_cache = {}
+_index_cache_lock = threading.Lock()
+
+
+class FrameIndex:
+    """
+    Timestamps (en segundos, orden de presentación) de todos los fotogramas
+    y de los fotogramas clave de un vídeo.
+    """
+
+    def __init__(self, frame_times, keyframe_times):
+        self.frame_times = frame_times
+        self.keyframe_times = keyframe_times
+
+    @property
+    def frame_count(self):
+        return len(self.frame_times)
+
+    def frame_time(self, frame_number):
+        """Instante del frame 'frame_number' (limitado al rango válido)."""
+        if not self.frame_times:
+            return 0.0
+        frame_number = min(max(0, int(frame_number)), len(self.frame_times) - 1)
+        return self.frame_times[frame_number]
+
+    def frame_at(self, seconds):
+        """Número del frame que se muestra en el instante 'seconds'."""
+        return max(0, bisect_right(self.frame_times, seconds + 1e-6) - 1)
+
+    def keyframe_before(self, seconds):
+        """Instante del último fotograma clave en o antes de 'seconds' (0.0 si no hay)."""
+        position = bisect_right(self.keyframe_times, seconds + 1e-6)
+        return self.keyframe_times[position - 1] if position else 0.0
+
+    def keyframe_after(self, seconds):
+        """Instante del primer fotograma clave en o después de 'seconds' (None si no hay)."""
+        position = bisect_right(self.keyframe_times, seconds - 1e-6)
+        return self.keyframe_times[position] if position < len(self.keyframe_times) else None
+
+    def save(self, path):
+        """Guarda el índice en binario (cabecera + arrays de doubles little-endian)."""
+        frames, keys = array("d", self.frame_times), array("d", self.keyframe_times)
+        if sys.byteorder != "little":
+            frames.byteswap()
+            keys.byteswap()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(frames), len(keys)))
+            frames.tofile(f)
+            keys.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Carga un índice guardado con save(); devuelve None si no existe o no es válido."""
+        try:
+            with open(path, "rb") as f:
+                magic, n_frames, n_keys = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return None
+                frames, keys = array("d"), array("d")
+                frames.fromfile(f, n_frames)
+                keys.fromfile(f, n_keys)
+        except (OSError, EOFError, struct.error):
+            return None
+        if sys.byteorder != "little":
+            frames.byteswap()
+            keys.byteswap()
+        return cls(frames, keys)
+
+
+def probe_frame_index(video_path):
+    """
+    Construye el índice leyendo con ffprobe los paquetes del primer stream de vídeo.
+    Los paquetes llegan en orden de decodificación, así que los PTS se ordenan.
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "format=start_time:packet=pts_time,dts_time,flags",
+        "-of", "csv=p=0",
+        video_path,
+    ]
+    REGISTRY.ffprobe_call(cache_hit=False)
+    output = subprocess.check_output(command, universal_newlines=True, creationflags=CREATE_NO_WINDOW)
+
+    frames, keys = [], []
+    start_time = 0.0
+    for line in output.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) == 1:
+            # Línea de format=start_time
+            try:
+                start_time = float(fields[0])
+            except ValueError:
+                pass
+            continue
+        if len(fields) < 3:
+            continue
+        pts, dts, flags = fields[0], fields[1], fields[2]
+        if "D" in flags:
+            # Paquetes marcados para descartar: no se muestran como frame
+            continue
+        try:
+            value = float(pts if pts not in ("", "N/A") else dts)
+        except ValueError:
+            continue
+        frames.append(value)
+        if "K" in flags:
+            keys.append(value)
+
+    frames.sort()
+    keys.sort()
+    return FrameIndex(
+        array("d", (t - start_time for t in frames)),
+        array("d", (t - start_time for t in keys)),
+    )
+
+
+def get_frame_index(video_path):
+    """
+    Devuelve el FrameIndex de un vídeo, usando la caché en memoria y en disco.
+    Retorna None si el vídeo no se puede analizar.
+    """
+    identity = file_identity(video_path)
+    if identity is None:
+        return None
+
+    with _index_cache_lock:
+        cached = _index_cache.get(identity)
+    if cached is not None:
+        REGISTRY.ffprobe_call(cache_hit=True)
+        return cached
+
+    index_path = cache_path("frame_index", identity, (), "fidx")
+    index = FrameIndex.load(index_path)
+    if index is not None:
+        REGISTRY.ffprobe_call(cache_hit=True)
+    else:
+        try:
+            index = probe_frame_index(video_path)
+        except Exception as e:
+            print("Error construyendo el índice de fotogramas:", e)
+            return None
+        if not index.frame_count:
+            return None
+        index.save(index_path)
+
+    with _index_cache_lock:
+        _index_cache[identity] = index
+    return index
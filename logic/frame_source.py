@@ -0,0 +1,258 @@
+# logic/frame_source.py
+"""
+Codificar fotogramas generados en Python sin pasar por archivos de imagen.
+
+Los fotogramas (arrays de NumPy o cualquier objeto con protocolo de buffer:
+bytes, bytearray, array.array...) se envían a FFmpeg como vídeo crudo
+(-f rawvideo) por la entrada estándar, con los mismos ajustes de formato, CRF,
+pix_fmt, fundidos y audio que la pestaña Imágenes. Así se evita codificar y
+decodificar un PNG por fotograma.
+
+Cada fotograma se escribe con un memoryview sobre su propio buffer, sin
+copiarlo (solo los arrays no contiguos se copian una vez). La escritura se
+bloquea mientras FFmpeg no consume, así que el iterador solo avanza al ritmo
+del codificador y la memoria usada no crece con la duración del vídeo.
+
+Uso desde un script:
+
+    from logic.frame_source import encode_frames
+    output_file, error = encode_frames(frames, "salida.mp4", fps=30, frame_count=300)
+
+'frames_to_video_job' devuelve las mismas etapas para FFmpegPipelineWorker.
+"""
+
+import collections
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+from logic.ffmpeg_logic import get_output_extension, build_video_codec_args
+from logic.image_render import parse_fps, pipe_fade_filter, piped_audio_stages
+
+
+CREATE_NO_WINDOW = 0x08000000 if sys.platform.startswith("win") else 0
+
+_LE = sys.byteorder == "little"
+
+# (bytes por canal, canales) -> pix_fmt de entrada de FFmpeg
+RAW_PIX_FMTS = {
+    (1, 1): "gray",
+    (1, 3): "rgb24",
+    (1, 4): "rgba",
+    (2, 1): "gray16le",
+    (2, 3): "rgb48le",
+    (2, 4): "rgba64le",
+}
+
+
+def frame_view(frame):
+    """memoryview de bytes ('B') del fotograma; solo copia si no es contiguo."""
+    view = memoryview(frame)
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())
+    return view.cast("B")
+
+
+def raw_frame_format(frame):
+    """
+    Deduce (ancho, alto, pix_fmt) de un fotograma con forma (alto, ancho) o
+    (alto, ancho, canales) y tipo uint8/uint16, como los arrays de NumPy.
+    Retorna (formato, mensaje_error).
+    """
+    view = memoryview(frame)
+    if view.ndim not in (2, 3):
+        return None, "El fotograma debe tener forma (alto, ancho) o (alto, ancho, canales); indica width, height e input_pix_fmt."
+    code = view.format.lstrip("@=")
+    if code in ("B", "<B", ">B"):
+        depth = 1
+    elif code in ("H", "<H", ">H"):
+        depth = 2
+        if code == ">H" or (code == "H" and not _LE):
+            return None, "Los fotogramas de 16 bits deben estar en little-endian."
+    else:
+        return None, f"Tipo de dato no admitido ({view.format}); convierte a uint8 o uint16."
+    height, width = view.shape[0], view.shape[1]
+    channels = view.shape[2] if view.ndim == 3 else 1
+    pix_fmt = RAW_PIX_FMTS.get((depth, channels))
+    if pix_fmt is None:
+        return None, f"Número de canales no admitido: {channels}."
+    return (width, height, pix_fmt), ""
+
+
+def raw_frames(frames, frame_bytes, on_frame=None):
+    """
+    Generador de memoryviews (uno por fotograma) para la entrada de FFmpeg.
+    Si se conoce 'frame_bytes', comprueba que todos los fotogramas lo ocupen.
+    """
+    for count, frame in enumerate(frames, start=1):
+        view = frame_view(frame)
+        if frame_bytes is not None and view.nbytes != frame_bytes:
+            raise ValueError(
+                f"El fotograma {count} ocupa {view.nbytes} bytes y se esperaban {frame_bytes}."
+            )
+        yield view
+        if on_frame:
+            on_frame(count)
+
+
+def rawvideo_command(width, height, input_pix_fmt, fps, codec_args, fade_filter, output_path):
+    """Codifica sin audio el vídeo crudo que recibe por la entrada estándar."""
+    command = [
+        "ffmpeg", "-y",
+        "-f", "rawvideo",
+        "-pix_fmt", input_pix_fmt,
+        "-s", f"{width}x{height}",
+        "-framerate", str(fps),
+        "-i", "-",
+    ]
+    command.extend(codec_args)
+    if fade_filter:
+        command.extend(["-vf", fade_filter])
+    command.extend(["-an", output_path])
+    return command
+
+
+def frames_to_video_job(frames, output_file, fps, width=None, height=None, input_pix_fmt=None,
+                        frame_count=None, audio_path=None, user_format="mp4 (H.264 8-bit)", crf="19",
+                        fade_in_duration=1, fade_out_duration=1, pix_fmt=None, prioritize_audio=False,
+                        audio_filter=None):
+    """
+    Planifica la codificación de un iterador de fotogramas para FFmpegPipelineWorker.
+    Sin 'width', 'height' e 'input_pix_fmt' se deducen del primer fotograma.
+    El fundido de salida solo se aplica si se conoce 'frame_count'.
+    El iterador solo se puede consumir una vez.
+    Retorna (trabajo, mensaje_error); el trabajo es un dict con stages,
+    output_file y cleanup_files.
+    """
+    frames = iter(frames)
+    if not (width and height and input_pix_fmt):
+        try:
+            first = next(frames)
+        except StopIteration:
+            return None, "No hay fotogramas."
+        frame_format, error = raw_frame_format(first)
+        if frame_format is None:
+            return None, error
+        width, height, input_pix_fmt = frame_format
+        frames = itertools.chain([first], frames)
+    # Con un pix_fmt indicado a mano que no está en la tabla (bgr24, yuv420p...) no se valida el tamaño
+    layout = next((key for key, value in RAW_PIX_FMTS.items() if value == input_pix_fmt), None)
+    frame_bytes = width * height * layout[0] * layout[1] if layout else None
+
+    fps_val = parse_fps(fps)
+    extension = get_output_extension(user_format)
+    codec_args = build_video_codec_args(user_format, crf, pix_fmt)
+    fade_filter = pipe_fade_filter(frame_count, fps_val, fade_in_duration, fade_out_duration)
+
+    sent = {"frames": 0}
+    cleanup_files = []
+    if audio_path:
+        temp_dir = tempfile.mkdtemp(prefix="frames_")
+        cleanup_files.append(temp_dir)
+        video_path = os.path.join(temp_dir, f"video.{extension}")
+    else:
+        video_path = output_file
+
+    def on_frame(count):
+        sent["frames"] = count
+
+    stages = [[{
+        "command": rawvideo_command(width, height, input_pix_fmt, fps, codec_args, fade_filter, video_path),
+        "stdin": lambda: raw_frames(frames, frame_bytes, on_frame),
+        "total_frames": frame_count or 0,
+        "weight": frame_count or 100,
+    }]]
+    if audio_path:
+        stages.extend(piped_audio_stages(
+            video_path, temp_dir, audio_path, output_file, extension, fps, codec_args,
+            prioritize_audio, audio_filter, frame_count=lambda: sent["frames"],
+            total_frames=frame_count or 0,
+        ))
+    return {"stages": stages, "output_file": output_file, "cleanup_files": cleanup_files}, ""
+
+
+def run_piped_step(command, stdin_source=None):
+    """
+    Ejecuta un comando FFmpeg escribiendo 'stdin_source' en su entrada desde este
+    hilo (la escritura bloquea mientras FFmpeg no consume). Retorna (ok, error).
+    """
+    print(" ".join(command))
+    proc = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if stdin_source is not None else subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        creationflags=CREATE_NO_WINDOW
+    )
+    # stderr se vacía en otro hilo para que FFmpeg nunca se bloquee escribiendo en él
+    last_lines = collections.deque(maxlen=5)
+    drain = threading.Thread(
+        target=lambda: last_lines.extend(
+            line.decode("utf-8", "replace").strip() for line in proc.stderr
+        ),
+        daemon=True,
+    )
+    drain.start()
+
+    feed_error = None
+    if stdin_source is not None:
+        try:
+            for chunk in stdin_source:
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, OSError):
+            pass  # FFmpeg terminó antes: se informa por su código de retorno
+        except Exception as e:
+            feed_error = str(e)
+            proc.kill()
+        finally:
+            close = getattr(stdin_source, "close", None)
+            if close:
+                close()
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    retcode = proc.wait()
+    drain.join()
+    if feed_error:
+        return False, feed_error
+    if retcode != 0:
+        return False, "\n".join(last_lines)
+    return True, ""
+
+
+def encode_frames(frames, output_file, fps, **options):
+    """
+    Codifica un iterador de fotogramas en 'output_file' en este mismo hilo.
+    Acepta las mismas opciones que frames_to_video_job.
+    Retorna (output_file, mensaje_error); output_file es None si falla.
+    """
+    job, error = frames_to_video_job(frames, output_file, fps, **options)
+    if job is None:
+        return None, error
+
+    try:
+        for stage in job["stages"]:
+            for step in stage:
+                command = step["command"]() if callable(step["command"]) else step["command"]
+                if not command:
+                    continue
+                stdin_source = step["stdin"]() if step.get("stdin") else None
+                ok, error = run_piped_step(command, stdin_source)
+                if not ok:
+                    print("Error codificando los fotogramas:", error)
+                    if os.path.exists(output_file):
+                        os.remove(output_file)
+                    return None, error
+                if step.get("on_success"):
+                    step["on_success"]()
+    finally:
+        for path in job["cleanup_files"]:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+    return output_file, ""
@@ -0,0 +1,473 @@
+# logic/image_render.py
+"""
+Conversión de secuencias de imágenes a vídeo separando imagen y audio.
+
+La codificación de la secuencia (lo caro) se hace sin audio y el audio se
+multiplexa después con -c:v copy. Sin audio, la imagen se codifica directamente
+en la salida; con audio, el vídeo intermedio se escribe junto a la salida y se
+borra al terminar.
+
+Opcionalmente ('cache_video') el vídeo sin audio se guarda en la caché de disco,
+indexado por la identidad de la secuencia (nombre, tamaño y mtime de cada
+imagen) y los parámetros que afectan a la imagen: FPS, formato, CRF, pix_fmt y
+fundidos. Así cambiar la música (o la opción "Priorizar audio") de una
+secuencia ya codificada solo cuesta un remux, a cambio de guardar una copia
+más del vídeo. Las carpetas de vídeo de la caché (RENDER_CACHE_SUBDIRS) tienen
+un tamaño máximo: al terminar cada conversión se borran las entradas usadas
+hace más tiempo (logic/media_cache.py).
+
+Con "Priorizar audio" el vídeo se alarga hasta el final del audio con una cola
+negra codificada aparte con los mismos ajustes y concatenada sin recodificar.
+
+Modo paralelo: la secuencia se divide en rangos contiguos por número de frame
+(-start_number / -frames:v) que se codifican a la vez con el mismo CRF y se
+empalman con el demuxer concat. Cada pieza es una codificación independiente,
+así que empieza con un fotograma clave y ningún GOP cruza una frontera; los
+fundidos se calculan sobre la línea de tiempo global.
+
+Modo incremental: la imagen se codifica por tramos de CHUNK_FRAMES fotogramas
+(cada tramo es un GOP cerrado que empieza en fotograma clave). Cada tramo se
+guarda en la caché indexado por el hash del contenido de sus imágenes, los
+ajustes del codificador y los fundidos que le afectan; al volver a renderizar
+una secuencia en la que solo cambiaron algunas imágenes, solo se recodifican
+los tramos que las contienen y el resto se empalma con copia de streams.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+from logic.ffmpeg_logic import (
+    get_unique_filename, get_image_sequence_info, get_output_extension, build_video_codec_args,
+    build_fade_filter, get_audio_duration, get_video_resolution, audio_codec_args,
+    write_concat_file, AUDIO_ENCODE_ARGS
+)
+from logic.media_cache import cache_path, file_identity, touch_cache_entry, trim_cache
+from logic.keyframe_plan import keyframe_codec_args, write_keyframe_sidecar
+from logic.segmented_encode import image_sequence_signature, split_frames, timeline_filters
+
+
+CHUNK_FRAMES = 120          # Fotogramas por tramo (un GOP) en el modo incremental
+HASH_BLOCK = 1024 * 1024    # Bytes leídos cada vez al calcular el hash de una imagen
+
+PIPE_CODECS = {".png": "png", ".jpg": "mjpeg", ".jpeg": "mjpeg"}  # Decodificador de image2pipe
+RENDER_CACHE_SUBDIRS = ("image_videos", "image_chunks", "black_tails")  # Limitadas con trim_cache
+
+
+def parse_fps(fps):
+    """FPS como float (30 si el valor no es válido)."""
+    try:
+        fps_val = float(fps)
+    except ValueError:
+        return 30.0
+    return fps_val if fps_val > 0 else 30.0
+
+
+def video_only_path(folder_path, sequence, fps, user_format, crf, pix_fmt, fade_in_duration, fade_out_duration,
+                    keyframes=None):
+    """Ruta en la caché de la codificación sin audio de la secuencia con estos parámetros."""
+    identity = (os.path.normcase(os.path.abspath(folder_path)),
+                repr(image_sequence_signature(folder_path, sequence["images"])))
+    params = (str(fps), user_format, str(crf), pix_fmt, float(fade_in_duration), float(fade_out_duration))
+    if keyframes:
+        params += (repr(sorted(keyframes.items())),)
+    return cache_path("image_videos", identity, params, get_output_extension(user_format))
+
+
+def black_tail_path(resolution, fps, codec_args, frames, extension):
+    """Ruta en la caché de una cola negra de 'frames' fotogramas."""
+    return cache_path("black_tails", (resolution, str(fps)), (*codec_args, frames), extension)
+
+
+def content_hash(file_path):
+    """Hash SHA-1 del contenido de un archivo."""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def frame_hashes(folder_path, images):
+    """
+    Hash del contenido de cada imagen de la secuencia. Los hashes se guardan en la
+    caché junto al tamaño y mtime de cada archivo, así que solo se vuelven a leer
+    las imágenes que han cambiado desde el render anterior.
+    """
+    store_path = cache_path("frame_hashes", os.path.normcase(os.path.abspath(folder_path)), (), "json")
+    try:
+        with open(store_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+
+    hashes, updated = [], {}
+    for name in images:
+        identity = file_identity(os.path.join(folder_path, name))
+        size, mtime = (identity[1], identity[2]) if identity else (None, None)
+        entry = stored.get(name)
+        if entry and entry[0] == size and entry[1] == mtime:
+            digest = entry[2]
+        else:
+            digest = content_hash(os.path.join(folder_path, name))
+        updated[name] = [size, mtime, digest]
+        hashes.append(digest)
+
+    if updated != stored:
+        tmp_path = store_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(updated, f)
+        os.replace(tmp_path, store_path)
+    return hashes
+
+
+def chunk_fade_filter(start, count, fps_val, video_duration, fade_in_duration, fade_out_duration, fade_filter):
+    """
+    Fundido global solo para los tramos que lo tocan; así los tramos intermedios
+    no dependen de la duración total y se reutilizan aunque la secuencia crezca.
+    """
+    if not fade_filter:
+        return None
+    chunk_start, chunk_end = start / fps_val, (start + count) / fps_val
+    if chunk_start < fade_in_duration or chunk_end > video_duration - fade_out_duration:
+        return fade_filter
+    return None
+
+
+def chunk_command(sequence, fps, start, count, codec_args, filters, output_path):
+    """Codifica 'count' imágenes a partir de la posición 'start' como un tramo independiente."""
+    command = [
+        "ffmpeg", "-y",
+        "-start_number", str(sequence["start_number"] + start),
+        "-framerate", str(fps),
+        "-i", sequence["pattern"],
+        "-frames:v", str(count),
+    ]
+    command.extend(codec_args)
+    if filters:
+        command.extend(["-vf", ",".join(filters)])
+    command.extend(["-an", output_path])
+    return command
+
+
+def range_video_steps(sequence, fps, codec_args, fade_in_duration, fade_out_duration, fade_filter,
+                      ranges, piece_path, keyframes=None):
+    """
+    Pasos que codifican cada rango (inicio, cantidad) de la secuencia como una
+    pieza independiente, con los fundidos y los fotogramas clave planificados
+    calculados sobre la línea de tiempo global. 'piece_path(inicio, cantidad,
+    filtros, args_codec)' da la ruta de cada pieza; las que ya existen no se
+    vuelven a codificar.
+    Retorna (pasos, rutas_de_las_piezas).
+    """
+    fps_val = parse_fps(fps)
+    video_duration = len(sequence["images"]) / fps_val
+    steps, paths = [], []
+    for start, count in ranges:
+        fade = chunk_fade_filter(start, count, fps_val, video_duration,
+                                 fade_in_duration, fade_out_duration, fade_filter)
+        filters = timeline_filters(start / fps_val, fade)
+        piece_args = codec_args + keyframe_codec_args(codec_args, keyframes, start / fps_val)
+        path = piece_path(start, count, filters, piece_args)
+        paths.append(path)
+        if os.path.isfile(path):
+            touch_cache_entry(path)
+            continue
+        extension = os.path.splitext(path)[1]
+        tmp_path = f"{path}.tmp{extension}"
+        steps.append({
+            "command": chunk_command(sequence, fps, start, count, piece_args, filters, tmp_path),
+            "total_frames": count,
+            "weight": count,
+            "on_success": lambda tmp_path=tmp_path, path=path: os.replace(tmp_path, path),
+        })
+    return steps, paths
+
+
+def splice_step(piece_paths, video_path, total_frames):
+    """
+    Paso que empalma las piezas en 'video_path' con el demuxer concat y copia de streams.
+    Retorna (paso, ruta_lista_concat).
+    """
+    fd, concat_list = tempfile.mkstemp(prefix="image_pieces_", suffix=".txt")
+    os.close(fd)
+    write_concat_file(concat_list, piece_paths)
+    extension = os.path.splitext(video_path)[1]
+    tmp_path = f"{video_path}.tmp{extension}"
+    step = {
+        "command": ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list,
+                    "-map", "0:v", "-c", "copy", tmp_path],
+        "total_frames": total_frames,
+        "weight": max(1, total_frames // 20),
+        "on_success": lambda: os.replace(tmp_path, video_path),
+    }
+    return step, concat_list
+
+
+def incremental_piece_path(folder_path, sequence, fps, user_format):
+    """
+    Rutas de las piezas del modo incremental: en la caché, indexadas por el hash
+    del contenido de sus imágenes, los ajustes del codificador y sus filtros.
+    """
+    hashes = frame_hashes(folder_path, sequence["images"])
+    extension = get_output_extension(user_format)
+
+    def piece_path(start, count, filters, codec_args):
+        return cache_path("image_chunks", tuple(hashes[start:start + count]),
+                          (str(fps), *codec_args, *filters), extension)
+    return piece_path
+
+
+def parallel_ranges(num_images, workers):
+    """Divide la secuencia en 'workers' rangos contiguos de tamaño parecido."""
+    return split_frames(num_images, math.ceil(num_images / max(1, workers)))
+
+
+def video_only_command(sequence, fps, codec_args, fade_filter, output_path):
+    """Codifica la secuencia completa sin audio."""
+    command = [
+        "ffmpeg", "-y",
+        "-start_number", str(sequence["start_number"]),
+        "-framerate", str(fps),
+        "-i", sequence["pattern"],
+    ]
+    command.extend(codec_args)
+    if fade_filter:
+        command.extend(["-vf", fade_filter])
+    command.extend(["-an", output_path])
+    return command
+
+
+def pipe_fade_filter(frame_count, fps_val, fade_in_duration, fade_out_duration):
+    """
+    Fundidos de una codificación desde tubería: el de salida solo se puede
+    situar si se conoce de antemano el número de fotogramas.
+    """
+    if frame_count:
+        return build_fade_filter(frame_count / fps_val, fade_in_duration, fade_out_duration)
+    return f"fade=t=in:st=0:d={fade_in_duration}" if fade_in_duration > 0 else None
+
+
+def image_pipe_command(ext, fps, codec_args, fade_filter, output_path):
+    """Codifica sin audio las imágenes 'ext' que recibe por la entrada estándar (image2pipe)."""
+    codec = PIPE_CODECS.get(ext.lower(), "png")
+    command = [
+        "ffmpeg", "-y",
+        "-f", "image2pipe",
+        "-framerate", str(fps),
+        "-c:v", codec,
+        "-i", "-",
+    ]
+    command.extend(codec_args)
+    if fade_filter:
+        command.extend(["-vf", fade_filter])
+    command.extend(["-an", output_path])
+    return command
+
+
+def black_tail_command(resolution, fps, frames, codec_args, output_path):
+    """Codifica 'frames' fotogramas negros con los mismos ajustes que la secuencia."""
+    return [
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", f"color=c=black:s={resolution}:r={fps}",
+        "-frames:v", str(frames),
+        *codec_args,
+        "-an", output_path,
+    ]
+
+
+def mux_audio_command(video_input, audio_path, output_file, output_format, prioritize_audio=False,
+                      audio_filter=None):
+    """
+    Salida final: copia el vídeo ('video_input' son los argumentos de entrada,
+    un archivo o una lista concat) y añade el audio, copiándolo si el contenedor
+    lo admite y no hay que filtrarlo.
+    """
+    command = ["ffmpeg", "-y", *video_input]
+    if not audio_path:
+        return command + ["-map", "0:v", "-c", "copy", output_file]
+
+    command.extend(["-i", audio_path, "-map", "0:v", "-map", "1:a:0", "-c:v", "copy"])
+    if audio_filter:
+        command.extend(["-af", audio_filter, *AUDIO_ENCODE_ARGS])
+    else:
+        command.extend(audio_codec_args(audio_path, output_format))
+    if not prioritize_audio:
+        command.append("-shortest")
+    command.append(output_file)
+    return command
+
+
+def piped_audio_stages(video_path, work_dir, audio_path, output_file, output_format, fps, codec_args,
+                       prioritize_audio=False, audio_filter=None, frame_count=None, total_frames=0):
+    """
+    Etapas que añaden el audio a un vídeo codificado desde una tubería, cuya
+    duración y resolución solo se conocen al terminar. Los comandos se generan
+    al ejecutarse: 'frame_count()' devuelve los fotogramas codificados y, con
+    "Priorizar audio", se añade una cola negra en 'work_dir' si el audio es más largo.
+    """
+    fps_val = parse_fps(fps)
+    tail_path = os.path.join(work_dir, f"tail.{output_format}")
+    concat_list = os.path.join(work_dir, "video.txt")
+
+    def tail_command():
+        if not prioritize_audio:
+            return []
+        padding = get_audio_duration(audio_path) - frame_count() / fps_val
+        frames = math.ceil(padding * fps_val) if padding > 0 else 0
+        resolution = get_video_resolution(video_path)
+        if not frames or not resolution:
+            return []
+        write_concat_file(concat_list, [video_path, tail_path])
+        return black_tail_command(resolution, fps, frames, codec_args, tail_path)
+
+    def mux_command():
+        if os.path.isfile(tail_path):
+            video_input = ["-f", "concat", "-safe", "0", "-i", concat_list]
+        else:
+            video_input = ["-i", video_path]
+        return mux_audio_command(video_input, audio_path, output_file, output_format,
+                                 prioritize_audio, audio_filter)
+
+    return [
+        [{"command": tail_command, "weight": 1}],
+        [{
+            "command": mux_command,
+            "total_frames": total_frames,
+            "weight": max(1, (total_frames or 100) // 20),
+        }],
+    ]
+
+
+def convert_images_job(folder_path, fps, audio_path=None, user_format="mp4 (H.264 8-bit)",
+                       crf="19", fade_in_duration=1, fade_out_duration=1, pix_fmt=None,
+                       prioritize_audio=False, audio_filter=None, incremental=False, workers=1,
+                       keyframes=None, cache_video=False):
+    """
+    Planifica la conversión de la secuencia de 'folder_path' para FFmpegPipelineWorker.
+    Con 'incremental' la imagen se codifica por tramos reutilizables (ver arriba).
+    Con 'workers' > 1 (y sin incremental) la secuencia se divide en 'workers'
+    rangos contiguos que se codifican a la vez y se empalman con copia de streams;
+    el worker debe ejecutarse con max_parallel=workers.
+    Con 'keyframes' (ver logic/keyframe_plan.py) la imagen se codifica con GOPs
+    cerrados y fotogramas clave en los instantes planificados, y el plan se
+    guarda junto a la salida.
+    Con 'cache_video' el vídeo sin audio se guarda en la caché (ver arriba).
+    Retorna un dict con stages, output_file, cached (True si la imagen ya estaba
+    codificada en la caché), cleanup_files y, en modo incremental, total_chunks y
+    encoded_chunks; o None si no hay secuencia válida.
+    """
+    sequence = get_image_sequence_info(folder_path)
+    if not sequence:
+        return None
+
+    fps_val = parse_fps(fps)
+    num_images = len(sequence["images"])
+    video_duration = num_images / fps_val
+    extension = get_output_extension(user_format)
+    output_file = get_unique_filename(os.path.join(folder_path, f"{sequence['prefix']}video.{extension}"))
+
+    codec_args = build_video_codec_args(user_format, crf, pix_fmt)
+    fade_filter = build_fade_filter(video_duration, fade_in_duration, fade_out_duration)
+
+    encode_steps, splice_steps, cleanup_files, splice_paths = [], [], [], []
+    total_chunks = encoded_chunks = 0
+    cached = False
+    if cache_video:
+        video_path = video_only_path(folder_path, sequence, fps, user_format, crf, pix_fmt,
+                                     fade_in_duration, fade_out_duration, keyframes)
+        cached = os.path.isfile(video_path)
+        if cached:
+            touch_cache_entry(video_path)
+    elif audio_path:
+        # Intermedio en el mismo disco que la salida; se borra al terminar
+        video_path = f"{os.path.splitext(output_file)[0]}.video.tmp.{extension}"
+        cleanup_files.append(video_path)
+    else:
+        video_path = output_file
+    if not cached and (incremental or workers > 1):
+        if incremental:
+            ranges = split_frames(num_images, CHUNK_FRAMES)
+            piece_path = incremental_piece_path(folder_path, sequence, fps, user_format)
+        else:
+            ranges = parallel_ranges(num_images, workers)
+            pieces_dir = tempfile.mkdtemp(prefix="image_pieces_")
+            cleanup_files.append(pieces_dir)
+
+            def piece_path(start, count, filters, piece_args):
+                return os.path.join(pieces_dir, f"piece_{start:08d}.{extension}")
+
+        piece_steps, piece_paths = range_video_steps(
+            sequence, fps, codec_args, fade_in_duration, fade_out_duration, fade_filter, ranges, piece_path,
+            keyframes
+        )
+        splice_paths = piece_paths
+        step, concat_list = splice_step(piece_paths, video_path, num_images)
+        encode_steps.extend(piece_steps)
+        splice_steps.append(step)
+        cleanup_files.append(concat_list)
+        if incremental:
+            total_chunks, encoded_chunks = len(ranges), len(piece_steps)
+    elif not cached:
+        tmp_path = f"{video_path}.tmp.{extension}"
+        encode_steps.append({
+            "command": video_only_command(sequence, fps, codec_args + keyframe_codec_args(codec_args, keyframes),
+                                          fade_filter, tmp_path),
+            "total_frames": num_images,
+            "weight": num_images,
+            "on_success": lambda: os.replace(tmp_path, video_path),
+        })
+
+    video_input = ["-i", video_path]
+    tail_frames = 0
+    if audio_path and prioritize_audio:
+        padding = get_audio_duration(audio_path) - video_duration
+        tail_frames = math.ceil(padding * fps_val) if padding > 0 else 0
+    if tail_frames:
+        resolution = get_video_resolution(os.path.join(folder_path, sequence["images"][0]))
+        if resolution:
+            tail_args = codec_args + keyframe_codec_args(codec_args, keyframes, video_duration)
+            tail_path = black_tail_path(resolution, fps, tail_args, tail_frames, extension)
+            if os.path.isfile(tail_path):
+                touch_cache_entry(tail_path)
+            else:
+                tail_tmp = f"{tail_path}.tmp.{extension}"
+                encode_steps.append({
+                    "command": black_tail_command(resolution, fps, tail_frames, tail_args, tail_tmp),
+                    "total_frames": tail_frames,
+                    "weight": max(1, tail_frames // 4),
+                    "on_success": lambda: os.replace(tail_tmp, tail_path),
+                })
+            fd, concat_list = tempfile.mkstemp(prefix="image_render_", suffix=".txt")
+            os.close(fd)
+            write_concat_file(concat_list, [video_path, tail_path])
+            cleanup_files.append(concat_list)
+            video_input = ["-f", "concat", "-safe", "0", "-i", concat_list]
+        else:
+            tail_frames = 0
+
+    mux_steps = []
+    if video_path != output_file:
+        mux_steps.append({
+            "command": mux_audio_command(video_input, audio_path, output_file, extension,
+                                         prioritize_audio, audio_filter),
+            "total_frames": num_images + tail_frames,
+            "weight": max(1, num_images // 20),
+        })
+    stages = [stage for stage in (encode_steps, splice_steps, mux_steps) if stage]
+    if keyframes:
+        stages.append([{"callable": lambda: write_keyframe_sidecar(output_file, keyframes), "weight": 0}])
+    if cache_video or incremental or tail_frames:
+        # Las entradas de esta conversión son las más recientes y no se borran
+        in_use = [video_path, *splice_paths] + ([tail_path] if tail_frames else [])
+        stages.append([{"callable": lambda: trim_cache(RENDER_CACHE_SUBDIRS, keep=in_use), "weight": 0}])
+    return {
+        "stages": stages,
+        "output_file": output_file,
+        "cached": cached,
+        "cleanup_files": cleanup_files,
+        "total_chunks": total_chunks,
+        "encoded_chunks": encoded_chunks,
+    }
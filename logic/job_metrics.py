@@ -0,0 +1,244 @@
+# logic/job_metrics.py
+"""
+Módulo que recoge métricas de recursos por tarea FFmpeg:
+- Tiempo total (sin contar pausas), espera en cola y tiempo de CPU (usuario/sistema) del proceso hijo.
+- Pico de memoria (RSS) muestreado desde /proc/<pid> y bytes leídos/escritos.
+- FPS medio y final, factor 'speed=' y tamaño del archivo de salida.
+
+Las métricas de cada tarea se acumulan en un registro de sesión que puede
+exportarse a CSV para dimensionar máquinas y detectar regresiones.
+"""
+
+import os
+import re
+import csv
+import time
+import threading
+
+
+PROC_SAMPLE_INTERVAL = 0.5  # Segundos mínimos entre lecturas de /proc/<pid>
+
+METRICS_FIELDS = [
+    "operation", "output_file", "status", "queue_wait", "wall_time", "paused_time",
+    "cpu_user", "cpu_sys", "peak_rss_kb", "frames", "avg_fps", "final_fps",
+    "speed", "bytes_read", "bytes_written", "output_size",
+]
+
+_FPS_RE = re.compile(r"fps=\s*([\d.]+)")
+_SPEED_RE = re.compile(r"speed=\s*([\d.]+)x")
+_FRAME_RE = re.compile(r"frame=\s*(\d+)")
+
+_session_metrics = []
+_session_lock = threading.Lock()
+
+
+class JobMetrics:
+    """
+    Acumula las métricas de una tarea desde que se encola hasta que termina.
+    Todos los valores que no se puedan obtener en la plataforma actual quedan en None.
+    """
+
+    def __init__(self, operation, output_file):
+        self.operation = operation
+        self.output_file = output_file
+        self.status = ""
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.paused_time = 0.0
+        self.cpu_user = None
+        self.cpu_sys = None
+        self.peak_rss_kb = None
+        self.frames = 0
+        self.final_fps = None
+        self.speed = None
+        self.bytes_read = None
+        self.bytes_written = None
+        self.output_size = None
+        self._last_sample = 0.0
+
+    def mark_started(self):
+        """Marca el inicio real del proceso FFmpeg (fin de la espera en cola)."""
+        self.started_at = time.monotonic()
+
+    def parse_progress_line(self, line):
+        """Extrae frame, fps y speed de una línea de progreso de FFmpeg."""
+        match = _FRAME_RE.search(line)
+        if match:
+            self.frames = int(match.group(1))
+        match = _FPS_RE.search(line)
+        if match:
+            self.final_fps = float(match.group(1))
+        match = _SPEED_RE.search(line)
+        if match:
+            self.speed = float(match.group(1))
+
+    def sample_process(self, pid, force=False):
+        """
+        Lee /proc/<pid>/status y /proc/<pid>/io para actualizar el pico de RSS
+        y los bytes leídos/escritos. Limita la frecuencia de lectura salvo que force=True.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sample < PROC_SAMPLE_INTERVAL:
+            return
+        self._last_sample = now
+
+        try:
+            with open(f"/proc/{pid}/status", "r", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        rss_kb = int(line.split()[1])
+                        self.peak_rss_kb = max(self.peak_rss_kb or 0, rss_kb)
+                        break
+        except (OSError, ValueError, IndexError):
+            pass
+
+        try:
+            with open(f"/proc/{pid}/io", "r", encoding="ascii") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key == "read_bytes":
+                        self.bytes_read = max(self.bytes_read or 0, int(value))
+                    elif key == "write_bytes":
+                        self.bytes_written = max(self.bytes_written or 0, int(value))
+        except (OSError, ValueError):
+            pass
+
+    def apply_rusage(self, usage):
+        """
+        Completa las métricas con el rusage devuelto por os.wait4 al terminar el proceso.
+        ru_maxrss está en KB en Linux; los bloques de E/S son de 512 bytes.
+        """
+        if usage is None:
+            return
+        self.cpu_user = usage.ru_utime
+        self.cpu_sys = usage.ru_stime
+        self.peak_rss_kb = max(self.peak_rss_kb or 0, int(usage.ru_maxrss))
+        self.bytes_read = max(self.bytes_read or 0, usage.ru_inblock * 512)
+        self.bytes_written = max(self.bytes_written or 0, usage.ru_oublock * 512)
+
+    def add_process(self, child):
+        """Acumula las métricas de uno de los procesos de una tarea de varios pasos."""
+        for field in ("cpu_user", "cpu_sys", "bytes_read", "bytes_written"):
+            value = getattr(child, field)
+            if value is not None:
+                setattr(self, field, (getattr(self, field) or 0) + value)
+        if child.peak_rss_kb:
+            self.peak_rss_kb = max(self.peak_rss_kb or 0, child.peak_rss_kb)
+        self.frames += child.frames
+        if child.final_fps is not None:
+            self.final_fps = child.final_fps
+        if child.speed is not None:
+            self.speed = child.speed
+
+    def finish(self, status):
+        """Cierra las métricas con el estado final y el tamaño de la salida."""
+        self.finished_at = time.monotonic()
+        self.status = status
+        if self.output_file and os.path.isfile(self.output_file):
+            self.output_size = os.path.getsize(self.output_file)
+
+    @property
+    def queue_wait(self):
+        start = self.started_at if self.started_at is not None else self.finished_at
+        if start is None:
+            return None
+        return start - self.queued_at
+
+    def active_time(self, now=None):
+        """Segundos de ejecución efectiva hasta 'now' (o hasta el final), descontando pausas."""
+        if self.started_at is None:
+            return None
+        end = now if now is not None else self.finished_at
+        if end is None:
+            end = time.monotonic()
+        return max(0.0, end - self.started_at - self.paused_time)
+
+    @property
+    def wall_time(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.active_time()
+
+    @property
+    def avg_fps(self):
+        wall = self.wall_time
+        if not wall or not self.frames:
+            return None
+        return self.frames / wall
+
+    def to_dict(self):
+        """Devuelve las métricas como diccionario con las claves de METRICS_FIELDS."""
+        return {field: getattr(self, field) for field in METRICS_FIELDS}
+
+
+def wait_with_rusage(proc):
+    """
+    Espera a que termine el proceso y devuelve (returncode, rusage).
+    En plataformas sin os.wait4 (Windows) el rusage es None.
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return proc.returncode, usage
+        except ChildProcessError:
+            pass
+    proc.wait()
+    return proc.returncode, None
+
+
+def format_metrics_summary(metrics):
+    """
+    Construye un resumen corto (una línea) de un diccionario de métricas
+    para mostrarlo en la lista de tareas.
+    """
+    parts = []
+    if metrics.get("wall_time") is not None:
+        parts.append(f"{metrics['wall_time']:.1f}s")
+    if metrics.get("avg_fps"):
+        parts.append(f"{metrics['avg_fps']:.1f} fps")
+    if metrics.get("speed"):
+        parts.append(f"{metrics['speed']:.2f}x")
+    if metrics.get("output_size"):
+        parts.append(f"{metrics['output_size'] / (1024 * 1024):.1f} MB")
+    return " · ".join(parts)
+
+
+def format_metrics_details(metrics):
+    """Construye un texto multilínea con todas las métricas (para tooltips)."""
+    lines = []
+    for field in METRICS_FIELDS:
+        value = metrics.get(field)
+        if value is None or value == "":
+            continue
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        lines.append(f"{field}: {value}")
+    return "\n".join(lines)
+
+
+def record_job_metrics(metrics):
+    """Añade las métricas de una tarea terminada al registro de la sesión."""
+    with _session_lock:
+        _session_metrics.append(dict(metrics))
+
+
+def get_session_metrics():
+    """Devuelve una copia de las métricas registradas en la sesión actual."""
+    with _session_lock:
+        return list(_session_metrics)
+
+
+def export_session_metrics_csv(csv_path):
+    """
+    Exporta las métricas de la sesión a un archivo CSV.
+    Retorna el número de filas escritas.
+    """
+    rows = get_session_metrics()
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=METRICS_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    return len(rows)
@@ -0,0 +1,435 @@
+# logic/job_scheduler.py
+"""
+Planificador de ejecución de las tareas FFmpeg.
+
+x264/x265 usan por defecto todos los núcleos, así que varias codificaciones
+simultáneas (una por pestaña) sobresuscriben la CPU y el rendimiento agregado cae.
+El planificador asigna a cada proceso un presupuesto explícito de hilos
+(-threads, -filter_threads, threads de x264, pools/frame-threads de x265)
+calculado a partir del número de codificaciones en curso y de la topología de
+la CPU. El reparto se recalcula cada vez que arranca o termina un proceso:
+FFmpeg no permite cambiar el número de hilos de un proceso ya en marcha, así
+que cada proceso nuevo recibe la parte que le corresponde en ese momento.
+
+Además clasifica cada proceso como limitado por E/S (copia de streams) o por
+CPU (codificación). Los procesos de E/S se limitan por dispositivo físico
+(resuelto con st_dev de las rutas de entrada y salida) para que dos uniones
+grandes no compitan por el mismo disco, y los lotes en segundo plano se
+ejecutan con prioridad baja (nice/ionice en POSIX, IDLE_PRIORITY_CLASS en
+Windows) para que el trabajo interactivo siga siendo fluido.
+
+Por último, permite pausar y reanudar procesos en marcha (SIGSTOP/SIGCONT en
+POSIX, NtSuspendProcess/NtResumeProcess en Windows). Mientras haya alguna
+codificación interactiva en curso, las codificaciones en segundo plano se
+suspenden automáticamente para cederle los núcleos, y se reanudan al terminar.
+El tiempo en pausa se contabiliza por proceso para excluirlo del ETA y de las métricas.
+"""
+
+import os
+import sys
+import time
+import signal
+import shutil
+import subprocess
+import threading
+
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+
+def get_cpu_topology():
+    """
+    Devuelve (núcleos lógicos utilizables, núcleos físicos).
+    Respeta la afinidad del proceso cuando la plataforma la expone y lee
+    /proc/cpuinfo para contar núcleos físicos; si no es posible, asume que
+    los núcleos físicos coinciden con los lógicos.
+    """
+    try:
+        logical = len(os.sched_getaffinity(0))
+    except AttributeError:
+        logical = os.cpu_count() or 1
+
+    physical = None
+    try:
+        cores = set()
+        physical_id = core_id = None
+        with open("/proc/cpuinfo", "r", encoding="ascii", errors="ignore") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id":
+                    core_id = value.strip()
+                elif not line.strip():
+                    if core_id is not None:
+                        cores.add((physical_id, core_id))
+                    physical_id = core_id = None
+        if core_id is not None:
+            cores.add((physical_id, core_id))
+        if cores:
+            physical = len(cores)
+    except OSError:
+        pass
+
+    if not physical:
+        physical = logical
+    return logical, min(physical, logical)
+
+
+def get_video_encoder(command):
+    """Devuelve el códec de vídeo indicado con -c:v / -vcodec (o None si no se indica)."""
+    for i, arg in enumerate(command[:-1]):
+        if arg in ("-c:v", "-vcodec"):
+            return command[i + 1]
+    return None
+
+
+def is_stream_copy_command(command):
+    """True si el comando no codifica vídeo (copia de streams o vídeo deshabilitado)."""
+    for i, arg in enumerate(command[:-1]):
+        if arg in ("-c", "-codec") and command[i + 1] == "copy":
+            return True
+    encoder = get_video_encoder(command)
+    return encoder == "copy" or (encoder is None and "-vn" in command)
+
+
+def classify_command(command):
+    """Devuelve 'io' para procesos de copia de streams y 'cpu' para codificaciones."""
+    return "io" if is_stream_copy_command(command) else "cpu"
+
+
+def _concat_list_paths(concat_file):
+    """Lee las rutas de un archivo de lista del demuxer concat."""
+    paths = []
+    try:
+        with open(concat_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("file "):
+                    paths.append(line[5:].strip().strip("'").replace("'\\''", "'"))
+    except OSError:
+        pass
+    return paths
+
+
+def command_paths(command):
+    """
+    Devuelve las rutas de archivo que lee y escribe un comando FFmpeg:
+    entradas (-i, expandiendo listas del demuxer concat) y archivo de salida.
+    """
+    paths = []
+    for i, arg in enumerate(command[:-1]):
+        if arg != "-i":
+            continue
+        path = command[i + 1]
+        if path == "-" or path.startswith("pipe:"):
+            continue
+        if i >= 2 and command[i - 2] == "-f" and command[i - 1] == "concat":
+            paths.extend(_concat_list_paths(path))
+        elif i >= 2 and command[i - 2] == "-f" and command[i - 1] == "lavfi":
+            continue
+        else:
+            paths.append(path)
+    if command and command[-1] not in ("-", "pipe:1"):
+        paths.append(command[-1])
+    return paths
+
+
+def path_device(path):
+    """
+    Devuelve el identificador de dispositivo (st_dev) de una ruta. Para archivos
+    que todavía no existen (salidas) usa el directorio que los contendrá.
+    """
+    candidate = os.path.abspath(path)
+    while candidate:
+        try:
+            return os.stat(candidate).st_dev
+        except OSError:
+            parent = os.path.dirname(candidate)
+            if parent == candidate:
+                return None
+            candidate = parent
+    return None
+
+
+def command_devices(command):
+    """Conjunto de dispositivos físicos que toca un comando FFmpeg."""
+    devices = set()
+    for path in command_paths(command):
+        device = path_device(path)
+        if device is not None:
+            devices.add(device)
+    return devices
+
+
+def low_priority_prefix():
+    """
+    Prefijo para ejecutar un comando con prioridad de CPU y de E/S mínimas en POSIX
+    (nice/ionice hacen exec, así que el PID sigue siendo el de FFmpeg).
+    """
+    prefix = []
+    if shutil.which("nice"):
+        prefix.extend(["nice", "-n", "19"])
+    if shutil.which("ionice"):
+        prefix.extend(["ionice", "-c", "3"])
+    return prefix
+
+
+def _windows_process_call(pid, function_name):
+    import ctypes
+
+    PROCESS_SUSPEND_RESUME = 0x0800
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_SUSPEND_RESUME, False, pid)
+    if not handle:
+        return False
+    try:
+        return getattr(ctypes.windll.ntdll, function_name)(handle) == 0
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def suspend_process(pid):
+    """Suspende un proceso en marcha. Devuelve True si se pudo suspender."""
+    try:
+        if sys.platform.startswith("win"):
+            return _windows_process_call(pid, "NtSuspendProcess")
+        os.kill(pid, signal.SIGSTOP)
+        return True
+    except (OSError, AttributeError) as e:
+        print("Error al pausar el proceso FFmpeg:", e)
+        return False
+
+
+def resume_process(pid):
+    """Reanuda un proceso suspendido. Devuelve True si se pudo reanudar."""
+    try:
+        if sys.platform.startswith("win"):
+            return _windows_process_call(pid, "NtResumeProcess")
+        os.kill(pid, signal.SIGCONT)
+        return True
+    except (OSError, AttributeError) as e:
+        print("Error al reanudar el proceso FFmpeg:", e)
+        return False
+
+
+def insert_output_options(command, options):
+    """Inserta opciones de salida justo antes del archivo de salida (último argumento)."""
+    return command[:-1] + list(options) + command[-1:]
+
+
+def merge_codec_params(command, option, params):
+    """
+    Añade parámetros 'clave=valor' a una opción del tipo -x264-params/-x265-params.
+    Si la opción ya existe se respetan las claves presentes y sólo se añaden las nuevas.
+    """
+    command = list(command)
+    if option in command[:-1]:
+        idx = command.index(option) + 1
+        existing = [p for p in command[idx].split(":") if p]
+        keys = {p.split("=", 1)[0] for p in existing}
+        existing.extend(f"{k}={v}" for k, v in params.items() if k not in keys)
+        command[idx] = ":".join(existing)
+        return command
+    joined = ":".join(f"{k}={v}" for k, v in params.items())
+    return insert_output_options(command, [option, joined])
+
+
+class JobTicket:
+    """
+    Representa un proceso FFmpeg admitido por el planificador.
+    'command' es el comando final (con el presupuesto de hilos y la prioridad aplicados)
+    y 'creationflags' los flags adicionales para subprocess.Popen en Windows.
+    Un proceso queda suspendido si lo ha pausado el usuario o si el planificador
+    lo ha desalojado en favor de una tarea interactiva.
+    """
+
+    def __init__(self, command, threads, kind="cpu", devices=(), priority=PRIORITY_INTERACTIVE):
+        self.command = command
+        self.threads = threads
+        self.kind = kind
+        self.devices = set(devices)
+        self.priority = priority
+        self.creationflags = 0
+        self.proc = None
+        self.user_paused = False
+        self.preempted = False
+        self.finished = False
+        self._paused_since = None
+        self._paused_total = 0.0
+
+    @property
+    def suspended(self):
+        return self._paused_since is not None
+
+    def paused_seconds(self):
+        """Tiempo total (en segundos) que el proceso ha pasado suspendido."""
+        total = self._paused_total
+        if self._paused_since is not None:
+            total += time.monotonic() - self._paused_since
+        return total
+
+
+class JobScheduler:
+    """
+    Lleva la cuenta de las codificaciones en curso y reparte los núcleos entre ellas.
+    Los procesos de copia de streams no cuentan para el reparto de CPU; en su lugar
+    se limita cuántos pueden ejecutarse a la vez sobre un mismo dispositivo.
+    """
+
+    def __init__(self, logical_cores=None, physical_cores=None, max_io_jobs_per_device=1):
+        detected_logical, detected_physical = get_cpu_topology()
+        self.logical_cores = logical_cores or detected_logical
+        self.physical_cores = physical_cores or detected_physical
+        self.max_io_jobs_per_device = max_io_jobs_per_device
+        self.thread_budgeting = True
+        self.preemption = True
+        self._lock = threading.Condition()
+        self._cpu_jobs = []
+        self._io_jobs = []
+
+    def thread_budget(self, running_jobs):
+        """
+        Hilos para cada proceso cuando hay 'running_jobs' codificaciones simultáneas.
+        Se reparten los núcleos lógicos; con SMT cada proceso recibe al menos
+        un núcleo físico completo mientras queden núcleos por repartir.
+        """
+        running_jobs = max(1, running_jobs)
+        budget = self.logical_cores // running_jobs
+        if self.physical_cores < self.logical_cores and running_jobs <= self.physical_cores:
+            smt = self.logical_cores // self.physical_cores
+            budget = max(budget, smt)
+        return max(1, budget)
+
+    def apply_thread_budget(self, command, threads):
+        """Devuelve una copia del comando con el presupuesto de hilos aplicado."""
+        command = list(command)
+        if "-filter_threads" not in command:
+            command = command[:1] + ["-filter_threads", str(threads)] + command[1:]
+        if "-threads" not in command:
+            command = insert_output_options(command, ["-threads", str(threads)])
+
+        encoder = get_video_encoder(command)
+        if encoder == "libx264":
+            command = merge_codec_params(command, "-x264-params", {"threads": threads})
+        elif encoder == "libx265":
+            frame_threads = max(1, min(threads // 4, 6))
+            command = merge_codec_params(
+                command, "-x265-params", {"pools": threads, "frame-threads": frame_threads}
+            )
+        return command
+
+    def _io_slots_available(self, devices):
+        for device in devices:
+            busy = sum(1 for job in self._io_jobs if device in job.devices)
+            if busy >= self.max_io_jobs_per_device:
+                return False
+        return True
+
+    def _has_urgent_cpu_jobs(self):
+        return any(job.priority != PRIORITY_BACKGROUND for job in self._cpu_jobs)
+
+    def _is_preemptible(self, ticket, urgent):
+        return self.preemption and urgent and ticket.priority == PRIORITY_BACKGROUND
+
+    def _sync_suspension(self, ticket):
+        """Suspende o reanuda el proceso para que coincida con sus banderas de pausa."""
+        if ticket.proc is None or ticket.finished:
+            return
+        should_suspend = ticket.user_paused or ticket.preempted
+        if should_suspend and not ticket.suspended:
+            if suspend_process(ticket.proc.pid):
+                ticket._paused_since = time.monotonic()
+        elif not should_suspend and ticket.suspended:
+            if resume_process(ticket.proc.pid):
+                ticket._paused_total += time.monotonic() - ticket._paused_since
+                ticket._paused_since = None
+
+    def _rebalance_preemption(self):
+        """Desaloja o reanuda las codificaciones en segundo plano según haya trabajo interactivo."""
+        urgent = self._has_urgent_cpu_jobs()
+        for job in self._cpu_jobs:
+            wanted = self._is_preemptible(job, urgent)
+            if job.preempted != wanted:
+                job.preempted = wanted
+                self._sync_suspension(job)
+
+    def _apply_priority(self, ticket):
+        if ticket.priority != PRIORITY_BACKGROUND:
+            return
+        if sys.platform.startswith("win"):
+            ticket.creationflags = getattr(subprocess, "IDLE_PRIORITY_CLASS", 0)
+        else:
+            ticket.command = low_priority_prefix() + ticket.command
+
+    def acquire(self, command, priority=PRIORITY_INTERACTIVE, should_abort=None):
+        """
+        Registra un proceso que va a arrancar y devuelve su JobTicket con el comando final.
+        Los procesos de E/S esperan hasta que haya hueco en todos sus dispositivos;
+        si should_abort() pasa a ser True durante la espera, devuelve None.
+        Debe llamarse a release() cuando el proceso termine.
+        """
+        kind = classify_command(command)
+        devices = command_devices(command) if kind == "io" else set()
+
+        with self._lock:
+            if kind == "io":
+                while not self._io_slots_available(devices):
+                    if should_abort and should_abort():
+                        return None
+                    self._lock.wait(timeout=0.2)
+                ticket = JobTicket(list(command), None, kind, devices, priority)
+                self._io_jobs.append(ticket)
+            else:
+                ticket = JobTicket(list(command), None, kind, devices, priority)
+                self._cpu_jobs.append(ticket)
+                self._rebalance_preemption()
+                if self.thread_budgeting:
+                    # Las tareas desalojadas no compiten por CPU, así que no cuentan en el reparto
+                    urgent = self._has_urgent_cpu_jobs()
+                    active = [job for job in self._cpu_jobs if not self._is_preemptible(job, urgent)]
+                    ticket.threads = self.thread_budget(len(active))
+                    ticket.command = self.apply_thread_budget(command, ticket.threads)
+
+            self._apply_priority(ticket)
+            return ticket
+
+    def attach_process(self, ticket, proc):
+        """
+        Asocia el proceso lanzado a su ticket y aplica la pausa/desalojo pendiente,
+        p.ej. si el usuario pausó la tarea antes de arrancar.
+        """
+        with self._lock:
+            ticket.proc = proc
+            self._sync_suspension(ticket)
+
+    def set_user_paused(self, ticket, paused):
+        """Pausa o reanuda un proceso a petición del usuario."""
+        with self._lock:
+            ticket.user_paused = paused
+            self._sync_suspension(ticket)
+
+    def release(self, ticket):
+        """Libera el presupuesto y el hueco de E/S de un proceso terminado."""
+        with self._lock:
+            ticket.finished = True
+            if ticket.suspended:
+                ticket._paused_total += time.monotonic() - ticket._paused_since
+                ticket._paused_since = None
+            if ticket in self._cpu_jobs:
+                self._cpu_jobs.remove(ticket)
+                self._rebalance_preemption()
+            if ticket in self._io_jobs:
+                self._io_jobs.remove(ticket)
+            self._lock.notify_all()
+
+    @property
+    def running_cpu_jobs(self):
+        with self._lock:
+            return len(self._cpu_jobs)
+
+
+# Planificador global compartido por todos los workers
+SCHEDULER = JobScheduler()
@@ -0,0 +1,142 @@
+# logic/keyframe_plan.py
+"""
+Fotogramas clave planificados y perfil de codificación "de la casa".
+
+Los vídeos que salen de la pestaña Imágenes o de la unión compatible tienen
+GOPs arbitrarios, así que cortarlos o unirlos después obliga a recodificar.
+Con un plan de fotogramas clave, el codificador emite GOPs cerrados (IDR) en
+instantes conocidos: cada 'interval' segundos y en los 'times' indicados
+(fronteras entre clips o una lista propia). Un corte o una unión posterior que
+caiga en esos instantes se puede hacer con copia de streams.
+
+El plan se guarda junto al vídeo en un archivo "<vídeo>.keyframes.json" con
+la identidad del archivo (tamaño y mtime), así que comprobar si un instante es
+un fotograma clave no requiere analizar el vídeo con ffprobe.
+"""
+
+import json
+import math
+import os
+
+
+HOUSE_GOP_SECONDS = 2.0        # Intervalo entre fotogramas clave del perfil de la casa
+SIDECAR_SUFFIX = ".keyframes.json"
+SIDECAR_VERSION = 1
+
+
+def keyframe_plan(interval=HOUSE_GOP_SECONDS, times=()):
+    """Plan de fotogramas clave: cada 'interval' segundos (None = sin intervalo) y en 'times'."""
+    return {
+        "interval": float(interval) if interval else None,
+        "times": sorted({round(float(t), 6) for t in times if float(t) > 0}),
+    }
+
+
+def boundary_times(durations):
+    """Instantes en que empieza cada clip de una unión (sin el 0 inicial)."""
+    times, position = [], 0.0
+    for duration in durations[:-1]:
+        position += duration
+        times.append(position)
+    return times
+
+
+def force_key_frames_expr(plan, offset=0.0):
+    """
+    Expresión para -force_key_frames. 'offset' es el instante de la línea de
+    tiempo global en que empieza este proceso (piezas de una codificación
+    paralela o por tramos), ya que 't' cuenta desde cero en cada proceso.
+    El primer frame siempre es clave; después se fuerza uno al cambiar de
+    intervalo y en el primer frame en o después de cada instante de 'times'.
+    """
+    t = f"(t+{offset})" if offset else "t"
+    prev = f"(prev_forced_t+{offset})" if offset else "prev_forced_t"
+    terms = []
+    if plan.get("interval"):
+        interval = plan["interval"]
+        terms.append(f"gt(floor({t}/{interval}),floor({prev}/{interval}))")
+    for time in plan.get("times", []):
+        if time > offset:
+            terms.append(f"gte({t},{time})*lt({prev},{time})")
+    if not terms:
+        return "expr:isnan(prev_forced_t)"
+    return f"expr:if(isnan(prev_forced_t),1,{'+'.join(terms)})"
+
+
+def keyframe_codec_args(codec_args, plan, offset=0.0):
+    """
+    Argumentos del perfil de la casa para añadir tras 'codec_args': fotogramas
+    clave forzados como IDR y GOPs cerrados en libx264/libx265.
+    """
+    if not plan:
+        return []
+    encoder = codec_args[codec_args.index("-c:v") + 1] if "-c:v" in codec_args else ""
+    args = ["-force_key_frames", force_key_frames_expr(plan, offset)]
+    if encoder == "libx264":
+        args.extend(["-forced-idr", "1", "-x264-params", "open-gop=0"])
+    elif encoder == "libx265":
+        args.extend(["-forced-idr", "1", "-x265-params", "open-gop=0"])
+    return args
+
+
+def sidecar_path(video_path):
+    return video_path + SIDECAR_SUFFIX
+
+
+def write_keyframe_sidecar(video_path, plan):
+    """Guarda el plan junto al vídeo ya terminado, con su tamaño y mtime."""
+    try:
+        st = os.stat(video_path)
+    except OSError:
+        return
+    data = {
+        "version": SIDECAR_VERSION,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "interval": plan.get("interval"),
+        "times": plan.get("times", []),
+        "closed_gop": True,
+    }
+    path = sidecar_path(video_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_keyframe_sidecar(video_path):
+    """Plan guardado para este vídeo; None si no hay o si el vídeo cambió desde entonces."""
+    try:
+        st = os.stat(video_path)
+        with open(sidecar_path(video_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (data.get("version") != SIDECAR_VERSION or data.get("size") != st.st_size
+            or data.get("mtime_ns") != st.st_mtime_ns):
+        return None
+    return data
+
+
+def planned_keyframe_time(plan, seconds, fps):
+    """
+    Instante del fotograma clave que el plan garantiza en 'seconds' (con
+    tolerancia de medio frame), o None si no hay ninguno. FFmpeg lo fuerza en
+    el primer frame en o después del instante planificado (2.002 s para 2 s a
+    29.97 fps), así que se devuelve ese frame de la rejilla de 'fps'.
+    """
+    if plan is None:
+        return None
+    fps = fps or 30.0
+    tolerance = 0.5 / fps
+    if seconds <= tolerance:
+        return 0.0
+    planned = [t for t in plan.get("times", []) if abs(seconds - t) <= tolerance]
+    interval = plan.get("interval")
+    if not planned and interval:
+        nearest = round(seconds / interval) * interval
+        if abs(seconds - nearest) <= tolerance:
+            planned.append(nearest)
+    if not planned:
+        return None
+    return math.ceil(planned[0] * fps - 1e-6) / fps
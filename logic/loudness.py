@@ -0,0 +1,115 @@
+# logic/loudness.py
+"""
+Normalización de sonoridad EBU R128 con el filtro loudnorm en dos pasadas.
+
+La primera pasada (medición) decodifica el audio una sola vez y sus valores
+(input_i, input_tp, input_lra, input_thresh y target_offset) se guardan en la
+caché de disco por identidad del archivo y objetivo. La segunda pasada es
+lineal (linear=true): se aplica como un filtro -af más dentro del mux o la
+codificación que ya se hace, así que normalizar la misma música en muchos
+vídeos cuesta un único análisis.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+from logic.media_cache import file_identity, cache_path
+
+
+# Objetivos ofrecidos en la interfaz: nombre -> (LUFS integrados, true peak dBTP, LRA)
+LOUDNESS_TARGETS = {
+    "-14 LUFS (streaming)": (-14.0, -1.0, 11.0),
+    "-23 LUFS (EBU R128)": (-23.0, -1.0, 11.0),
+}
+NO_NORMALIZATION = "Sin normalizar"
+OUTPUT_SAMPLE_RATE = 48000  # loudnorm trabaja a 192 kHz; se vuelve a una frecuencia estándar
+
+CREATE_NO_WINDOW = 0x08000000 if sys.platform.startswith("win") else 0
+
+_JSON_BLOCK_RE = re.compile(r"\{[^{}]*\"input_i\"[^{}]*\}", re.DOTALL)
+
+
+def loudnorm_measure_command(audio_path, target):
+    """Comando FFmpeg de la primera pasada: mide el primer audio e imprime JSON por stderr."""
+    integrated, true_peak, lra = target
+    return [
+        "ffmpeg", "-hide_banner", "-nostats", "-nostdin",
+        "-i", audio_path,
+        "-map", "0:a:0", "-vn", "-sn", "-dn",
+        "-af", f"loudnorm=I={integrated}:TP={true_peak}:LRA={lra}:print_format=json",
+        "-f", "null", "-",
+    ]
+
+
+def parse_loudnorm_output(output):
+    """Extrae el bloque JSON que imprime loudnorm; retorna un dict o None."""
+    matches = _JSON_BLOCK_RE.findall(output)
+    if not matches:
+        return None
+    try:
+        return json.loads(matches[-1])
+    except ValueError:
+        return None
+
+
+def _measurement_path(identity, target):
+    return cache_path("loudness", identity, target, "json")
+
+
+def cached_loudness(audio_path, target):
+    """Medición guardada en la caché (sin analizar); None si aún no existe."""
+    identity = file_identity(audio_path)
+    if identity is None:
+        return None
+    try:
+        with open(_measurement_path(identity, target), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def measure_loudness(audio_path, target):
+    """
+    Devuelve la medición loudnorm del audio para 'target', analizándolo solo
+    si no está en la caché. Retorna None si el análisis falla.
+    """
+    measured = cached_loudness(audio_path, target)
+    if measured is not None:
+        return measured
+    identity = file_identity(audio_path)
+    if identity is None:
+        return None
+
+    command = loudnorm_measure_command(audio_path, target)
+    print(" ".join(command))
+    result = subprocess.run(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, creationflags=CREATE_NO_WINDOW
+    )
+    measured = parse_loudnorm_output(result.stderr) if result.returncode == 0 else None
+    if measured is None:
+        print("Error midiendo la sonoridad:", result.stderr.strip()[-500:])
+        return None
+
+    measurement_path = _measurement_path(identity, target)
+    tmp_path = measurement_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(measured, f)
+    os.replace(tmp_path, measurement_path)
+    return measured
+
+
+def loudnorm_filter(measured, target):
+    """Filtro de la segunda pasada (lineal) a partir de una medición."""
+    integrated, true_peak, lra = target
+    return (
+        f"loudnorm=I={integrated}:TP={true_peak}:LRA={lra}"
+        f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+        f":offset={measured['target_offset']}:linear=true:print_format=summary"
+        f",aresample={OUTPUT_SAMPLE_RATE}"
+    )
+
@@ -0,0 +1,116 @@
+# logic/media_cache.py
+"""
+Utilidades para cachear resultados de análisis de archivos multimedia.
+La identidad de un archivo se basa en su ruta absoluta, tamaño y fecha de
+modificación, de modo que cualquier cambio en el archivo invalida la caché.
+
+Las carpetas con vídeos codificados (que pueden ocupar GB) se limitan con
+trim_cache: al pasar de un tamaño total se borran las entradas usadas hace
+más tiempo. El uso se marca con touch_cache_entry (actualiza el mtime).
+"""
+
+import os
+import hashlib
+
+
+DEFAULT_CACHE_MAX_BYTES = 20 * 1024 ** 3  # Límite de las carpetas de vídeo; FFMPEG_GUI_CACHE_MAX_GB lo cambia
+
+
+def file_identity(file_path):
+    """
+    Devuelve una tupla que identifica el contenido actual de un archivo:
+    (ruta absoluta normalizada, tamaño en bytes, mtime en nanosegundos).
+    Si el archivo no existe, devuelve None.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    normalized = os.path.normcase(os.path.abspath(file_path))
+    return normalized, st.st_size, st.st_mtime_ns
+
+
+def get_cache_dir(subdir=None):
+    """
+    Devuelve (creándola si hace falta) la carpeta de caché en disco de la aplicación.
+    Se puede cambiar con la variable de entorno FFMPEG_GUI_CACHE_DIR; por defecto
+    usa %LOCALAPPDATA%/ffmpeg-gui/cache en Windows y ~/.cache/ffmpeg-gui en el resto.
+    """
+    base = os.environ.get("FFMPEG_GUI_CACHE_DIR")
+    if not base:
+        if os.name == "nt":
+            root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            base = os.path.join(root, "ffmpeg-gui", "cache")
+        else:
+            root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            base = os.path.join(root, "ffmpeg-gui")
+    path = os.path.join(base, subdir) if subdir else base
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_path(subdir, identity, params=(), extension="bin"):
+    """
+    Ruta del archivo de caché para un archivo multimedia (por su identidad) y
+    unos parámetros de análisis. Cualquier cambio en el archivo o en los
+    parámetros produce una ruta distinta.
+    """
+    payload = repr((identity, tuple(params))).encode("utf-8")
+    digest = hashlib.sha1(payload).hexdigest()
+    return os.path.join(get_cache_dir(subdir), f"{digest}.{extension}")
+
+
+def cache_max_bytes():
+    """Límite en bytes de las carpetas de vídeo de la caché (FFMPEG_GUI_CACHE_MAX_GB o el de por defecto)."""
+    try:
+        return int(float(os.environ["FFMPEG_GUI_CACHE_MAX_GB"]) * 1024 ** 3)
+    except (KeyError, ValueError):
+        return DEFAULT_CACHE_MAX_BYTES
+
+
+def touch_cache_entry(path):
+    """Marca una entrada como usada ahora, para que sea la última en borrarse."""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def trim_cache(subdirs, max_bytes=None, keep=()):
+    """
+    Borra las entradas menos usadas de 'subdirs' hasta que entre todas ocupen
+    como mucho 'max_bytes' (por defecto, cache_max_bytes()). Las rutas de 'keep'
+    (las que usa la tarea en curso) no se borran. Retorna los bytes liberados.
+    """
+    max_bytes = cache_max_bytes() if max_bytes is None else max_bytes
+    keep = {os.path.normcase(os.path.abspath(path)) for path in keep}
+    entries, total = [], 0
+    for subdir in subdirs:
+        folder = os.path.join(get_cache_dir(), subdir)
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            continue
+        for name in names:
+            if ".tmp" in name:
+                continue  # Codificaciones en curso
+            path = os.path.join(folder, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        if os.path.normcase(os.path.abspath(path)) in keep:
+            continue
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            pass
+    return freed
@@ -0,0 +1,184 @@
+# logic/metrics_exporter.py
+"""
+Exportador opcional de métricas en formato OpenMetrics para equipos que
+ejecutan lotes largos sin supervisión.
+
+El registro se alimenta de los mismos eventos que actualizan los widgets de
+tareas (encolado, inicio, progreso y fin de cada FFmpegWorker), por lo que no
+añade trabajo por frame. El servidor HTTP sólo escucha en localhost y no
+requiere dependencias externas.
+"""
+
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+
+class MetricsRegistry:
+    """
+    Contadores, gauges e histogramas de las tareas FFmpeg agrupados por tipo de operación.
+    Todos los métodos son seguros para llamarse desde varios hilos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queued = {}
+        self.running = {}
+        self.completed = {}
+        self.failed = {}
+        self.cancelled = {}
+        self.bytes_written = {}
+        self.duration_buckets = {}
+        self.duration_sum = {}
+        self.duration_count = {}
+        self.job_fps = {}  # id de tarea -> (operación, fps actual)
+        self.ffprobe_calls = 0
+        self.ffprobe_cache_hits = 0
+
+    @staticmethod
+    def _inc(mapping, key, amount=1):
+        mapping[key] = mapping.get(key, 0) + amount
+
+    def job_queued(self, operation):
+        with self._lock:
+            self._inc(self.queued, operation)
+
+    def job_started(self, operation):
+        with self._lock:
+            self._inc(self.queued, operation, -1)
+            self._inc(self.running, operation)
+
+    def job_progress(self, job_id, operation, fps):
+        with self._lock:
+            self.job_fps[job_id] = (operation, fps)
+
+    def job_finished(self, job_id, operation, status, duration=None, bytes_written=None, started=True):
+        """
+        Registra el fin de una tarea. status es 'ok', 'error' o 'cancelled'.
+        Si la tarea nunca llegó a arrancar (started=False) se descuenta de la cola.
+        """
+        with self._lock:
+            if started:
+                self._inc(self.running, operation, -1)
+            else:
+                self._inc(self.queued, operation, -1)
+            self.job_fps.pop(job_id, None)
+
+            if status == "ok":
+                self._inc(self.completed, operation)
+            elif status == "cancelled":
+                self._inc(self.cancelled, operation)
+            else:
+                self._inc(self.failed, operation)
+
+            if bytes_written:
+                self._inc(self.bytes_written, operation, bytes_written)
+
+            if duration is not None:
+                buckets = self.duration_buckets.setdefault(operation, [0] * len(DURATION_BUCKETS))
+                for i, bound in enumerate(DURATION_BUCKETS):
+                    if duration <= bound:
+                        buckets[i] += 1
+                self._inc(self.duration_sum, operation, duration)
+                self._inc(self.duration_count, operation)
+
+    def ffprobe_call(self, cache_hit):
+        with self._lock:
+            if cache_hit:
+                self.ffprobe_cache_hits += 1
+            else:
+                self.ffprobe_calls += 1
+
+    def render(self):
+        """Devuelve el texto OpenMetrics con el estado actual del registro."""
+        with self._lock:
+            lines = []
+
+            def family(name, metric_type, help_text, samples, unit=None):
+                lines.append(f"# TYPE {name} {metric_type}")
+                if unit:
+                    lines.append(f"# UNIT {name} {unit}")
+                lines.append(f"# HELP {name} {help_text}")
+                lines.extend(samples)
+
+            def by_operation(name, mapping):
+                return [f'{name}{{operation="{op}"}} {value}' for op, value in sorted(mapping.items())]
+
+            family("ffmpeg_gui_jobs_queued", "gauge", "Tareas en cola.",
+                   by_operation("ffmpeg_gui_jobs_queued", self.queued))
+            family("ffmpeg_gui_jobs_running", "gauge", "Tareas en ejecución.",
+                   by_operation("ffmpeg_gui_jobs_running", self.running))
+            family("ffmpeg_gui_jobs_completed", "counter", "Tareas completadas.",
+                   by_operation("ffmpeg_gui_jobs_completed_total", self.completed))
+            family("ffmpeg_gui_jobs_failed", "counter", "Tareas fallidas.",
+                   by_operation("ffmpeg_gui_jobs_failed_total", self.failed))
+            family("ffmpeg_gui_jobs_cancelled", "counter", "Tareas canceladas.",
+                   by_operation("ffmpeg_gui_jobs_cancelled_total", self.cancelled))
+
+            fps_by_operation = {}
+            for operation, fps in self.job_fps.values():
+                fps_by_operation[operation] = fps_by_operation.get(operation, 0.0) + fps
+            family("ffmpeg_gui_encode_fps", "gauge", "FPS de codificación agregados de las tareas en curso.",
+                   by_operation("ffmpeg_gui_encode_fps", fps_by_operation))
+
+            family("ffmpeg_gui_written_bytes", "counter", "Bytes escritos por las tareas terminadas.",
+                   by_operation("ffmpeg_gui_written_bytes_total", self.bytes_written), unit="bytes")
+
+            family("ffmpeg_gui_ffprobe_calls", "counter", "Llamadas reales a ffprobe.",
+                   [f"ffmpeg_gui_ffprobe_calls_total {self.ffprobe_calls}"])
+            family("ffmpeg_gui_ffprobe_cache_hits", "counter", "Consultas de ffprobe resueltas desde la caché.",
+                   [f"ffmpeg_gui_ffprobe_cache_hits_total {self.ffprobe_cache_hits}"])
+            lookups = self.ffprobe_calls + self.ffprobe_cache_hits
+            ratio = self.ffprobe_cache_hits / lookups if lookups else 0.0
+            family("ffmpeg_gui_ffprobe_cache_hit_ratio", "gauge", "Proporción de aciertos de la caché de ffprobe.",
+                   [f"ffmpeg_gui_ffprobe_cache_hit_ratio {ratio:.6f}"])
+
+            histogram = []
+            for op in sorted(self.duration_count):
+                for bound, count in zip(DURATION_BUCKETS, self.duration_buckets[op]):
+                    histogram.append(f'ffmpeg_gui_job_duration_seconds_bucket{{operation="{op}",le="{float(bound)}"}} {count}')
+                histogram.append(f'ffmpeg_gui_job_duration_seconds_bucket{{operation="{op}",le="+Inf"}} {self.duration_count[op]}')
+                histogram.append(f'ffmpeg_gui_job_duration_seconds_sum{{operation="{op}"}} {self.duration_sum[op]:.3f}')
+                histogram.append(f'ffmpeg_gui_job_duration_seconds_count{{operation="{op}"}} {self.duration_count[op]}')
+            family("ffmpeg_gui_job_duration_seconds", "histogram", "Duración de las tareas terminadas.",
+                   histogram, unit="seconds")
+
+            lines.append("# EOF")
+            return "\n".join(lines) + "\n"
+
+
+# Registro global compartido por todos los workers
+REGISTRY = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Silencia el log por petición del servidor HTTP
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Arranca el endpoint /metrics en un hilo daemon y devuelve el servidor.
+    Por seguridad sólo se enlaza a localhost por defecto.
+    """
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True)
+    thread.start()
+    print(f"[DEBUG] Exportador OpenMetrics escuchando en http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,230 @@
+# logic/mezzanine.py
+"""
+Elección del perfil de intermedio (mezzanine) para los cortes recodificados.
+
+En lugar de usar siempre x264 veryslow sin pérdida, se codifica una muestra
+corta del propio vídeo (del centro, SAMPLE_SECONDS segundos) con cada perfil
+sin pérdida de MEZZANINE_PROFILES y se mide la velocidad (fps) y el tamaño
+resultante. La muestra se escribe en la carpeta del vídeo, así que el tiempo
+medido incluye también la escritura en ese disco. Cada muestra pasa por el
+planificador como cualquier tarea (reparto de hilos, hueco de E/S, métricas
+de la sesión) y del tiempo se descuenta el que haya estado suspendida.
+
+El perfil elegido es el más pequeño entre los que tardan como mucho un
+TIME_TOLERANCE más que el más rápido: así un perfil algo más lento solo gana
+si ahorra espacio. Los resultados se guardan en la caché de disco por
+identidad del vídeo, de modo que el benchmark se hace una vez por archivo.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from logic.ffmpeg_logic import (
+    MEZZANINE_PROFILES, DEFAULT_MEZZANINE, get_video_duration, get_video_fps
+)
+from logic.job_metrics import JobMetrics, wait_with_rusage, record_job_metrics
+from logic.job_scheduler import SCHEDULER
+from logic.media_cache import file_identity, cache_path
+from logic.metrics_exporter import REGISTRY
+
+
+AUTO_MEZZANINE = "Automático (medido)"
+SAMPLE_SECONDS = 4.0
+TIME_TOLERANCE = 0.15   # Un perfil hasta un 15 % más lento que el más rápido puede ganar por tamaño
+STOP_POLL_INTERVAL = 0.2  # Segundos entre comprobaciones de cancelación de una muestra
+
+CREATE_NO_WINDOW = 0x08000000 if sys.platform.startswith("win") else 0
+
+
+def sample_encode_command(video_path, start, seconds, codec_args, output_path):
+    """Codifica 'seconds' segundos del vídeo desde 'start', solo la imagen."""
+    command = ["ffmpeg", "-y"]
+    if start > 0:
+        command.extend(["-ss", str(round(start, 6))])
+    command.extend([
+        "-i", video_path,
+        "-t", str(seconds),
+        "-map", "0:v:0", "-an", "-sn", "-dn",
+        *codec_args,
+        output_path,
+    ])
+    return command
+
+
+def _kill_on_stop(proc, stop_event):
+    """Mata 'proc' si se activa 'stop_event' antes de que termine."""
+    while proc.returncode is None:
+        if stop_event.wait(STOP_POLL_INTERVAL):
+            if proc.returncode is None:
+                proc.kill()
+            return
+
+
+def run_sample(command, output_path, stop_event=None):
+    """
+    Ejecuta una codificación de muestra bajo el planificador y registra sus
+    métricas. Activar 'stop_event' mata la muestra en curso.
+    Retorna (returncode, stderr, segundos sin pausas, hilos); returncode es
+    None si se canceló antes de arrancar.
+    """
+    operation = "mezzanine_bench"
+    metrics = JobMetrics(operation, output_path)
+    REGISTRY.job_queued(operation)
+    ticket = SCHEDULER.acquire(command, should_abort=stop_event.is_set if stop_event else None)
+    if ticket is None:
+        REGISTRY.job_finished(id(metrics), operation, "cancelled", started=False)
+        return None, "Cancelado", 0.0, None
+    metrics.mark_started()
+    REGISTRY.job_started(operation)
+
+    # El ticket se libera aunque falle el lanzamiento, como en FFmpegWorker.execute
+    proc = None
+    waited = False
+    returncode, stderr, elapsed = None, "", 0.0
+    try:
+        print(" ".join(ticket.command))
+        began = time.perf_counter()
+        proc = subprocess.Popen(
+            ticket.command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            universal_newlines=True, creationflags=CREATE_NO_WINDOW | ticket.creationflags
+        )
+        SCHEDULER.attach_process(ticket, proc)
+        if stop_event is not None:
+            threading.Thread(target=_kill_on_stop, args=(proc, stop_event), daemon=True).start()
+        stderr = proc.stderr.read()
+        returncode, usage = wait_with_rusage(proc)
+        waited = True
+        elapsed = time.perf_counter() - began
+        metrics.apply_rusage(usage)
+    finally:
+        if proc is not None and not waited:
+            proc.kill()
+            proc.wait()
+        SCHEDULER.release(ticket)
+        metrics.paused_time = ticket.paused_seconds()
+        if stop_event is not None and stop_event.is_set():
+            metrics.finish("cancelled")
+        else:
+            metrics.finish("ok" if returncode == 0 else "error")
+        summary = metrics.to_dict()
+        record_job_metrics(summary)
+        REGISTRY.job_finished(
+            id(metrics), operation, summary["status"],
+            duration=summary["wall_time"], bytes_written=summary["bytes_written"]
+        )
+    return returncode, stderr, max(0.0, elapsed - ticket.paused_seconds()), ticket.threads
+
+
+def benchmark_mezzanine(video_path, names=None, sample_seconds=SAMPLE_SECONDS, stop_event=None):
+    """
+    Codifica la muestra con cada perfil de 'names' (por defecto, los sin pérdida).
+    Retorna una lista de dicts con name, seconds, fps, bytes y threads (los
+    que asignó el planificador); los perfiles que fallan se omiten. Si se
+    activa 'stop_event' se detiene y retorna None.
+    """
+    names = names or _lossless_names()
+    duration = get_video_duration(video_path)
+    fps = get_video_fps(video_path) or 30.0
+    seconds = min(sample_seconds, duration) if duration > 0 else sample_seconds
+    start = max(0.0, duration / 2 - seconds / 2)
+
+    try:
+        work_dir = tempfile.mkdtemp(prefix="mezzanine_", dir=os.path.dirname(os.path.abspath(video_path)))
+    except OSError:
+        work_dir = tempfile.mkdtemp(prefix="mezzanine_")
+
+    results = []
+    try:
+        for i, name in enumerate(names):
+            profile = MEZZANINE_PROFILES[name]
+            output_path = os.path.join(work_dir, f"sample_{i}.{profile['format']}")
+            command = sample_encode_command(video_path, start, seconds, profile["codec_args"], output_path)
+            returncode, stderr, elapsed, threads = run_sample(command, output_path, stop_event)
+            if stop_event is not None and stop_event.is_set():
+                return None
+            if returncode != 0 or not os.path.isfile(output_path):
+                print(f"Error en el benchmark de '{name}':", stderr.strip()[-300:])
+                continue
+            results.append({
+                "name": name,
+                "seconds": elapsed,
+                "fps": seconds * fps / elapsed if elapsed > 0 else 0.0,
+                "bytes": os.path.getsize(output_path),
+                "threads": threads,
+            })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def choose_mezzanine(results):
+    """El más pequeño entre los perfiles que no superan en TIME_TOLERANCE al más rápido."""
+    if not results:
+        return DEFAULT_MEZZANINE
+    fastest = min(result["seconds"] for result in results)
+    candidates = [result for result in results if result["seconds"] <= fastest * (1 + TIME_TOLERANCE)]
+    return min(candidates, key=lambda result: result["bytes"])["name"]
+
+
+def _lossless_names():
+    return [name for name, profile in MEZZANINE_PROFILES.items() if profile["lossless"]]
+
+
+def _bench_cache_path(video_path):
+    identity = file_identity(video_path)
+    if identity is None:
+        return None
+    return cache_path("mezzanine_bench", identity, (SAMPLE_SECONDS, *_lossless_names()), "json")
+
+
+def cached_mezzanine(video_path):
+    """(nombre_perfil, resultados) si el benchmark de este archivo ya está en la caché; si no, None."""
+    path = _bench_cache_path(video_path)
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return choose_mezzanine(results), results
+
+
+def pick_mezzanine_profile(video_path, stop_event=None):
+    """
+    Perfil recomendado para recodificar cortes de 'video_path', midiendo solo
+    si no hay un benchmark guardado para este archivo.
+    Retorna (nombre_perfil, resultados); None si se canceló con 'stop_event'.
+    """
+    cached = cached_mezzanine(video_path)
+    if cached is not None:
+        return cached
+    path = _bench_cache_path(video_path)
+    if path is None:
+        return DEFAULT_MEZZANINE, []
+    results = benchmark_mezzanine(video_path, _lossless_names(), stop_event=stop_event)
+    if results is None:
+        return None
+    if results:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+        os.replace(tmp_path, path)
+    return choose_mezzanine(results), results
+
+
+def describe_results(results, chosen):
+    """Resumen de una línea por perfil para mostrar en la interfaz o en consola."""
+    lines = []
+    for result in sorted(results, key=lambda r: r["seconds"]):
+        mark = " <-" if result["name"] == chosen else ""
+        lines.append(
+            f"{result['name']}: {result['fps']:.1f} fps, {result['bytes'] / 1e6:.1f} MB{mark}"
+        )
+    return "\n".join(lines)
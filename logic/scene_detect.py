@@ -0,0 +1,117 @@
+# logic/scene_detect.py
+"""
+Detección de cambios de escena (cortes de plano) de un vídeo.
+
+Se usa el filtro select='gt(scene,umbral)' sobre una decodificación muy
+reducida: se descartan los fotogramas que no sirven de referencia
+(-skip_frame nonref), se ignoran audio y subtítulos y la puntuación de escena
+se calcula sobre una versión escalada a 160 px de ancho. Así el análisis de
+un vídeo de una hora va muchas veces más rápido que el tiempo real.
+
+Los resultados (instante y puntuación de cada cambio) se guardan en la caché
+de disco por archivo y umbral.
+"""
+
+import os
+import re
+import json
+import subprocess
+import sys
+
+from logic.media_cache import file_identity, cache_path
+
+
+DEFAULT_THRESHOLD = 0.3
+ANALYSIS_WIDTH = 160
+
+CREATE_NO_WINDOW = 0x08000000 if sys.platform.startswith("win") else 0
+
+_PTS_TIME_RE = re.compile(r"pts_time:\s*([\d.]+)")
+_SCORE_RE = re.compile(r"lavfi\.scene_score=\s*([\d.]+)")
+
+
+def scene_detect_command(video_path, threshold=DEFAULT_THRESHOLD, width=ANALYSIS_WIDTH):
+    """Comando FFmpeg que imprime por stdout los fotogramas con cambio de escena y su puntuación."""
+    filters = [
+        f"scale={width}:-2:flags=fast_bilinear",
+        f"select='gt(scene,{threshold})'",
+        "metadata=print:file=-",
+    ]
+    return [
+        "ffmpeg", "-v", "error", "-nostats",
+        "-skip_frame", "nonref",
+        "-i", video_path,
+        "-an", "-sn", "-dn",
+        "-vf", ",".join(filters),
+        "-fps_mode", "passthrough",
+        "-f", "null", "-",
+    ]
+
+
+def parse_scene_output(output):
+    """Extrae la lista de (instante, puntuación) de la salida de metadata=print."""
+    scenes = []
+    current_time = None
+    for line in output.splitlines():
+        match = _PTS_TIME_RE.search(line)
+        if match:
+            current_time = float(match.group(1))
+            continue
+        match = _SCORE_RE.search(line)
+        if match and current_time is not None:
+            scenes.append((current_time, float(match.group(1))))
+            current_time = None
+    return scenes
+
+
+def detect_scenes(video_path, threshold=DEFAULT_THRESHOLD):
+    """
+    Devuelve la lista de cambios de escena [(segundos, puntuación), ...] del vídeo,
+    usando la caché si ya se analizó con el mismo umbral.
+    Retorna None si el análisis falla.
+    """
+    identity = file_identity(video_path)
+    if identity is None:
+        return None
+
+    threshold = round(float(threshold), 3)
+    scenes_path = cache_path("scenes", identity, (threshold, ANALYSIS_WIDTH), "json")
+    try:
+        with open(scenes_path, "r", encoding="utf-8") as f:
+            return [tuple(scene) for scene in json.load(f)]
+    except (OSError, ValueError):
+        pass
+
+    command = scene_detect_command(video_path, threshold)
+    print(" ".join(command))
+    result = subprocess.run(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, creationflags=CREATE_NO_WINDOW
+    )
+    if result.returncode != 0:
+        print("Error detectando escenas:", result.stderr.strip())
+        return None
+
+    scenes = parse_scene_output(result.stdout)
+    tmp_path = scenes_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(scenes, f)
+    os.replace(tmp_path, scenes_path)
+    return scenes
+
+
+def scene_ranges(scenes, duration, min_length=0.5):
+    """
+    Convierte los cambios de escena en rangos consecutivos que cubren todo el vídeo,
+    en el formato de logic/batch_cut.py. Se descartan cortes a menos de
+    'min_length' segundos del anterior.
+    """
+    points = [0.0]
+    for time_point, _ in sorted(scenes):
+        if time_point - points[-1] >= min_length and duration - time_point >= min_length:
+            points.append(time_point)
+    points.append(duration)
+    return [
+        {"start": start, "end": end, "fade_in": 0.0, "fade_out": 0.0, "name": f"escena{i:03d}"}
+        for i, (start, end) in enumerate(zip(points, points[1:]), start=1)
+    ]
@@ -0,0 +1,403 @@
+# logic/segmented_encode.py
+"""
+Codificación por segmentos con checkpoints reanudables.
+
+Una codificación larga (secuencia de imágenes, escalado, recorte o unión
+compatible) se divide en segmentos independientes de vídeo, cada uno con su
+propio GOP cerrado. Los segmentos terminados se anotan en un manifiesto
+(manifest.json) dentro de una carpeta oculta junto a la salida; si la tarea
+muere a mitad, al relanzarla con los mismos parámetros se reutilizan los
+segmentos hechos y se continúa desde el primero que falte. Al final los
+segmentos se concatenan con copia de streams (añadiendo el audio) y la
+carpeta de checkpoint se elimina.
+
+Los fundidos se calculan sobre la línea de tiempo global: cada segmento
+desplaza sus timestamps a su posición real antes de aplicar el fundido.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+from logic.media_cache import file_identity
+from logic.ffmpeg_logic import (
+    get_unique_filename, get_image_sequence_info, get_output_extension,
+    build_video_codec_args, build_fade_filter, build_crop_filter, get_audio_duration,
+    get_video_duration, get_video_fps, validate_merge_inputs, write_concat_file, audio_policy_args,
+    mp4_layout_args
+)
+
+
+DEFAULT_SEGMENT_FRAMES = 600    # Frames por segmento en secuencias de imágenes
+DEFAULT_SEGMENT_SECONDS = 60    # Segundos por segmento en vídeos
+MANIFEST_NAME = "manifest.json"
+
+_manifest_lock = threading.Lock()
+
+
+def checkpoint_key(kind, sources, params):
+    """Hash estable de la identidad de las entradas y de los parámetros de codificación."""
+    payload = json.dumps([kind, sources, params], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def checkpoint_dir_for(output_dir, key):
+    """Carpeta de checkpoint (oculta) junto a la salida para una clave dada."""
+    return os.path.join(output_dir, f".checkpoint_{key[:16]}")
+
+
+def load_manifest(checkpoint_dir):
+    """Carga el manifiesto de un checkpoint, o None si no existe o está corrupto."""
+    try:
+        with open(os.path.join(checkpoint_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(checkpoint_dir, manifest):
+    """Guarda el manifiesto de forma atómica (archivo temporal + reemplazo)."""
+    path = os.path.join(checkpoint_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def mark_segment_done(checkpoint_dir, index):
+    """Anota en el manifiesto que el segmento 'index' está completo."""
+    with _manifest_lock:
+        manifest = load_manifest(checkpoint_dir)
+        if manifest is None:
+            return
+        manifest["segments"][index]["done"] = True
+        save_manifest(checkpoint_dir, manifest)
+
+
+def remove_checkpoint(checkpoint_dir):
+    """Elimina la carpeta de checkpoint una vez generada la salida final."""
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+
+def image_sequence_signature(folder_path, images):
+    """Identidad de una secuencia: nombre, tamaño y mtime de cada imagen."""
+    signature = []
+    for name in images:
+        identity = file_identity(os.path.join(folder_path, name))
+        signature.append([name, identity[1], identity[2]] if identity else [name])
+    return signature
+
+
+def timeline_filters(offset, fade_filter, extra_filters=()):
+    """
+    Filtros de vídeo para un segmento que empieza en 'offset' segundos de la línea
+    de tiempo global: se desplazan los timestamps, se aplica el fundido global y
+    se vuelven a poner a cero.
+    """
+    filters = list(extra_filters)
+    if fade_filter:
+        filters.extend([f"setpts=PTS+{offset}/TB", fade_filter, "setpts=PTS-STARTPTS"])
+    return filters
+
+
+def plan_checkpoint_job(checkpoint_dir, key, segments, extension, final_command_factory):
+    """
+    Prepara las etapas de una tarea por segmentos para FFmpegPipelineWorker.
+
+    Parámetros:
+        segments: lista de dicts {"frames": n, "command": función(ruta_segmento) -> comando}.
+        extension: extensión del contenedor de los segmentos.
+        final_command_factory: función(ruta_lista_concat) -> comando que genera la salida final.
+
+    Retorna un dict con stages, checkpoint_dir, total_segments y done_segments.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    manifest = load_manifest(checkpoint_dir)
+    if not manifest or manifest.get("key") != key or len(manifest.get("segments", [])) != len(segments):
+        manifest = {
+            "key": key,
+            "segments": [
+                {"file": f"seg_{i:05d}.{extension}", "frames": seg["frames"], "done": False}
+                for i, seg in enumerate(segments)
+            ],
+        }
+        save_manifest(checkpoint_dir, manifest)
+
+    segment_paths = []
+    segment_steps = []
+    done_segments = 0
+    total_frames = 0
+    for i, seg in enumerate(segments):
+        entry = manifest["segments"][i]
+        seg_path = os.path.join(checkpoint_dir, entry["file"])
+        segment_paths.append(seg_path)
+        total_frames += seg["frames"]
+
+        if entry.get("done") and os.path.isfile(seg_path):
+            done_segments += 1
+            continue
+
+        segment_steps.append({
+            "command": seg["command"](seg_path),
+            "total_frames": seg["frames"],
+            "weight": seg["frames"],
+            "on_success": lambda i=i: mark_segment_done(checkpoint_dir, i),
+        })
+
+    concat_list = os.path.join(checkpoint_dir, "segments.txt")
+    write_concat_file(concat_list, segment_paths)
+
+    final_step = {
+        "command": final_command_factory(concat_list),
+        "total_frames": total_frames,
+        "weight": max(1, total_frames // 20),
+        "on_success": lambda: remove_checkpoint(checkpoint_dir),
+    }
+
+    stages = [segment_steps, [final_step]] if segment_steps else [[final_step]]
+    return {
+        "stages": stages,
+        "checkpoint_dir": checkpoint_dir,
+        "total_segments": len(segments),
+        "done_segments": done_segments,
+    }
+
+
+def split_frames(total_frames, segment_frames):
+    """Divide 'total_frames' en rangos contiguos (inicio, cantidad) de 'segment_frames'."""
+    segment_frames = max(1, int(segment_frames))
+    return [
+        (start, min(segment_frames, total_frames - start))
+        for start in range(0, total_frames, segment_frames)
+    ]
+
+
+def convert_images_checkpoint_job(folder_path, fps, audio_path=None, user_format="mp4 (H.264 8-bit)",
+                                  crf="19", fade_in_duration=1, fade_out_duration=1, pix_fmt=None,
+                                  prioritize_audio=False, segment_frames=DEFAULT_SEGMENT_FRAMES,
+                                  audio_filter=None):
+    """
+    Equivalente reanudable de convert_images_to_video_command.
+    Retorna el dict de plan_checkpoint_job con 'output_file', o None si no hay secuencia válida.
+    """
+    sequence = get_image_sequence_info(folder_path)
+    if not sequence:
+        return None
+
+    try:
+        fps_val = float(fps)
+    except ValueError:
+        fps_val = 30.0
+    if fps_val <= 0:
+        fps_val = 30.0
+
+    num_images = len(sequence["images"])
+    video_duration = num_images / fps_val
+    extension = get_output_extension(user_format)
+    output_file = get_unique_filename(os.path.join(folder_path, f"{sequence['prefix']}video.{extension}"))
+
+    codec_args = build_video_codec_args(user_format, crf, pix_fmt)
+    fade_filter = build_fade_filter(video_duration, fade_in_duration, fade_out_duration)
+
+    padding = 0.0
+    if audio_path and prioritize_audio:
+        padding = max(0.0, get_audio_duration(audio_path) - video_duration)
+
+    key = checkpoint_key(
+        "images",
+        image_sequence_signature(folder_path, sequence["images"]),
+        [fps, user_format, crf, pix_fmt, fade_in_duration, fade_out_duration, round(padding, 3)],
+    )
+
+    ranges = split_frames(num_images, segment_frames)
+    segments = []
+    for index, (start, count) in enumerate(ranges):
+        filters = timeline_filters(start / fps_val, fade_filter)
+        output_frames = count
+        if padding > 0 and index == len(ranges) - 1:
+            # El último segmento se alarga con negro hasta el final del audio
+            filters.append(f"tpad=stop_mode=add:stop_duration={padding}:color=black")
+            output_frames += int(padding * fps_val) + 1
+
+        def segment_command(seg_path, start=start, output_frames=output_frames, filters=filters):
+            command = [
+                "ffmpeg", "-y",
+                "-start_number", str(sequence["start_number"] + start),
+                "-framerate", str(fps),
+                "-i", sequence["pattern"],
+                "-frames:v", str(output_frames),
+            ]
+            command.extend(codec_args)
+            if filters:
+                command.extend(["-vf", ",".join(filters)])
+            command.extend(["-an", seg_path])
+            return command
+
+        segments.append({"frames": count, "command": segment_command})
+
+    def final_command(concat_list):
+        command = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list]
+        if audio_path:
+            command.extend(["-i", audio_path, "-map", "0:v", "-map", "1:a", "-c:v", "copy"])
+            if audio_filter:
+                command.extend(["-af", audio_filter])
+            command.extend(["-c:a", "aac", "-b:a", "192k"])
+            if not prioritize_audio:
+                command.append("-shortest")
+        else:
+            command.extend(["-c", "copy"])
+        command.append(output_file)
+        return command
+
+    checkpoint_dir = checkpoint_dir_for(folder_path, key)
+    job = plan_checkpoint_job(checkpoint_dir, key, segments, extension, final_command)
+    job["output_file"] = output_file
+    return job
+
+
+def video_checkpoint_job(kind, input_file, output_file, filters, codec_args, fade_in_duration=0,
+                         fade_out_duration=0, segment_seconds=DEFAULT_SEGMENT_SECONDS, audio_policy="copy"):
+    """
+    Tarea reanudable genérica para transformaciones de vídeo (escalado, recorte).
+    Los segmentos se cortan por número de frame con búsqueda en la entrada y el
+    audio original se añade en la concatenación final según 'audio_policy'.
+    """
+    fps = get_video_fps(input_file)
+    duration = get_video_duration(input_file)
+    if fps <= 0 or duration <= 0:
+        return None
+
+    total_frames = int(round(duration * fps))
+    fade_filter = None
+    if fade_in_duration > 0 or fade_out_duration > 0:
+        parts = []
+        if fade_in_duration > 0:
+            parts.append(f"fade=t=in:st=0:d={fade_in_duration}")
+        if fade_out_duration > 0 and duration > fade_out_duration:
+            parts.append(f"fade=t=out:st={max(0, duration - fade_out_duration)}:d={fade_out_duration}")
+        fade_filter = ",".join(parts) or None
+
+    key = checkpoint_key(kind, [file_identity(input_file)],
+                         [filters, codec_args, fade_in_duration, fade_out_duration, segment_seconds])
+    extension = os.path.splitext(output_file)[1].lstrip(".") or "mp4"
+
+    segments = []
+    for start, count in split_frames(total_frames, int(round(segment_seconds * fps))):
+        offset = start / fps
+        segment_filters = timeline_filters(offset, fade_filter, filters)
+
+        def segment_command(seg_path, offset=offset, count=count, segment_filters=segment_filters):
+            command = ["ffmpeg", "-y", "-ss", str(offset), "-i", input_file, "-frames:v", str(count)]
+            if segment_filters:
+                command.extend(["-vf", ",".join(segment_filters)])
+            command.extend(codec_args)
+            command.extend(["-an", seg_path])
+            return command
+
+        segments.append({"frames": count, "command": segment_command})
+
+    def final_command(concat_list):
+        return [
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0", "-i", concat_list,
+            "-i", input_file,
+            "-map", "0:v",
+            "-c:v", "copy",
+            *audio_policy_args(input_file, extension, audio_policy, input_index=1),
+            output_file,
+        ]
+
+    checkpoint_dir = checkpoint_dir_for(os.path.dirname(os.path.abspath(output_file)), key)
+    job = plan_checkpoint_job(checkpoint_dir, key, segments, extension, final_command)
+    job["output_file"] = output_file
+    return job
+
+
+def scale_video_checkpoint_job(input_file, scale_width, scale_height, preset="slow", crf="18",
+                               output_format="mp4", segment_seconds=DEFAULT_SEGMENT_SECONDS):
+    """Equivalente reanudable de scale_video_command."""
+    base = os.path.splitext(input_file)[0]
+    output_file = get_unique_filename(f"{base}_scaled.{output_format}")
+    return video_checkpoint_job(
+        "scale", input_file, output_file,
+        [f"scale={scale_width}:{scale_height}"], ["-preset", preset, "-crf", crf],
+        segment_seconds=segment_seconds
+    )
+
+
+def crop_video_checkpoint_job(input_file, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0,
+                              fade_in_duration=0, fade_out_duration=0, output_format="mp4",
+                              segment_seconds=DEFAULT_SEGMENT_SECONDS):
+    """Equivalente reanudable de crop_video_command."""
+    base = os.path.splitext(input_file)[0]
+    output_file = get_unique_filename(f"{base}_cropped.{output_format}")
+    return video_checkpoint_job(
+        "crop", input_file, output_file,
+        [build_crop_filter(crop_top, crop_bottom, crop_left, crop_right)], [],
+        fade_in_duration, fade_out_duration, segment_seconds
+    )
+
+
+def merge_videos_checkpoint_job(video_paths, output_name=None, preset="slow", crf="19",
+                                output_format="mp4", output_dir=None,
+                                segment_seconds=DEFAULT_SEGMENT_SECONDS, mp4_layout=None):
+    """
+    Equivalente reanudable de la unión compatible de merge_videos_command.
+    Cada vídeo de entrada se divide en segmentos propios; el audio de todos se
+    recodifica una sola vez en la concatenación final, con la disposición
+    'mp4_layout' (ver MP4_LAYOUTS).
+    Retorna (job, error_message).
+    """
+    is_valid, error_message = validate_merge_inputs(video_paths)
+    if not is_valid:
+        return None, error_message
+
+    base_dir = output_dir if output_dir else os.path.dirname(os.path.abspath(video_paths[0]))
+    os.makedirs(base_dir, exist_ok=True)
+    if output_name and str(output_name).strip():
+        filename = f"{str(output_name).strip()}.{output_format}"
+    else:
+        filename = f"merged_compatible.{output_format}"
+    output_file = get_unique_filename(os.path.join(base_dir, filename))
+
+    codec_args = ["-c:v", "libx264", "-preset", str(preset), "-crf", str(crf), "-pix_fmt", "yuv420p"]
+    key = checkpoint_key("merge", [file_identity(p) for p in video_paths], [codec_args, segment_seconds])
+
+    segments = []
+    for video_path in video_paths:
+        fps = get_video_fps(video_path)
+        duration = get_video_duration(video_path)
+        if fps <= 0 or duration <= 0:
+            return None, f"No se pudo analizar el vídeo: {video_path}"
+
+        total_frames = int(round(duration * fps))
+        for start, count in split_frames(total_frames, int(round(segment_seconds * fps))):
+            def segment_command(seg_path, video_path=video_path, offset=start / fps, count=count):
+                return [
+                    "ffmpeg", "-y", "-ss", str(offset), "-i", video_path,
+                    "-frames:v", str(count), *codec_args, "-an", seg_path,
+                ]
+            segments.append({"frames": count, "command": segment_command})
+
+    checkpoint_dir = checkpoint_dir_for(base_dir, key)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    sources_list = os.path.join(checkpoint_dir, "sources.txt")
+    write_concat_file(sources_list, video_paths)
+
+    def final_command(concat_list):
+        return [
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0", "-i", concat_list,
+            "-f", "concat", "-safe", "0", "-i", sources_list,
+            "-map", "0:v", "-map", "1:a?",
+            "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
+            *mp4_layout_args(output_format, mp4_layout),
+            output_file,
+        ]
+
+    job = plan_checkpoint_job(checkpoint_dir, key, segments, output_format, final_command)
+    job["output_file"] = output_file
+    return job, ""
@@ -0,0 +1,141 @@
+# logic/sequence_extract.py
+"""
+Extracción de un vídeo a una secuencia de imágenes (lo inverso de la pestaña Imágenes).
+
+Un único proceso FFmpeg extrae despacio porque cada PNG se comprime en un
+solo hilo. Aquí el vídeo se divide con el índice de fotogramas
+(logic/frame_index.py) en rangos que empiezan en un fotograma clave y cada
+rango se extrae en un proceso aparte, a la vez. Cada proceso hace input-seek
+al fotograma clave (-noaccurate_seek, así que no descarta ni repite frames),
+extrae exactamente los frames de su rango (-frames:v) y numera sus archivos
+con -start_number, de modo que la secuencia queda numerada igual que si la
+hubiera extraído un solo proceso.
+
+Los nombres siguen el patrón "<nombre>_<número>" que espera
+detect_image_prefix, así que la carpeta se puede volver a convertir a vídeo en
+la pestaña Imágenes con la misma numeración.
+"""
+
+import os
+
+from logic.ffmpeg_logic import get_unique_filename, get_video_stream_info
+from logic.frame_index import get_frame_index
+
+
+# Formatos ofrecidos en la interfaz: nombre -> (extensión, argumentos de códec)
+EXTRACT_FORMATS = {
+    "PNG 8-bit": (".png", ["-c:v", "png", "-pix_fmt", "rgb24"]),
+    "PNG 16-bit": (".png", ["-c:v", "png", "-pix_fmt", "rgb48be"]),
+    "JPEG": (".jpg", ["-c:v", "mjpeg", "-pix_fmt", "yuvj444p", "-q:v", "2"]),
+}
+DEFAULT_PNG_COMPRESSION = 6  # Nivel zlib (0 = sin compresión, más rápido; 9 = máximo)
+EXTRACT_START_NUMBER = 1     # Número del primer frame, como el muxer image2 de FFmpeg
+MIN_NUMBER_WIDTH = 5
+
+
+def keyframe_ranges(index, workers):
+    """
+    Divide los frames del índice en hasta 'workers' rangos contiguos
+    (inicio, cantidad) de tamaño parecido, cada uno empezando en un fotograma clave.
+    """
+    total = index.frame_count
+    starts = {0}
+    for i in range(1, max(1, workers)):
+        target = index.frame_time(i * total // workers)
+        starts.add(index.frame_at(index.keyframe_before(target)))
+    starts = sorted(starts)
+    return [(start, end - start) for start, end in zip(starts, starts[1:] + [total]) if end > start]
+
+
+def extract_range_command(video_path, index, start, count, codec_args, pattern, first_number):
+    """
+    Extrae los frames [start, start + count) con su numeración definitiva.
+    El seek apunta medio frame después del fotograma clave para caer siempre en él.
+    """
+    command = ["ffmpeg", "-y"]
+    if start > 0:
+        keyframe_time = index.frame_time(start)
+        half_frame = (index.frame_time(start + 1) - keyframe_time) / 2 if start + 1 < index.frame_count else 0
+        command.extend(["-noaccurate_seek", "-ss", str(round(keyframe_time + half_frame, 6))])
+    command.extend([
+        "-i", video_path,
+        "-map", "0:v:0", "-an", "-sn", "-dn",
+        "-frames:v", str(count),
+        "-fps_mode", "passthrough",
+        *codec_args,
+        "-start_number", str(first_number + start),
+        "-f", "image2", pattern,
+    ])
+    return command
+
+
+def extract_sequence_job(video_path, image_format="PNG 8-bit", png_compression=DEFAULT_PNG_COMPRESSION,
+                         workers=4, output_dir=None):
+    """
+    Planifica la extracción de 'video_path' a una carpeta nueva para
+    FFmpegPipelineWorker (debe ejecutarse con max_parallel=workers).
+    Las imágenes se escriben en una carpeta temporal que se renombra al terminar.
+    Retorna (trabajo, mensaje_error); el trabajo es un dict con stages,
+    output_file (la carpeta), cleanup_files, total_frames y ranges.
+    """
+    if image_format not in EXTRACT_FORMATS:
+        return None, f"Formato de imagen no admitido: {image_format}"
+    ext, codec_args = EXTRACT_FORMATS[image_format]
+    if ext == ".png":
+        codec_args = [*codec_args, "-compression_level", str(png_compression)]
+
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    output_folder = get_unique_filename(
+        os.path.join(output_dir or os.path.dirname(video_path), f"{stem}_frames")
+    )
+    tmp_folder = output_folder + ".tmp"
+
+    index = get_frame_index(video_path)
+    if index is not None and index.frame_count and index.keyframe_times:
+        total_frames = index.frame_count
+        ranges = keyframe_ranges(index, workers)
+    else:
+        # Sin índice no se puede repartir: un único proceso con todo el vídeo
+        info = get_video_stream_info(video_path)
+        if info is None:
+            return None, "No se pudo leer el vídeo."
+        index, total_frames, ranges = None, 0, [(0, None)]
+
+    width = max(MIN_NUMBER_WIDTH, len(str(EXTRACT_START_NUMBER + total_frames)))
+    pattern = os.path.join(tmp_folder, f"{stem}_%0{width}d{ext}")
+
+    steps = []
+    for start, count in ranges:
+        if count is None:
+            command = [
+                "ffmpeg", "-y", "-i", video_path,
+                "-map", "0:v:0", "-an", "-sn", "-dn",
+                "-fps_mode", "passthrough",
+                *codec_args,
+                "-start_number", str(EXTRACT_START_NUMBER),
+                "-f", "image2", pattern,
+            ]
+        else:
+            command = extract_range_command(video_path, index, start, count, codec_args, pattern,
+                                            EXTRACT_START_NUMBER)
+        steps.append({"command": command, "total_frames": count or 0, "weight": count or 1})
+
+    def prepare():
+        os.makedirs(tmp_folder, exist_ok=True)
+
+    def publish():
+        os.replace(tmp_folder, output_folder)
+
+    stages = [
+        [{"callable": prepare, "weight": 0}],
+        steps,
+        [{"callable": publish, "weight": 0}],
+    ]
+    return {
+        "stages": stages,
+        "output_file": output_folder,
+        "cleanup_files": [tmp_folder],
+        "total_frames": total_frames,
+        "ranges": ranges,
+    }, ""
+
@@ -0,0 +1,85 @@
+# logic/thumbnail_strip.py
+"""
+Tira de miniaturas para la línea de tiempo de la pestaña de corte.
+
+La tira se genera en una sola pasada de FFmpeg decodificando solo los
+fotogramas clave (-skip_frame nokey), que es lo que permite procesar un vídeo
+de una hora en pocos segundos. Las miniaturas se toman a intervalos regulares
+(cada una muestra el último fotograma clave anterior a su instante), se
+escalan y se componen en una única imagen JPEG que se guarda en la caché de
+disco, indexada por la identidad del archivo: reabrir el mismo vídeo es
+inmediato.
+"""
+
+import os
+import subprocess
+import sys
+
+from logic.media_cache import file_identity, cache_path
+from logic.ffmpeg_logic import get_video_duration
+
+
+THUMB_COUNT = 60    # Miniaturas por tira
+THUMB_HEIGHT = 72   # Alto de cada miniatura en píxeles
+
+CREATE_NO_WINDOW = 0x08000000 if sys.platform.startswith("win") else 0
+
+
+def thumbnail_strip_command(video_path, output_file, duration, count=THUMB_COUNT, height=THUMB_HEIGHT):
+    """
+    Construye el comando FFmpeg que genera la tira de 'count' miniaturas en 'output_file'.
+    """
+    interval = max(duration / count, 0.001)
+    filters = [
+        f"fps=1/{interval:.6f}",
+        f"scale=-2:{height}",
+        f"tile={count}x1",
+    ]
+    return [
+        "ffmpeg", "-v", "error", "-y",
+        "-skip_frame", "nokey",
+        "-i", video_path,
+        "-an", "-sn", "-dn",
+        "-vf", ",".join(filters),
+        "-frames:v", "1",
+        "-q:v", "5",
+        output_file,
+    ]
+
+
+def get_thumbnail_strip(video_path, count=THUMB_COUNT, height=THUMB_HEIGHT):
+    """
+    Devuelve la información de la tira de miniaturas de un vídeo, generándola si
+    no está en caché:
+        {"path": ruta del JPEG, "count": miniaturas, "interval": segundos entre
+         miniaturas, "duration": duración del vídeo}
+    Retorna None si el vídeo no se puede analizar.
+    """
+    identity = file_identity(video_path)
+    duration = get_video_duration(video_path)
+    if identity is None or duration <= 0:
+        return None
+
+    strip_path = cache_path("thumbnails", identity, (count, height), "jpg")
+    info = {"path": strip_path, "count": count, "interval": duration / count, "duration": duration}
+    if os.path.isfile(strip_path):
+        return info
+
+    # Se escribe a un temporal para que una generación interrumpida no deje una tira corrupta en caché
+    tmp_path = strip_path + ".tmp.jpg"
+    command = thumbnail_strip_command(video_path, tmp_path, duration, count, height)
+    print(" ".join(command))
+    result = subprocess.run(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, creationflags=CREATE_NO_WINDOW
+    )
+    if result.returncode != 0 or not os.path.isfile(tmp_path):
+        print("Error generando miniaturas:", result.stderr.strip())
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
+
+    os.replace(tmp_path, strip_path)
+    return info
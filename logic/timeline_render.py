@@ -0,0 +1,344 @@
+# logic/timeline_render.py
+"""
+Render de una línea de tiempo (EDL o CSV) que monta cortes de varios vídeos.
+
+Cada clip de la línea de tiempo se convierte en uno o dos segmentos MPEG-TS
+temporales que se generan en paralelo:
+- Si todas las fuentes comparten códec H.264, perfil, nivel, resolución y FPS,
+  los tramos que empiezan en un fotograma clave se copian sin recodificar; si
+  el punto de entrada no cae en uno, solo se recodifica la cabecera hasta el
+  siguiente fotograma clave (con el mismo perfil y nivel que las fuentes, para
+  que los decodificadores acepten la mezcla) y el resto se copia.
+- Los clips con fundidos, o todos si las fuentes no son compatibles, se
+  recodifican normalizados a la resolución y FPS del primer clip.
+El audio de cada segmento se codifica siempre a AAC 48 kHz estéreo para que la
+concatenación sea continua (con silencio si una fuente no tiene audio). Al
+final los segmentos se concatenan con copia de streams en la salida y la
+carpeta temporal se elimina.
+
+Formatos de entrada admitidos:
+- CSV: una línea por clip "fuente, entrada, salida[, fade_in[, fade_out]]"
+  (tiempos en segundos o hh:mm:ss; rutas relativas a la carpeta del archivo).
+- EDL CMX3600 básico: eventos de vídeo con timecodes hh:mm:ss:ff y la fuente
+  en el comentario "* FROM CLIP NAME:" (o el nombre de la cinta).
+"""
+
+import os
+import re
+import tempfile
+
+from logic.ffmpeg_logic import (
+    get_unique_filename, parse_time_to_seconds, get_video_stream_info, get_audio_streams,
+    write_concat_file, get_video_profile_level
+)
+from logic.frame_index import get_frame_index
+
+
+AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k", "-ar", "48000", "-ac", "2"]
+
+# Perfil H.264 según ffprobe -> valor de -profile:v de libx264
+H264_PROFILES = {
+    "Baseline": "baseline",
+    "Constrained Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "High 10": "high10",
+    "High 4:2:2": "high422",
+    "High 4:4:4 Predictive": "high444",
+}
+
+_EDL_EVENT_RE = re.compile(
+    r"^\s*(\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+"
+    r"(\d{2}:\d{2}:\d{2}[:;]\d{2})\s+(\d{2}:\d{2}:\d{2}[:;]\d{2})\s+"
+    r"(\d{2}:\d{2}:\d{2}[:;]\d{2})\s+(\d{2}:\d{2}:\d{2}[:;]\d{2})"
+)
+_EDL_CLIP_NAME_RE = re.compile(r"^\s*\*\s*FROM CLIP NAME:\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def timecode_to_seconds(timecode, fps):
+    """Convierte un timecode hh:mm:ss:ff (o hh:mm:ss;ff) en segundos."""
+    hours, minutes, seconds, frames = (int(part) for part in re.split(r"[:;]", timecode))
+    return hours * 3600 + minutes * 60 + seconds + frames / fps
+
+
+def resolve_source(name, base_dir):
+    """Ruta absoluta de una fuente (relativa a la carpeta del EDL/CSV); prueba extensiones de vídeo."""
+    path = name if os.path.isabs(name) else os.path.join(base_dir, name)
+    if os.path.isfile(path):
+        return path
+    for ext in (".mp4", ".mov", ".mkv", ".avi"):
+        if os.path.isfile(path + ext):
+            return path + ext
+    return path
+
+
+def parse_timeline_csv(text, base_dir):
+    """Interpreta un CSV de línea de tiempo. Retorna (clips, mensaje_error)."""
+    clips = []
+    for line_number, raw_line in enumerate(text.splitlines(), start=1):
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [field.strip() for field in re.split(r"[,;\t]", line)]
+        try:
+            start = parse_time_to_seconds(fields[1])
+            end = parse_time_to_seconds(fields[2])
+            fade_in = float(fields[3]) if len(fields) > 3 and fields[3] else 0.0
+            fade_out = float(fields[4]) if len(fields) > 4 and fields[4] else 0.0
+        except (ValueError, IndexError):
+            if not clips and line_number == 1:
+                continue  # Cabecera
+            return [], f"Línea {line_number}: formato inválido ('fuente, entrada, salida[, fade_in, fade_out]')."
+        if end <= start:
+            return [], f"Línea {line_number}: la salida debe ser posterior a la entrada."
+        clips.append({
+            "source": resolve_source(fields[0], base_dir),
+            "start": start, "end": end, "fade_in": fade_in, "fade_out": fade_out,
+        })
+    return clips, ""
+
+
+def parse_timeline_edl(text, base_dir):
+    """
+    Interpreta un EDL CMX3600 básico (solo eventos de vídeo, cortes directos).
+    Los timecodes se convierten con los FPS de cada fuente.
+    Retorna (clips, mensaje_error).
+    """
+    events = []
+    for raw_line in text.splitlines():
+        match = _EDL_EVENT_RE.match(raw_line)
+        if match:
+            _, reel, track, _, src_in, src_out, _, _ = match.groups()
+            if track.upper().startswith("V"):
+                events.append({"reel": reel, "src_in": src_in, "src_out": src_out, "name": None})
+            else:
+                events.append(None)  # Evento de solo audio: se ignora, pero puede llevar comentario
+            continue
+        match = _EDL_CLIP_NAME_RE.match(raw_line)
+        if match and events and events[-1] is not None:
+            events[-1]["name"] = match.group(1)
+
+    clips = []
+    for event in (e for e in events if e is not None):
+        source = resolve_source(event["name"] or event["reel"], base_dir)
+        info = get_video_stream_info(source)
+        if info is None:
+            return [], f"No se pudo analizar la fuente del EDL: {source}"
+        start = timecode_to_seconds(event["src_in"], info["fps"])
+        end = timecode_to_seconds(event["src_out"], info["fps"])
+        if end > start:
+            clips.append({"source": source, "start": start, "end": end, "fade_in": 0.0, "fade_out": 0.0})
+
+    if not clips:
+        return [], "El EDL no contiene eventos de vídeo válidos."
+    return clips, ""
+
+
+def load_timeline_file(file_path):
+    """Carga una línea de tiempo desde un archivo .edl o .csv. Retorna (clips, mensaje_error)."""
+    try:
+        with open(file_path, "r", encoding="utf-8-sig") as f:
+            text = f.read()
+    except OSError as e:
+        return [], f"No se pudo leer el archivo: {e}"
+
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    if file_path.lower().endswith(".edl"):
+        clips, error_message = parse_timeline_edl(text, base_dir)
+    else:
+        clips, error_message = parse_timeline_csv(text, base_dir)
+    if error_message:
+        return [], error_message
+    if not clips:
+        return [], "La línea de tiempo está vacía."
+
+    missing = [clip["source"] for clip in clips if not os.path.isfile(clip["source"])]
+    if missing:
+        return [], f"No se encontró la fuente: {missing[0]}"
+    return clips, ""
+
+
+def copy_compatible(clips):
+    """
+    Comprueba si todas las fuentes permiten mezclar tramos copiados y
+    recodificados: H.264 con el mismo perfil, nivel, resolución, pix_fmt y FPS.
+    Retorna {"profile", "level"} con los argumentos de libx264 que deben usar
+    los tramos recodificados, o None si no son compatibles.
+    """
+    reference = None
+    for source in dict.fromkeys(clip["source"] for clip in clips):
+        info = get_video_stream_info(source)
+        profile_level = get_video_profile_level(source)
+        if info is None or info["codec_name"] != "h264" or profile_level is None:
+            return None
+        if profile_level[0] not in H264_PROFILES:
+            return None
+        key = (info["width"], info["height"], info["pix_fmt"], round(info["fps"], 3), *profile_level)
+        if reference is None:
+            reference = key
+        elif key != reference:
+            return None
+    profile, level = reference[-2:]
+    return {"profile": H264_PROFILES[profile], "level": f"{level / 10:.1f}"}
+
+
+def audio_args(source, duration, with_audio):
+    """
+    Entradas y mapeo de audio de un segmento: el audio de la fuente, silencio
+    si la fuente no tiene (para que todos los segmentos tengan las mismas
+    pistas) o nada si ninguna fuente de la línea de tiempo tiene audio.
+    """
+    if not with_audio:
+        return [], ["-an"]
+    if get_audio_streams(source):
+        return [], ["-map", "0:a:0", *AUDIO_ARGS]
+    silence = ["-f", "lavfi", "-t", str(round(duration, 6)), "-i", "anullsrc=r=48000:cl=stereo"]
+    return silence, ["-map", "1:a:0", *AUDIO_ARGS]
+
+
+def copy_piece_command(source, start, end, seg_path, with_audio=True, fps=30.0):
+    """
+    Segmento copiado: empieza exactamente en un fotograma clave. El seek apunta
+    medio frame después del fotograma clave para no caer en el anterior por
+    redondeo (lo que duplicaría un GOP).
+    """
+    extra_inputs, audio_map = audio_args(source, end - start, with_audio)
+    return [
+        "ffmpeg", "-y",
+        "-noaccurate_seek", "-ss", str(round(start + 0.5 / fps, 6)), "-i", source,
+        *extra_inputs,
+        "-t", str(round(end - start, 6)),
+        "-map", "0:v:0", *audio_map,
+        "-c:v", "copy",
+        "-avoid_negative_ts", "make_zero",
+        "-f", "mpegts", seg_path,
+    ]
+
+
+def encode_piece_command(source, start, end, seg_path, target, fade_in=0.0, fade_out=0.0, with_audio=True):
+    """
+    Segmento recodificado y normalizado a la resolución, FPS y formato de píxel
+    de 'target'; si 'target' trae "profile" y "level" (mezcla con tramos
+    copiados), se fuerzan los de las fuentes.
+    """
+    duration = end - start
+    filters = [
+        f"scale={target['width']}:{target['height']}:force_original_aspect_ratio=decrease",
+        f"pad={target['width']}:{target['height']}:(ow-iw)/2:(oh-ih)/2",
+        f"fps={round(target['fps'], 6)}",
+        f"format={target['pix_fmt']}",
+    ]
+    if fade_in > 0:
+        filters.append(f"fade=t=in:st=0:d={fade_in}")
+    if fade_out > 0 and duration > fade_out:
+        filters.append(f"fade=t=out:st={round(duration - fade_out, 6)}:d={fade_out}")
+
+    extra_inputs, audio_map = audio_args(source, duration, with_audio)
+    return [
+        "ffmpeg", "-y",
+        "-ss", str(round(start, 6)), "-i", source,
+        *extra_inputs,
+        "-t", str(round(duration, 6)),
+        "-map", "0:v:0", *audio_map,
+        "-vf", ",".join(filters),
+        "-c:v", "libx264", "-preset", "medium", "-crf", "18",
+        *(["-profile:v", target["profile"], "-level", target["level"]] if target.get("profile") else []),
+        "-f", "mpegts", seg_path,
+    ]
+
+
+def plan_clip_pieces(clip, allow_copy, fps):
+    """
+    Divide un clip en tramos (inicio, fin, copiar) según sus fotogramas clave.
+    Sin copia (o con fundidos) el clip es un único tramo recodificado.
+    """
+    if not allow_copy or clip["fade_in"] > 0 or clip["fade_out"] > 0:
+        return [(clip["start"], clip["end"], False)]
+
+    index = get_frame_index(clip["source"])
+    if index is None:
+        return [(clip["start"], clip["end"], False)]
+
+    tolerance = 0.5 / fps  # Medio frame
+    if abs(index.keyframe_before(clip["start"]) - clip["start"]) <= tolerance:
+        return [(clip["start"], clip["end"], True)]
+
+    next_keyframe = index.keyframe_after(clip["start"])
+    if next_keyframe is None or next_keyframe >= clip["end"]:
+        return [(clip["start"], clip["end"], False)]
+    return [(clip["start"], next_keyframe, False), (next_keyframe, clip["end"], True)]
+
+
+def timeline_render_job(clips, output_file=None, output_dir=None, output_name=None):
+    """
+    Prepara el render de la línea de tiempo para FFmpegPipelineWorker.
+
+    Retorna un dict con:
+        stages: [segmentos en paralelo], [concatenación final].
+        output_file, temp_dir (se elimina al terminar).
+        segments: lista de (índice de clip, inicio, fin, copiado) por segmento.
+    """
+    if output_file is None:
+        base_dir = output_dir or os.path.dirname(os.path.abspath(clips[0]["source"]))
+        name = (output_name or "").strip() or "timeline"
+        output_file = get_unique_filename(os.path.join(base_dir, f"{name}.mp4"))
+
+    first = get_video_stream_info(clips[0]["source"]) or {}
+    target = {
+        "width": first.get("width", 1920),
+        "height": first.get("height", 1080),
+        "fps": first.get("fps") or 30.0,
+        "pix_fmt": first.get("pix_fmt") or "yuv420p",
+    }
+    copy_params = copy_compatible(clips)
+    allow_copy = copy_params is not None
+    if allow_copy:
+        target.update(copy_params)
+    with_audio = any(get_audio_streams(source) for source in dict.fromkeys(c["source"] for c in clips))
+
+    temp_dir = tempfile.mkdtemp(prefix=".timeline_", dir=os.path.dirname(os.path.abspath(output_file)))
+    steps, segments, segment_paths = [], [], []
+    for clip_number, clip in enumerate(clips):
+        for start, end, copy in plan_clip_pieces(clip, allow_copy, target["fps"]):
+            seg_path = os.path.join(temp_dir, f"seg_{len(segment_paths):05d}.ts")
+            if copy:
+                command = copy_piece_command(clip["source"], start, end, seg_path, with_audio, target["fps"])
+            else:
+                command = encode_piece_command(
+                    clip["source"], start, end, seg_path, target,
+                    clip["fade_in"] if start == clip["start"] else 0.0,
+                    clip["fade_out"] if end == clip["end"] else 0.0,
+                    with_audio,
+                )
+            frames = max(1, int((end - start) * target["fps"]))
+            steps.append({
+                "command": command,
+                "total_frames": frames,
+                # Copiar es mucho más rápido que recodificar: pesa menos en el progreso global
+                "weight": max(1, frames // 10) if copy else frames,
+            })
+            segments.append((clip_number, start, end, copy))
+            segment_paths.append(seg_path)
+
+    concat_list = os.path.join(temp_dir, "segments.txt")
+    write_concat_file(concat_list, segment_paths)
+    total_frames = sum(step["total_frames"] for step in steps)
+    final_step = {
+        "command": [
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0", "-i", concat_list,
+            "-map", "0:v", "-map", "0:a?",
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_file,
+        ],
+        "total_frames": total_frames,
+        "weight": max(1, total_frames // 20),
+    }
+
+    return {
+        "stages": [steps, [final_step]],
+        "output_file": output_file,
+        "temp_dir": temp_dir,
+        "segments": segments,
+    }
@@ -0,0 +1,215 @@
+# logic/waveform.py
+"""
+Caché de picos de forma de onda para dibujar el audio en la interfaz.
+
+FFmpeg decodifica el audio a PCM mono de 16 bits (8 kHz) y lo envía por una
+tubería; los datos se reducen por bloques con NumPy a pares mínimo/máximo y se
+construyen varios niveles de resolución (cada nivel agrupa el doble de
+muestras que el anterior, como un mipmap). Los niveles se guardan en un
+archivo binario compacto (int8) en la caché de disco, por identidad del
+archivo, así que hacer zoom o desplazarse nunca vuelve a decodificar el audio.
+
+NumPy es opcional: si no está instalado, get_waveform_peaks devuelve None y la
+interfaz simplemente no muestra la forma de onda.
+"""
+
+import os
+import struct
+import subprocess
+import sys
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+from logic.media_cache import file_identity, cache_path
+
+
+SAMPLE_RATE = 8000      # Hz del PCM analizado (suficiente para dibujar la envolvente)
+BASE_BLOCK = 64         # Muestras por pico en el nivel 0 (125 picos por segundo)
+MIN_LEVEL_PEAKS = 256   # Se dejan de crear niveles cuando quedan menos picos
+READ_CHUNK = BASE_BLOCK * 2 * 4096  # Bytes leídos de la tubería cada vez
+
+_HEADER = struct.Struct("<4sIII")  # firma, sample_rate, base_block, nº de niveles
+_MAGIC = b"WPK1"
+
+CREATE_NO_WINDOW = 0x08000000 if sys.platform.startswith("win") else 0
+
+_peaks_cache = {}
+_peaks_cache_lock = threading.Lock()
+
+
+def numpy_available():
+    return np is not None
+
+
+class WaveformPeaks:
+    """
+    Niveles de picos de una pista de audio. levels[k] es un array int8 de forma
+    (n, 2) con (mínimo, máximo) de cada bloque de BASE_BLOCK * 2**k muestras.
+    """
+
+    def __init__(self, levels, sample_rate=SAMPLE_RATE, base_block=BASE_BLOCK):
+        self.levels = levels
+        self.sample_rate = sample_rate
+        self.base_block = base_block
+
+    @property
+    def duration(self):
+        return len(self.levels[0]) * self.base_block / self.sample_rate if self.levels else 0.0
+
+    def seconds_per_peak(self, level):
+        return self.base_block * (2 ** level) / self.sample_rate
+
+    def peaks_for_range(self, start, end, columns):
+        """
+        Devuelve un array (columns, 2) con el mínimo y máximo (entre -1 y 1) de cada
+        columna para el intervalo [start, end] en segundos. Usa el nivel más
+        grueso que todavía tenga al menos un pico por columna.
+        """
+        if not self.levels or columns <= 0 or end <= start:
+            return np.zeros((0, 2), dtype=np.float32)
+
+        span = end - start
+        level = 0
+        while (level + 1 < len(self.levels)
+               and span / self.seconds_per_peak(level + 1) >= columns):
+            level += 1
+
+        peaks = self.levels[level]
+        per_peak = self.seconds_per_peak(level)
+        first = max(0, int(start / per_peak))
+        last = min(len(peaks), max(first + 1, int(end / per_peak) + 1))
+        window = peaks[first:last].astype(np.float32) / 128.0
+        if not len(window):
+            return np.zeros((0, 2), dtype=np.float32)
+
+        # Reparte los picos del nivel elegido entre las columnas
+        if len(window) <= columns:
+            return window[np.arange(columns) * len(window) // columns]
+        starts = np.linspace(0, len(window), columns, endpoint=False).astype(np.int64)
+        return np.stack([
+            np.minimum.reduceat(window[:, 0], starts),
+            np.maximum.reduceat(window[:, 1], starts),
+        ], axis=1)
+
+    def save(self, path):
+        """Guarda los niveles en binario: cabecera, nº de picos de cada nivel y los datos int8."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.sample_rate, self.base_block, len(self.levels)))
+            f.write(struct.pack(f"<{len(self.levels)}I", *(len(level) for level in self.levels)))
+            for level in self.levels:
+                f.write(np.ascontiguousarray(level, dtype=np.int8).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Carga un archivo guardado con save(); devuelve None si no existe o no es válido."""
+        try:
+            with open(path, "rb") as f:
+                magic, sample_rate, base_block, n_levels = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return None
+                counts = struct.unpack(f"<{n_levels}I", f.read(4 * n_levels))
+                levels = []
+                for count in counts:
+                    data = np.fromfile(f, dtype=np.int8, count=count * 2)
+                    if len(data) != count * 2:
+                        return None
+                    levels.append(data.reshape(count, 2))
+        except (OSError, struct.error, ValueError):
+            return None
+        return cls(levels, sample_rate, base_block)
+
+
+def build_levels(base_peaks):
+    """Construye los niveles agrupando pares de picos hasta quedar pocos."""
+    levels = [base_peaks]
+    while len(levels[-1]) >= MIN_LEVEL_PEAKS * 2:
+        previous = levels[-1]
+        if len(previous) % 2:
+            previous = np.vstack([previous, previous[-1:]])
+        pairs = previous.reshape(-1, 2, 2)
+        levels.append(np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1))
+    return levels
+
+
+def waveform_pcm_command(media_path):
+    """Comando FFmpeg que escribe por stdout el primer audio como PCM mono s16le a SAMPLE_RATE."""
+    return [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", media_path,
+        "-map", "0:a:0", "-vn", "-sn", "-dn",
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "s16le", "-",
+    ]
+
+
+def compute_peaks(media_path):
+    """
+    Decodifica el audio por tubería y lo reduce a picos de BASE_BLOCK muestras
+    sin cargar el PCM completo en memoria. Retorna WaveformPeaks o None.
+    """
+    proc = subprocess.Popen(
+        waveform_pcm_command(media_path), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        creationflags=CREATE_NO_WINDOW
+    )
+    chunks = []
+    pending = b""
+    while True:
+        data = proc.stdout.read(READ_CHUNK)
+        if not data:
+            break
+        data = pending + data
+        usable = len(data) - len(data) % (BASE_BLOCK * 2)
+        pending = data[usable:]
+        if usable:
+            blocks = np.frombuffer(data[:usable], dtype="<i2").reshape(-1, BASE_BLOCK)
+            chunks.append(np.stack([blocks.min(axis=1), blocks.max(axis=1)], axis=1))
+
+    if len(pending) >= 2:
+        tail = np.frombuffer(pending[:len(pending) - len(pending) % 2], dtype="<i2")
+        chunks.append(np.array([[tail.min(), tail.max()]]))
+
+    stderr = proc.stderr.read().decode("utf-8", errors="replace")
+    proc.wait()
+    if proc.returncode != 0 or not chunks:
+        print("Error generando la forma de onda:", stderr.strip())
+        return None
+
+    # De s16 a int8 (>> 8 conserva el signo); basta para dibujar
+    base_peaks = (np.concatenate(chunks).astype(np.int32) >> 8).astype(np.int8)
+    return WaveformPeaks(build_levels(base_peaks))
+
+
+def get_waveform_peaks(media_path):
+    """
+    Devuelve los picos de forma de onda del primer audio de 'media_path',
+    usando la caché en memoria y en disco. Retorna None si NumPy no está
+    disponible o el archivo no tiene audio.
+    """
+    if np is None:
+        return None
+    identity = file_identity(media_path)
+    if identity is None:
+        return None
+
+    with _peaks_cache_lock:
+        cached = _peaks_cache.get(identity)
+    if cached is not None:
+        return cached
+
+    peaks_path = cache_path("waveforms", identity, (SAMPLE_RATE, BASE_BLOCK), "wpk")
+    peaks = WaveformPeaks.load(peaks_path)
+    if peaks is None:
+        peaks = compute_peaks(media_path)
+        if peaks is None:
+            return None
+        peaks.save(peaks_path)
+
+    with _peaks_cache_lock:
+        _peaks_cache[identity] = peaks
+    return peaks
@@ -9,6 +9,7 @@ import os
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QIcon
 from gui.main_window import FFmpegGUI  # Tu ventana principal
+from logic.metrics_exporter import start_metrics_server
 
 def resource_path(relative_path):
     """
@@ -24,6 +25,14 @@ def resource_path(relative_path):
 
 def main():
     app = QApplication(sys.argv)
+
+    # Exportador OpenMetrics opcional (sólo localhost) para equipos de render desatendidos
+    metrics_port = os.environ.get("FFMPEG_GUI_METRICS_PORT")
+    if metrics_port:
+        try:
+            start_metrics_server(int(metrics_port))
+        except (OSError, ValueError) as e:
+            print("Error iniciando el exportador de métricas:", e)
     
     # Utiliza la función resource_path para obtener la ruta correcta al icono
     icon_path = resource_path("static\icons\icon.ico")